@@ -0,0 +1,198 @@
+"""Compare requests per second of HTTP transport settings of `AsyncTgClient`, HTTP/1.1 and HTTP/2 included.
+
+By default requests are sent to a local stub of Telegram Bot API started in a background thread:
+
+    python benchmarks/http_transport.py --requests 2000 --concurrency 50
+
+The stub serves HTTP/1.1 and HTTP/2 on the same plain TCP port. Without TLS there is no ALPN to negotiate
+the protocol, so the client speaks HTTP/2 with prior knowledge, i.e. h2c. Both protocols get the same
+replies from the same server, so the difference comes from the transport only. HTTP/2 requires `h2` package,
+install it with `pip install tg-api[http2]`. To measure a real server pass its URL, e.g. local Bot API server
+behind nginx:
+
+    python benchmarks/http_transport.py --tg-server-url https://localhost:8443 --token 123:secret
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import threading
+import time
+
+from contextlib import ExitStack, contextmanager
+from typing import Any, Generator, Iterator
+
+import anyio
+import httpx
+
+from tg_api import AsyncTgClient, SendMessageRequest
+from tg_api.client import DEFAULT_HTTP_LIMITS, DEFAULT_HTTP_TIMEOUT
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+except ImportError:  # pragma: no cover
+    h2 = None  # type: ignore[assignment]
+
+# Settings compared: name, http2, limits
+HTTP1_SETTINGS = [
+    ('httpx defaults', False, httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=5)),
+    ('tg_api defaults', False, DEFAULT_HTTP_LIMITS),
+]
+HTTP2_SETTINGS = [
+    ('http2', True, httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=60)),
+]
+
+SEND_MESSAGE_RESPONSE = json.dumps({
+    'ok': True,
+    'result': {
+        'message_id': 1,
+        'date': 1686840262,
+        'chat': {'id': 1, 'type': 'private', 'first_name': 'Benchmark'},
+        'text': 'Hello World!',
+    },
+}).encode('utf-8')
+HTTP1_RESPONSE = (
+    b'HTTP/1.1 200 OK\r\n'
+    b'Content-Type: application/json\r\n'
+    + f'Content-Length: {len(SEND_MESSAGE_RESPONSE)}\r\n\r\n'.encode('ascii')
+    + SEND_MESSAGE_RESPONSE
+)
+HTTP2_RESPONSE_HEADERS = [
+    (':status', '200'),
+    ('content-type', 'application/json'),
+    ('content-length', str(len(SEND_MESSAGE_RESPONSE))),
+]
+# Connection preface of HTTP/2 starts with `PRI * HTTP/2.0`, while HTTP/1.1 requests start with the method
+HTTP2_PREFACE_START = b'PRI'
+CONTENT_LENGTH_PATTERN = re.compile(rb'^content-length:\s*(\d+)', re.IGNORECASE | re.MULTILINE)
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Reply to every request of the connection with `sendMessage` result, whatever protocol it speaks."""
+    try:
+        start = await reader.readexactly(len(HTTP2_PREFACE_START))
+        if start == HTTP2_PREFACE_START:
+            await serve_http2(reader, writer, start)
+        else:
+            await serve_http1(reader, writer, start)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        # Client closed the connection
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_http1(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, start: bytes) -> None:
+    head = start + await reader.readuntil(b'\r\n\r\n')
+    while True:
+        content_length = CONTENT_LENGTH_PATTERN.search(head)
+        await reader.readexactly(int(content_length[1]) if content_length else 0)
+        writer.write(HTTP1_RESPONSE)
+        await writer.drain()
+        head = await reader.readuntil(b'\r\n\r\n')
+
+
+async def serve_http2(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, start: bytes) -> None:
+    connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+    connection.initiate_connection()
+    data = start
+    while data:
+        for event in connection.receive_data(data):
+            handle_http2_event(connection, event)
+        writer.write(connection.data_to_send())
+        await writer.drain()
+        data = await reader.read(65536)
+
+
+def handle_http2_event(connection: Any, event: Any) -> None:
+    if isinstance(event, h2.events.DataReceived):
+        # Return flow control window, otherwise the client stops sending after 64 KiB of request bodies
+        connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+    elif isinstance(event, h2.events.StreamEnded):
+        connection.send_headers(event.stream_id, HTTP2_RESPONSE_HEADERS)
+        connection.send_data(event.stream_id, SEND_MESSAGE_RESPONSE, end_stream=True)
+
+
+@contextmanager
+def start_stub_server() -> Generator[str, None, None]:
+    """Run the stub in the event loop of a background thread, so it does not compete with the client loop."""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle_connection, '127.0.0.1', 0))
+    host, port = server.sockets[0].getsockname()[:2]
+    thread = threading.Thread(target=loop.run_forever, name='http-transport-stub', daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{port}'
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+        loop.close()
+
+
+def make_session(tg_server_url: str, http2: bool, limits: httpx.Limits) -> httpx.AsyncClient:
+    if http2 and tg_server_url.startswith('http://'):
+        # Plain TCP has no ALPN, so HTTP/2 is used with prior knowledge instead of falling back to HTTP/1.1
+        transport = httpx.AsyncHTTPTransport(http1=False, http2=True, limits=limits)
+        return httpx.AsyncClient(transport=transport, timeout=DEFAULT_HTTP_TIMEOUT)
+    return httpx.AsyncClient(http2=http2, limits=limits, timeout=DEFAULT_HTTP_TIMEOUT)
+
+
+async def measure(
+    token: str,
+    tg_server_url: str,
+    http2: bool,
+    limits: httpx.Limits,
+    requests_count: int,
+    concurrency: int,
+) -> dict[str, float]:
+    latencies: list[float] = []
+    chat_ids: Iterator[int] = iter(range(requests_count))
+
+    async def send_messages() -> None:
+        for chat_id in chat_ids:
+            started_at = time.perf_counter()
+            await SendMessageRequest(chat_id=chat_id, text='Hello World!').asend_raw()
+            latencies.append(time.perf_counter() - started_at)
+
+    async with make_session(tg_server_url, http2, limits) as session:
+        async with AsyncTgClient.setup(token, tg_server_url=tg_server_url, session=session):
+            started_at = time.perf_counter()
+            async with anyio.create_task_group() as task_group:
+                for _ in range(concurrency):
+                    task_group.start_soon(send_messages)
+            elapsed = time.perf_counter() - started_at
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'rps': requests_count / elapsed,
+        'p50_ms': percentiles[49] * 1000,
+        'p99_ms': percentiles[98] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='Number of requests for every setting')
+    parser.add_argument('--concurrency', type=int, default=50, help='Number of requests sent at once')
+    parser.add_argument('--tg-server-url', help='Bot API server to use instead of the local stub')
+    parser.add_argument('--token', default='123:benchmark', help='Bot token for the server')
+    args = parser.parse_args()
+
+    if not h2:
+        parser.error('HTTP/2 requires h2 package, install it with `pip install tg-api[http2]`')
+
+    with ExitStack() as stack:
+        tg_server_url = args.tg_server_url or stack.enter_context(start_stub_server())
+
+        print(f'{"settings":<16} {"rps":>8} {"p50, ms":>8} {"p99, ms":>8}')  # noqa T201
+        for name, http2, limits in HTTP1_SETTINGS + HTTP2_SETTINGS:
+            result = anyio.run(measure, args.token, tg_server_url, http2, limits, args.requests, args.concurrency)
+            print(f'{name:<16} {result["rps"]:>8.0f} {result["p50_ms"]:>8.2f} {result["p99_ms"]:>8.2f}')  # noqa T201
+
+
+if __name__ == '__main__':
+    main()
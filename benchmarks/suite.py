@@ -0,0 +1,229 @@
+"""Measure performance baselines of tg_api and print them as JSON.
+
+Micro benchmarks cover construction and validation of `SendMessageRequest`, its JSON encoding, parsing
+of `SendMessageResponse` and building of multipart form of `SendBytesPhotoRequest`. End-to-end benchmarks
+count messages per second sent by sync and async clients to local `FakeBotApi` server:
+
+    python benchmarks/suite.py --output benchmarks/results.json
+
+Results of different releases are diffed by keys, pass the previous results to print the ratios:
+
+    python benchmarks/suite.py --compare benchmarks/results.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import anyio
+
+from tg_api import (
+    AsyncTgClient,
+    SendBytesPhotoRequest,
+    SendMessageRequest,
+    SendMessageResponse,
+    SyncTgClient,
+)
+from tg_api.fake_bot_api import FakeBotApi
+from tg_api.input_files import StreamingMultipartForm
+from tg_api.json_codecs import DEFAULT_JSON_CODEC
+
+SAMPLE_PHOTO_PATH = Path(__file__).parent.parent / 'tests' / 'samples' / 'sample_640×426.jpeg'
+TOKEN = '123:benchmark'
+
+# Validation from plain dicts is measured, as they come from application code
+REPLY_MARKUP: Any = {
+    'inline_keyboard': [
+        [{'text': 'Yes', 'callback_data': 'answer:yes'}, {'text': 'No', 'callback_data': 'answer:no'}],
+        [{'text': 'Open site', 'url': 'https://example.com/'}],
+    ],
+}
+MESSAGE_TEXT = 'Hello, World! Your order #12345 is ready, see details on the site.'
+MESSAGE_ENTITIES: Any = [
+    {'type': 'bold', 'offset': 0, 'length': 13},
+    {'type': 'hashtag', 'offset': 25, 'length': 6},
+    {'type': 'text_link', 'offset': 55, 'length': 4, 'url': 'https://example.com/'},
+]
+
+# Response of sendMessage to a group with a formatted text replying to another message
+SEND_MESSAGE_RESPONSE = json.dumps({
+    'ok': True,
+    'result': {
+        'message_id': 1002,
+        'from': {'id': 123, 'is_bot': True, 'first_name': 'Benchmark Bot', 'username': 'benchmark_bot'},
+        'chat': {'id': -1001234567890, 'title': 'Benchmark Group', 'type': 'supergroup'},
+        'date': 1686840262,
+        'reply_to_message': {
+            'message_id': 1001,
+            'from': {
+                'id': 987654321,
+                'is_bot': False,
+                'first_name': 'Ivan',
+                'last_name': 'Ivanov',
+                'username': 'ivanov',
+                'language_code': 'ru',
+            },
+            'chat': {'id': -1001234567890, 'title': 'Benchmark Group', 'type': 'supergroup'},
+            'date': 1686840200,
+            'text': '/order 12345',
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+        },
+        'text': MESSAGE_TEXT,
+        'entities': MESSAGE_ENTITIES,
+        'reply_markup': REPLY_MARKUP,
+    },
+}).encode('utf-8')
+
+
+def make_send_message_request() -> SendMessageRequest:
+    return SendMessageRequest(
+        chat_id=-1001234567890,
+        text=MESSAGE_TEXT,
+        entities=MESSAGE_ENTITIES,
+        disable_web_page_preview=True,
+        reply_markup=REPLY_MARKUP,
+    )
+
+
+def build_photo_form(photo: bytes) -> int:
+    """Build the multipart form the way the client does and return its size."""
+    request = SendBytesPhotoRequest(chat_id=1, photo=photo, filename='photo.jpeg', caption=MESSAGE_TEXT)
+    content, files = request.get_form()
+    request.encode_multipart_content(content, DEFAULT_JSON_CODEC)
+    form = StreamingMultipartForm(content, files)
+    return sum(len(chunk) for chunk in form.iter_chunks())
+
+
+def measure_operation(operation: Callable[[], Any], repeat: int, min_time: float) -> dict[str, float]:
+    """Time the operation and return the best of several runs, the least disturbed by other processes."""
+    timer = timeit.Timer(operation)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    best_time = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {
+        'us_per_op': best_time * 1e6,
+        'ops_per_sec': 1 / best_time,
+    }
+
+
+def run_micro_benchmarks(repeat: int, min_time: float) -> dict[str, dict[str, float]]:
+    request = make_send_message_request()
+    photo = SAMPLE_PHOTO_PATH.read_bytes()
+    operations: dict[str, Callable[[], Any]] = {
+        'send_message_request_validation': make_send_message_request,
+        'send_message_request_json': lambda: request.json(exclude_none=True),
+        'send_message_response_parse_raw': lambda: SendMessageResponse.parse_raw(SEND_MESSAGE_RESPONSE),
+        'send_bytes_photo_multipart_build': lambda: build_photo_form(photo),
+    }
+    return {name: measure_operation(operation, repeat, min_time) for name, operation in operations.items()}
+
+
+def count_messages_per_second(send_messages: Callable[[], None], messages_count: int) -> dict[str, float]:
+    started_at = time.perf_counter()
+    send_messages()
+    elapsed = time.perf_counter() - started_at
+    return {'messages_per_sec': messages_count / elapsed}
+
+
+def measure_sync_client(tg_server_url: str, messages_count: int, threads: int) -> dict[str, float]:
+    chat_ids: Iterator[int] = iter(range(messages_count))
+
+    def send_messages() -> None:
+        with SyncTgClient.setup(TOKEN, tg_server_url=tg_server_url, threads=threads):
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(lambda chat_id: SendMessageRequest(chat_id=chat_id, text='Hi').send(), chat_ids))
+
+    return count_messages_per_second(send_messages, messages_count)
+
+
+def measure_async_client(tg_server_url: str, messages_count: int, concurrency: int) -> dict[str, float]:
+    chat_ids: Iterator[int] = iter(range(messages_count))
+
+    async def send_messages() -> None:
+        for chat_id in chat_ids:
+            await SendMessageRequest(chat_id=chat_id, text='Hi').asend()
+
+    async def send_concurrently() -> None:
+        async with AsyncTgClient.setup(TOKEN, tg_server_url=tg_server_url):
+            async with anyio.create_task_group() as task_group:
+                for _ in range(concurrency):
+                    task_group.start_soon(send_messages)
+
+    return count_messages_per_second(lambda: anyio.run(send_concurrently), messages_count)
+
+
+def run_end_to_end_benchmarks(messages_count: int, concurrency: int) -> dict[str, dict[str, float]]:
+    with FakeBotApi.start() as fake_api:
+        return {
+            'sync_client_sequential': measure_sync_client(fake_api.url, messages_count, threads=1),
+            'sync_client_concurrent': measure_sync_client(fake_api.url, messages_count, concurrency),
+            'async_client_sequential': measure_async_client(fake_api.url, messages_count, concurrency=1),
+            'async_client_concurrent': measure_async_client(fake_api.url, messages_count, concurrency),
+        }
+
+
+def get_tg_api_version() -> str | None:
+    try:
+        return metadata.version('tg_api')
+    except metadata.PackageNotFoundError:
+        # Sources are not installed as a package, e.g. run from a checkout
+        return None
+
+
+def compare_results(results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Print the ratio of every metric to the baseline, more than 1 means faster for both kinds of metrics."""
+    for group, metric in (('micro', 'ops_per_sec'), ('end_to_end', 'messages_per_sec')):
+        baseline_group: dict[str, Any] = baseline.get(group, {})
+        # Benchmarks added or removed since the baseline are skipped, the rest are printed in the order of the run
+        names: list[str] = [name for name in results[group] if name in baseline_group]
+        for name in names:
+            ratio = results[group][name][metric] / baseline_group[name][metric]
+            print(f'{name:<40} {ratio:>6.2f}x', file=sys.stderr)  # noqa T201
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', type=Path, help='File to write results to instead of stdout')
+    parser.add_argument('--compare', type=Path, help='Results of the previous run to compare with')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of every micro benchmark, the best is taken')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimal duration of a run in seconds')
+    parser.add_argument('--messages', type=int, default=2000, help='Messages sent by every end-to-end benchmark')
+    parser.add_argument('--concurrency', type=int, default=20, help='Threads or tasks sending messages at once')
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'tg_api_version': get_tg_api_version(),
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'json_codec': DEFAULT_JSON_CODEC.name,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'messages': args.messages,
+            'concurrency': args.concurrency,
+        },
+        'micro': run_micro_benchmarks(args.repeat, args.min_time),
+        'end_to_end': run_end_to_end_benchmarks(args.messages, args.concurrency),
+    }
+    # Baseline is read before the output is written, so both options may point to the same file
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+    serialized_results = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(serialized_results + '\n')
+    else:
+        print(serialized_results)  # noqa T201
+
+    if baseline:
+        compare_results(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -255,3 +255,27 @@ def edit_message_media_document_response() -> dict[str, typing.Any]:
             }),
         },
     ).dict()
+
+
+@pytest.fixture
+def group_message_payload() -> dict[str, typing.Any]:
+    return {
+        'message_id': 3033,
+        'from': {'id': 43434343, 'is_bot': False, 'first_name': 'Евгений', 'username': 'anonymous'},
+        'chat': {'id': -1001234567890, 'type': 'supergroup', 'title': 'Test group'},
+        'date': 1686840262,
+        'text': '/start hello',
+        'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+        'reply_to_message': {
+            'message_id': 3032,
+            'chat': {'id': -1001234567890, 'type': 'supergroup', 'title': 'Test group'},
+            'date': 1686840000,
+            'photo': [{'file_id': 'AgAD', 'file_unique_id': 'AQAD', 'width': 10, 'height': 10}],
+        },
+        'reply_markup': {
+            'inline_keyboard': [
+                [{'text': 'button_1', 'callback_data': 'test'}, {'text': 'button_2', 'url': 'https://example.com'}],
+            ],
+        },
+        'unknown_new_field': 'ignored',
+    }
@@ -0,0 +1,50 @@
+import typing
+
+import pytest
+import pytest_httpx
+
+from tg_api import MessageAck, TgRuntimeError, tg_methods
+
+
+@pytest.mark.anyio
+async def test_asend_ack(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Не тратить CPU на разбор ответа, если нужен только id сообщения: !func
+        Проверить отправку сообщения с коротким подтверждением: !story
+            сделано: yes
+            старт: Отправка сообщения методом asend_ack
+            успех: Получены message_id, chat_id и date отправленного сообщения
+    """  # noqa D205 D400
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json=get_message_response)
+
+    async with tg_methods.AsyncTgClient.setup('token'):
+        ack = await tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').asend_ack()
+
+    assert ack == MessageAck(message_id=12345, chat_id=1234567890, date=1686840262)
+    assert not hasattr(ack, '__dict__')
+
+
+def test_send_ack(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_document_response: dict[str, typing.Any],
+    delete_message_response: dict[str, typing.Any],
+) -> None:
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendDocument', json=get_document_response)
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/deleteMessage', json=delete_message_response)
+
+    with tg_methods.SyncTgClient.setup('token'):
+        ack = tg_methods.SendBytesDocumentRequest(chat_id=1234567890, document=b'document').send_ack()
+        assert ack.message_id == 12345
+
+        ack = tg_methods.DeleteMessageRequest(chat_id=1234567890, message_id=12345).send_ack()
+        assert ack == MessageAck(message_id=None, chat_id=None, date=None)
+
+
+def test_send_ack_not_ok(httpx_mock: pytest_httpx.HTTPXMock) -> None:
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json={'ok': False})
+
+    with tg_methods.SyncTgClient.setup('token'):
+        with pytest.raises(TgRuntimeError):
+            tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').send_ack()
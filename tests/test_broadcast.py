@@ -0,0 +1,73 @@
+import json
+import typing
+
+import httpx
+import pytest
+import pytest_httpx
+
+from tg_api import TgHttpStatusError, tg_methods
+
+
+@pytest.fixture(params=['asyncio', 'trio'])
+def anyio_backend(request: pytest.FixtureRequest) -> str:
+    return request.param
+
+
+async def generate_chat_ids(count: int) -> typing.AsyncGenerator[int, None]:
+    for chat_id in range(1, count + 1):
+        yield chat_id
+
+
+@pytest.mark.anyio
+async def test_broadcast(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Разослать одно сообщение множеству получателей без своих циклов gather: !func
+        Проверить рассылку с ограниченной параллельностью: !story
+            сделано: yes
+            старт: Рассылка сообщения 20 получателям, одному из которых отправка не удалась
+            успех: Получены результаты по каждому получателю, ошибка не прервала рассылку
+    """  # noqa D205 D400
+    url = 'https://api.telegram.org/bottoken/sendMessage'
+
+    def send_message(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)['chat_id'] == 13:
+            return httpx.Response(status_code=403, json={'ok': False, 'error_code': 403})
+        return httpx.Response(status_code=200, json=get_message_response)
+
+    httpx_mock.add_callback(send_message, url=url)
+
+    async with tg_methods.AsyncTgClient.setup('token') as tg_client:
+        async with tg_client.broadcast(
+            generate_chat_ids(20),
+            lambda chat_id: tg_methods.SendMessageRequest(chat_id=chat_id, text='Hello World!'),
+            concurrency=4,
+        ) as results:
+            results_by_chat_id = {result.chat_id: result async for result in results}
+
+    assert sorted(results_by_chat_id) == list(range(1, 21))
+    assert isinstance(results_by_chat_id[13].error, TgHttpStatusError)
+    assert results_by_chat_id[13].message_id is None
+    assert results_by_chat_id[1].error is None
+    assert results_by_chat_id[1].message_id == 12345
+
+
+@pytest.mark.anyio
+async def test_broadcast_stopped_early(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json=get_message_response)
+
+    async with tg_methods.AsyncTgClient.setup('token') as tg_client:
+        async with tg_client.broadcast(
+            range(1, 1000),
+            lambda chat_id: tg_methods.SendMessageRequest(chat_id=chat_id, text='Hello World!'),
+            concurrency=2,
+        ) as results:
+            async for result in results:
+                assert result.message_id == 12345
+                break
+
+    assert len(httpx_mock.get_requests()) < 10
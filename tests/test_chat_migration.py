@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+import typing
+
+import pytest
+import pytest_httpx
+
+from tg_api import (
+    MemoryChatMigrationCache,
+    RetryPolicy,
+    SqliteChatMigrationCache,
+    TgHttpStatusError,
+    tg_methods,
+)
+
+MIGRATION_RESPONSE = {
+    'ok': False,
+    'error_code': 400,
+    'description': 'Bad Request: group chat was upgraded to a supergroup chat',
+    'parameters': {'migrate_to_chat_id': -1001234567890},
+}
+
+
+def test_memory_cache_eviction() -> None:
+    cache = MemoryChatMigrationCache(maxsize=2)
+    cache.set(-1, -1001)
+    cache.set(-2, -1002)
+    assert cache.get(-1) == -1001
+
+    cache.set(-3, -1003)
+    assert cache.get(-2) is None
+    assert cache.resolve(-1) == -1001
+    assert cache.resolve(-3) == -1003
+    assert cache.resolve(12345) == 12345
+    assert cache.resolve(None) is None
+
+
+def test_sqlite_cache_survives_restart(tmp_path: Path) -> None:
+    cache = SqliteChatMigrationCache(tmp_path / 'chat_migrations.sqlite3')
+    cache.set(-1, -1001)
+    cache.close()
+
+    cache = SqliteChatMigrationCache(tmp_path / 'chat_migrations.sqlite3')
+    assert cache.get(-1) == -1001
+    assert cache.get(-2) is None
+    cache.close()
+
+
+def test_failed_response_fills_cache(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Не тратить лишний запрос на отправку в группу, ставшую супергруппой: !func
+        Проверить подмену chat_id из кеша миграций: !story
+            сделано: yes
+            старт: Первая отправка в старую группу завершилась ошибкой с migrate_to_chat_id
+            успех: Следующие запросы сразу уходят в супергруппу
+    """  # noqa D205 D400
+    url = 'https://api.telegram.org/bottoken/sendMessage'
+    httpx_mock.add_response(url=url, status_code=400, json=MIGRATION_RESPONSE)
+    httpx_mock.add_response(url=url, json=get_message_response)
+    cache = MemoryChatMigrationCache()
+
+    with tg_methods.SyncTgClient.setup('token', chat_migration_cache=cache):
+        tg_request = tg_methods.SendMessageRequest(chat_id=-1234567890, text='Hello World!')
+        with pytest.raises(TgHttpStatusError):
+            tg_request.send()
+        tg_request.send()
+
+    _, second_request = httpx_mock.get_requests()
+    assert json.loads(second_request.content)['chat_id'] == -1001234567890
+    assert cache.get(-1234567890) == -1001234567890
+
+
+@pytest.mark.anyio
+async def test_cache_with_retry_policy(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    url = 'https://api.telegram.org/bottoken/sendMessage'
+    httpx_mock.add_response(url=url, status_code=400, json=MIGRATION_RESPONSE)
+    httpx_mock.add_response(url=url, json=get_message_response)
+    cache = MemoryChatMigrationCache()
+
+    async with tg_methods.AsyncTgClient.setup('token', retry_policy=RetryPolicy(), chat_migration_cache=cache):
+        await tg_methods.SendMessageRequest(chat_id=-1234567890, text='Hello World!').asend()
+        await tg_methods.SendMessageRequest(chat_id=-1234567890, text='Hello World!').asend()
+
+    chat_ids = [json.loads(request.content)['chat_id'] for request in httpx_mock.get_requests()]
+    assert chat_ids == [-1234567890, -1001234567890, -1001234567890]
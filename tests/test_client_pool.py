@@ -0,0 +1,56 @@
+import json
+import typing
+
+import anyio
+import pytest
+import pytest_httpx
+
+from tg_api import TgClientPool, tg_methods
+
+
+@pytest.mark.anyio
+async def test_client_pool_routing(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Обслуживать десятки ботов в одном процессе с общим пулом соединений: !func
+        Проверить маршрутизацию запросов по ботам: !story
+            сделано: yes
+            старт: Два бота одновременно отправляют сообщения через общий пул
+            успех: Запросы ушли с токенами своих ботов, метрики посчитаны по каждому боту
+    """  # noqa D205 D400
+    httpx_mock.add_response(url='https://api.telegram.org/bot1:first/sendMessage', json=get_message_response)
+    httpx_mock.add_response(
+        url='https://api.telegram.org/bot2:second/sendMessage',
+        status_code=429,
+        json={'ok': False, 'error_code': 429, 'parameters': {'retry_after': 1}},
+    )
+
+    async def send_message(bot: str) -> None:
+        with pool.use(bot):
+            try:
+                await tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').asend()
+            except tg_methods.TgHttpStatusError:
+                pass
+
+    async with TgClientPool.setup({'first': '1:first', 'second': '2:second'}) as pool:
+        assert pool['first'].session is pool['second'].session
+        assert pool['first'].rate_limiter is not pool['second'].rate_limiter
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(send_message, 'first')
+            tg.start_soon(send_message, 'second')
+            tg.start_soon(send_message, 'first')
+
+    assert pool.metrics['first'].requests == 2
+    assert pool.metrics['first'].successful_responses == 2
+    assert pool.metrics['second'].failed_responses == 1
+    assert pool.metrics['second'].flood_wait_responses == 1
+    assert {json.loads(request.content)['chat_id'] for request in httpx_mock.get_requests()} == {1234567890}
+
+
+@pytest.mark.anyio
+async def test_client_pool_empty_token() -> None:
+    with pytest.raises(ValueError, match='second'):
+        async with TgClientPool.setup({'first': '1:first', 'second': ''}):
+            pass
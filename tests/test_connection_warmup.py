@@ -0,0 +1,49 @@
+import time
+
+import anyio
+import httpx
+import pytest
+import pytest_httpx
+
+from tg_api import AsyncTgClient, SyncTgClient
+
+GET_ME_URL = 'https://api.telegram.org/bottoken/getMe'
+GET_ME_RESPONSE = {'ok': True, 'result': {'id': 1, 'is_bot': True, 'first_name': 'Bot'}}
+
+
+@pytest.mark.anyio
+async def test_async_warm_up_and_keepalive(httpx_mock: pytest_httpx.HTTPXMock) -> None:
+    """Программист - Отправлять первое сообщение без задержки на установку соединения: !func
+        Прогреть соединения при запуске клиента: !story
+            сделано: yes
+            старт: Клиент запущен с прогревом трёх соединений и фоновым keepalive
+            успех: При запуске отправлены три запроса getMe, затем они повторяются в фоне
+    """  # noqa D205 D400
+    httpx_mock.add_response(url=GET_ME_URL, json=GET_ME_RESPONSE)
+
+    async with AsyncTgClient.setup('token', warm_up_connections=3, keepalive_interval=0.01):
+        assert len(httpx_mock.get_requests()) == 3
+        await anyio.sleep(0.05)
+
+    requests_count = len(httpx_mock.get_requests())
+    assert requests_count >= 6
+    await anyio.sleep(0.03)
+    assert len(httpx_mock.get_requests()) == requests_count
+
+
+def test_sync_warm_up_and_keepalive(httpx_mock: pytest_httpx.HTTPXMock) -> None:
+    httpx_mock.add_response(url=GET_ME_URL, json=GET_ME_RESPONSE)
+
+    with SyncTgClient.setup('token', warm_up_connections=2, keepalive_interval=0.01):
+        assert len(httpx_mock.get_requests()) == 2
+        time.sleep(0.05)
+
+    assert len(httpx_mock.get_requests()) >= 4
+
+
+@pytest.mark.anyio
+async def test_warm_up_errors_ignored(httpx_mock: pytest_httpx.HTTPXMock) -> None:
+    httpx_mock.add_exception(httpx.ConnectError('Connection refused'), url=GET_ME_URL)
+
+    async with AsyncTgClient.setup('token', warm_up_connections=2):
+        pass
@@ -0,0 +1,77 @@
+import json
+import typing
+
+import anyio
+import httpx
+import pytest
+import pytest_httpx
+
+from tg_api import AsyncTgClient, OrderedDispatcher, tg_methods
+
+
+@pytest.mark.anyio
+async def test_ordered_delivery(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Отправлять сообщения в чат в том порядке, в котором они созданы: !func
+        Отправить несколько сообщений в один чат без ожидания ответов: !story
+            сделано: yes
+            старт: Сообщения в два чата и в тему форума поставлены в очередь подряд
+            успех: В каждый чат и тему сообщения ушли по порядку, а разные чаты отправлялись параллельно
+    """  # noqa D205 D400
+    sent_texts: dict[tuple[int, int | None], list[str]] = {}
+    active_chats: set[tuple[int, int | None]] = set()
+    max_active_chats_count = 0
+
+    async def send_message(request: httpx.Request) -> httpx.Response:
+        nonlocal max_active_chats_count
+        payload = json.loads(request.content)
+        chat_key = (payload['chat_id'], payload.get('message_thread_id'))
+        assert chat_key not in active_chats
+
+        active_chats.add(chat_key)
+        max_active_chats_count = max(max_active_chats_count, len(active_chats))
+        # Later messages are sent faster, so they would overtake earlier ones without ordering
+        await anyio.sleep(0.01 / int(payload['text']))
+        active_chats.remove(chat_key)
+
+        sent_texts.setdefault(chat_key, []).append(payload['text'])
+        return httpx.Response(status_code=200, json=get_message_response)
+
+    httpx_mock.add_callback(send_message, url='https://api.telegram.org/bottoken/sendMessage')
+
+    async with AsyncTgClient.setup('token'):
+        async with OrderedDispatcher.start(max_active_chats=2) as dispatcher:
+            for text in range(1, 6):
+                dispatcher.submit(tg_methods.SendMessageRequest(chat_id=1, text=str(text)))
+                dispatcher.submit(tg_methods.SendMessageRequest(chat_id=2, text=str(text)))
+                dispatcher.submit(tg_methods.SendMessageRequest(chat_id=2, message_thread_id=7, text=str(text)))
+
+    expected_texts = ['1', '2', '3', '4', '5']
+    assert sent_texts == {(1, None): expected_texts, (2, None): expected_texts, (2, 7): expected_texts}
+    assert max_active_chats_count == 2
+
+
+@pytest.mark.anyio
+async def test_dispatcher_errors(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    httpx_mock.add_response(
+        url='https://api.telegram.org/bottoken/sendMessage',
+        match_json={'chat_id': 1, 'text': 'Fail'},
+        status_code=400,
+        json={'ok': False, 'error_code': 400, 'description': 'Bad Request'},
+    )
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json=get_message_response)
+
+    async with AsyncTgClient.setup('token'):
+        async with OrderedDispatcher.start() as dispatcher:
+            failed = dispatcher.submit(tg_methods.SendMessageRequest(chat_id=1, text='Fail'))
+            response = await dispatcher.asend(tg_methods.SendMessageRequest(chat_id=1, text='Hello World!'))
+
+            assert response.result.message_id == 12345
+            assert failed.done
+            with pytest.raises(tg_methods.TgHttpStatusError):
+                await failed.wait()
@@ -0,0 +1,88 @@
+import typing
+
+import httpx
+import pytest
+
+from tg_api import AsyncTgClient, RetryPolicy, SyncTgClient, TgHttpStatusError, tg_methods, tg_types
+from tg_api.fake_bot_api import FakeBotApi
+
+
+@pytest.fixture
+def fake_api() -> typing.Generator[FakeBotApi, None, None]:
+    with FakeBotApi.start() as fake_api:
+        yield fake_api
+
+
+@pytest.mark.anyio
+async def test_client_against_fake_api(fake_api: FakeBotApi) -> None:
+    """Программист - Нагрузочно тестировать бота на ноутбуке без сети: !func
+        Отправить запросы всех видов через настоящий HTTP-транспорт: !story
+            сделано: yes
+            старт: Локальный поддельный Bot API запущен в фоновом потоке
+            успех: Сообщения, файлы, правки и удаление проходят через сокет и возвращают правдоподобные ответы
+    """  # noqa D205 D400
+    async with AsyncTgClient.setup('123:token', tg_server_url=fake_api.url):
+        message = (await tg_methods.SendMessageRequest(chat_id=1, text='Hello', message_thread_id=7).asend()).result
+        photo_request = tg_methods.SendBytesPhotoRequest(chat_id=1, photo=b'photo', caption='Logo')
+        photo_message = (await photo_request.asend()).result
+        document_message = (await tg_methods.SendBytesDocumentRequest(
+            chat_id=-100,
+            document=memoryview(b'report'),
+            filename='report.csv',
+        ).asend()).result
+        edited = (await tg_methods.EditMessageTextRequest(chat_id=1, message_id=message.message_id, text='Hi').asend())
+        edited_media = await tg_methods.EditBytesMessageMediaRequest(
+            chat_id=1,
+            message_id=photo_message.message_id,
+            media=tg_types.InputMediaBytesDocument(media='report', media_content=b'new report'),
+        ).asend()
+        deleted = await tg_methods.DeleteMessageRequest(chat_id=1, message_id=message.message_id).asend()
+
+    assert message.text == 'Hello'
+    assert message.message_thread_id == 7
+    assert photo_message.caption == 'Logo'
+    assert photo_message.photo and photo_message.photo[-1]['file_size'] == len(b'photo')
+    assert document_message.chat.type == 'supergroup'
+    assert document_message.document and document_message.document['file_name'] == 'report.csv'
+    assert isinstance(edited.result, tg_types.Message) and edited.result.text == 'Hi'
+    assert isinstance(edited_media.result, tg_types.Message) and edited_media.result.document
+    assert deleted.result is True
+    assert fake_api.request_counts['sendMessage'] == 1
+    assert fake_api.request_counts['editmessagemedia'] == 1
+
+
+def test_injected_errors() -> None:
+    with FakeBotApi.start(flood_rate=1, retry_after=0) as fake_api:
+        with SyncTgClient.setup('123:token', tg_server_url=fake_api.url, retry_policy=RetryPolicy(max_attempts=3)):
+            with pytest.raises(TgHttpStatusError) as error_info:
+                tg_methods.SendMessageRequest(chat_id=1, text='Hello').send()
+
+        assert error_info.value.response.status_code == 429
+        assert error_info.value.tg_response and error_info.value.tg_response.parameters
+        assert error_info.value.tg_response.parameters.retry_after == 0
+        assert fake_api.request_counts['sendMessage'] == 3
+
+        fake_api.flood_rate = 0
+        fake_api.error_rate = 1
+        with SyncTgClient.setup('123:token', tg_server_url=fake_api.url):
+            with pytest.raises(TgHttpStatusError) as error_info:
+                tg_methods.SendMessageRequest(chat_id=1, text='Hello').send()
+
+        assert error_info.value.response.status_code == 500
+
+
+def test_get_updates(fake_api: FakeBotApi) -> None:
+    first_update_id = fake_api.put_update(message={'message_id': 1, 'date': 0, 'chat': {'id': 1, 'type': 'private'}})
+    fake_api.put_update(message={'message_id': 2, 'date': 0, 'chat': {'id': 1, 'type': 'private'}})
+
+    with httpx.Client(base_url=f'{fake_api.url}/bot123:token/') as session:
+        updates = session.post('getUpdates', json={'offset': first_update_id + 1}).json()['result']
+        messages = [tg_types.Update.parse_obj(update).message for update in updates]
+        assert [message.message_id for message in messages if message] == [2]
+
+        updates = session.get('getUpdates', params={'offset': updates[-1]['update_id'] + 1, 'timeout': 0.1}).json()
+        assert updates == {'ok': True, 'result': []}
+
+        response = session.post('sendMessage', data={'chat_id': 1})
+        assert response.status_code == 400
+        assert response.json()['description'] == 'Bad Request: parameter "text" is required'
@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+import typing
+
+import pytest
+import pytest_httpx
+
+from tg_api import MemoryFileIdCache, SqliteFileIdCache, tg_methods
+
+PHOTO_FILE_ID = 'BQACAgIAAxkBAAMQZJRQU7dV3gHKrckVBQk4NAoy5TsAAvw2AAJq0KlIIuX8ICpuOOwvBA'
+
+
+def test_memory_cache_eviction() -> None:
+    cache = MemoryFileIdCache(maxsize=2)
+    cache.set('1:photo:a', 'file-a')
+    cache.set('1:photo:b', 'file-b')
+    assert cache.get('1:photo:a') == 'file-a'
+
+    cache.set('1:photo:c', 'file-c')
+    assert cache.get('1:photo:b') is None
+    assert cache.get('1:photo:c') == 'file-c'
+
+    cache.delete('1:photo:a')
+    assert cache.get('1:photo:a') is None
+
+
+def test_sqlite_cache_survives_restart(tmp_path: Path) -> None:
+    cache = SqliteFileIdCache(tmp_path / 'file_ids.sqlite3')
+    cache.set('1:document:a', 'file-a')
+    cache.set('1:document:b', 'file-b')
+    cache.delete('1:document:b')
+    cache.close()
+
+    cache = SqliteFileIdCache(tmp_path / 'file_ids.sqlite3')
+    assert cache.get('1:document:a') == 'file-a'
+    assert cache.get('1:document:b') is None
+    cache.close()
+
+
+def test_same_photo_is_sent_by_file_id(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_photo_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Не загружать заново одни и те же картинки и документы: !func
+        Отправить одну картинку несколько раз: !story
+            сделано: yes
+            старт: Картинка уже загружена ботом, её file_id есть в кеше
+            успех: Повторная отправка тех же байтов уходит JSON-запросом с file_id, другие байты загружаются
+    """  # noqa D205 D400
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendPhoto', json=get_photo_response)
+
+    with tg_methods.SyncTgClient.setup('token', file_id_cache=MemoryFileIdCache()):
+        for photo in (b'logo', bytearray(b'logo'), memoryview(b'logo'), b'banner'):
+            tg_methods.SendBytesPhotoRequest(chat_id=1234567890, photo=photo, caption='Logo').send()
+
+    logo_upload, *logo_resends, banner_upload = httpx_mock.get_requests()
+    assert logo_upload.headers['Content-Type'].startswith('multipart/form-data')
+    assert banner_upload.headers['Content-Type'].startswith('multipart/form-data')
+    for request in logo_resends:
+        assert json.loads(request.content) == {'chat_id': 1234567890, 'photo': PHOTO_FILE_ID, 'caption': 'Logo'}
+
+
+@pytest.mark.anyio
+async def test_rejected_file_id_is_uploaded_again(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_document_response: dict[str, typing.Any],
+) -> None:
+    url = 'https://api.telegram.org/bottoken/sendDocument'
+    rejection_response = {
+        'ok': False,
+        'error_code': 400,
+        'description': 'Bad Request: wrong file identifier/HTTP URL specified',
+    }
+    httpx_mock.add_response(url=url, status_code=400, json=rejection_response)
+    httpx_mock.add_response(url=url, json=get_document_response)
+
+    cache = MemoryFileIdCache()
+    async with tg_methods.AsyncTgClient.setup('token', file_id_cache=cache) as client:
+        tg_request = tg_methods.SendBytesDocumentRequest(chat_id=1234567890, document=b'report', filename='report.csv')
+        file_key = tg_request.get_file_key(client)
+        assert file_key
+        cache.set(file_key, 'expired-file-id')
+
+        await tg_request.asend()
+
+    rejected_request, upload_request = httpx_mock.get_requests()
+    assert json.loads(rejected_request.content)['document'] == 'expired-file-id'
+    assert upload_request.headers['Content-Type'].startswith('multipart/form-data')
+    assert cache.get(file_key) == get_document_response['result']['document']['file_id']
@@ -0,0 +1,34 @@
+import typing
+
+import httpx
+import pytest
+import pytest_httpx
+
+from tg_api import AsyncTgClient, SyncTgClient, tg_methods
+from tg_api.client import DEFAULT_HTTP_TIMEOUT
+
+
+@pytest.mark.anyio
+async def test_async_client_http_settings(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Выдерживать всплески рассылки без лишних соединений: !func
+        Настроить HTTP-транспорт клиента: !story
+            сделано: yes
+            старт: Клиент создан с HTTP/2 и своими таймаутами
+            успех: Сессия клиента использует переданные настройки и отправляет запросы
+    """  # noqa D205 D400
+    pytest.importorskip('h2')
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json=get_message_response)
+    timeout = httpx.Timeout(5, connect=1)
+
+    async with AsyncTgClient.setup('token', http2=True, timeout=timeout) as client:
+        assert client.session.timeout == timeout
+        response = await tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').asend()
+        assert response.result.message_id == 12345
+
+
+def test_sync_client_default_http_settings() -> None:
+    with SyncTgClient.setup('token') as client:
+        assert client.session.timeout == DEFAULT_HTTP_TIMEOUT
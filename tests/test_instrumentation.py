@@ -0,0 +1,123 @@
+import json
+import typing
+
+import pytest
+import pytest_httpx
+
+from tg_api import (
+    HistogramObserver,
+    RequestObserver,
+    RequestStats,
+    RetryPolicy,
+    TgHttpStatusError,
+    format_prometheus_metrics,
+    tg_methods,
+)
+
+
+class StatsRecorder(RequestObserver):
+    def __init__(self) -> None:
+        self.stats: list[RequestStats] = []
+
+    def observe(self, stats: RequestStats) -> None:
+        self.stats.append(stats)
+
+
+@pytest.mark.anyio
+async def test_stats_of_every_stage(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+    get_photo_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Понять, на каком этапе запроса к Bot API уходит время: !func
+        Посмотреть время сериализации, сети и разбора ответа по методам: !story
+            сделано: yes
+            старт: Клиенту передан наблюдатель, бот отправляет сообщение, картинку и получает ошибку
+            успех: Наблюдатель получает по одному отчёту на запрос с временем этапов, статусом и error_code
+    """  # noqa D205 D400
+    recorder = StatsRecorder()
+    message_url = 'https://api.telegram.org/bottoken/sendMessage'
+    httpx_mock.add_response(
+        url=message_url,
+        status_code=429,
+        json={'ok': False, 'error_code': 429, 'description': 'Too Many Requests', 'parameters': {'retry_after': 0}},
+    )
+    httpx_mock.add_response(url=message_url, json=get_message_response)
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendPhoto', json=get_photo_response)
+    httpx_mock.add_response(
+        url='https://api.telegram.org/bottoken/deleteMessage',
+        status_code=400,
+        json={'ok': False, 'error_code': 400, 'description': 'Bad Request: message to delete not found'},
+    )
+
+    async with tg_methods.AsyncTgClient.setup('token', retry_policy=RetryPolicy(), observers=[recorder]):
+        await tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').asend()
+        await tg_methods.SendBytesPhotoRequest(chat_id=1234567890, photo=b'photo').asend()
+        with pytest.raises(TgHttpStatusError):
+            await tg_methods.DeleteMessageRequest(chat_id=1234567890, message_id=1).asend()
+
+    message_stats, photo_stats, delete_stats = recorder.stats
+    message_request = httpx_mock.get_requests()[1]
+
+    assert message_stats.api_method == 'sendMessage'
+    assert message_stats.attempts == 2
+    assert (message_stats.status_code, message_stats.error_code) == (200, None)
+    assert message_stats.payload_size == len(message_request.content)
+    assert message_stats.response_size == len(json.dumps(get_message_response))
+    assert message_stats.serialization_time > 0
+    assert message_stats.network_time > 0
+    assert message_stats.parse_time > 0
+    assert message_stats.total_time >= message_stats.serialization_time + message_stats.network_time
+
+    assert photo_stats.api_method == 'sendPhoto'
+    assert photo_stats.network_time > 0
+    assert photo_stats.parse_time > 0
+
+    assert delete_stats.api_method == 'deleteMessage'
+    assert (delete_stats.status_code, delete_stats.error_code) == (400, 400)
+    assert delete_stats.parse_time == 0
+
+
+def test_raw_and_ack_requests_are_observed(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    recorder = StatsRecorder()
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json=get_message_response)
+
+    with tg_methods.SyncTgClient.setup('token', observers=[recorder]):
+        tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').send_raw()
+        tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').send_ack()
+
+    raw_stats, ack_stats = recorder.stats
+    assert raw_stats.api_method == ack_stats.api_method == 'sendMessage'
+    assert raw_stats.attempts == ack_stats.attempts == 1
+    assert raw_stats.parse_time == 0
+    assert ack_stats.parse_time > 0
+
+
+def test_prometheus_metrics(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    histograms = HistogramObserver(buckets=(0.5, 60))
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json=get_message_response)
+    httpx_mock.add_response(
+        url='https://api.telegram.org/bottoken/sendMessage',
+        status_code=403,
+        json={'ok': False, 'error_code': 403, 'description': 'Forbidden: bot was blocked by the user'},
+    )
+
+    with tg_methods.SyncTgClient.setup('token', observers=[histograms]):
+        tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').send()
+        with pytest.raises(TgHttpStatusError):
+            tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').send()
+
+    metrics = format_prometheus_metrics(histograms).splitlines()
+    assert '# TYPE tg_api_request_stage_seconds histogram' in metrics
+    assert 'tg_api_request_stage_seconds_bucket{method="sendMessage",stage="network",le="60.0"} 2' in metrics
+    assert 'tg_api_request_stage_seconds_bucket{method="sendMessage",stage="network",le="+Inf"} 2' in metrics
+    assert 'tg_api_request_stage_seconds_count{method="sendMessage",stage="parse"} 2' in metrics
+    assert 'tg_api_requests_total{method="sendMessage",status="200",error_code=""} 1' in metrics
+    assert 'tg_api_requests_total{method="sendMessage",status="403",error_code="403"} 1' in metrics
+    assert 'tg_api_request_retries_total{method="sendMessage"} 0' in metrics
@@ -0,0 +1,69 @@
+import json
+import typing
+
+from pydantic import ValidationError
+import pytest
+import pytest_httpx
+
+from tg_api import tg_methods, tg_types
+from tg_api.json_codecs import MSGSPEC_CODEC, ORJSON_CODEC, STDLIB_JSON_CODEC, JsonCodec, parse_tg_response
+
+JSON_CODECS = [
+    STDLIB_JSON_CODEC,
+    pytest.param(ORJSON_CODEC, marks=pytest.mark.skipif(not ORJSON_CODEC, reason='orjson is not installed')),
+    pytest.param(MSGSPEC_CODEC, marks=pytest.mark.skipif(not MSGSPEC_CODEC, reason='msgspec is not installed')),
+]
+
+
+def test_stdlib_codec_is_default() -> None:
+    with tg_methods.SyncTgClient.setup('token') as client:
+        assert client.json_codec is STDLIB_JSON_CODEC
+
+
+@pytest.mark.parametrize('json_codec', JSON_CODECS)
+def test_request_encoding(json_codec: JsonCodec, keyboard: tg_types.InlineKeyboardMarkup) -> None:
+    tg_request = tg_methods.SendMessageRequest(
+        chat_id=1234567890,
+        text='Привет, мир!',
+        parse_mode=tg_types.ParseMode.HTML,
+        reply_markup=keyboard,
+    )
+
+    assert json.loads(tg_request.encode_json_payload(json_codec)) == json.loads(tg_request.json(exclude_none=True))
+
+
+@pytest.mark.parametrize('json_codec', JSON_CODECS)
+def test_response_parsing(json_codec: JsonCodec, get_message_response: dict[str, typing.Any]) -> None:
+    json_payload = json.dumps(get_message_response).encode('utf-8')
+
+    response = parse_tg_response(tg_methods.SendMessageResponse, json_payload, json_codec)
+
+    assert response == tg_methods.SendMessageResponse.parse_raw(json_payload)
+    with pytest.raises(ValidationError):
+        parse_tg_response(tg_methods.SendMessageResponse, b'{not a json', json_codec)
+
+
+@pytest.mark.parametrize('json_codec', JSON_CODECS)
+def test_client_json_codec(
+    json_codec: JsonCodec,
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_photo_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Снизить затраты CPU на JSON у нагруженного бота: !func
+        Проверить отправку запросов с быстрым JSON-кодеком: !story
+            сделано: yes
+            старт: Клиент настроен на кодек orjson или msgspec
+            успех: Запросы и ответы кодируются выбранным кодеком и не отличаются от stdlib json
+    """  # noqa D205 D400
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendPhoto', json=get_photo_response)
+
+    with tg_methods.SyncTgClient.setup('token', json_codec=json_codec):
+        response = tg_methods.SendBytesPhotoRequest(
+            chat_id=1234567890,
+            photo=b'photo',
+            caption_entities=[tg_types.MessageEntity(type='bold', offset=0, length=1)],
+        ).send()
+
+    assert response.dict() == get_photo_response
+    [http_request] = httpx_mock.get_requests()
+    assert b'[{"type":' in http_request.read()
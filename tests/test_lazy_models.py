@@ -0,0 +1,75 @@
+import json
+import pickle
+import typing
+
+import pytest
+import pytest_httpx
+
+from tg_api import LazyModel, tg_methods, tg_types
+from tg_api.lazy_models import construct_lazy_model
+
+
+def test_lazy_message_fields(group_message_payload: dict[str, typing.Any]) -> None:
+    """Программист - Не тратить время и память на разбор полей ответа, которые не нужны: !func
+        Проверить ленивый разбор вложенных моделей: !story
+            сделано: yes
+            старт: Из ленивого ответа прочитаны message_id и вложенные модели
+            успех: Вложенные модели разобраны при первом обращении и закешированы
+    """  # noqa D205 D400
+    response = construct_lazy_model(tg_methods.SendMessageResponse, {'ok': True, 'result': group_message_payload})
+
+    assert response.ok is True
+    assert response.result.message_id == 3033
+    assert 'chat' not in vars(response.result)
+
+    assert response.result.chat.id == -1001234567890
+    assert response.result.chat is response.result.chat
+    assert response.result.from_ is not None
+    assert response.result.from_.username == 'anonymous'
+    assert response.result.entities is not None
+    assert response.result.entities[0].type == 'bot_command'
+    assert response.result.reply_to_message is not None
+    assert response.result.reply_to_message.photo is not None
+    assert response.result.reply_to_message.photo[0]['file_id'] == 'AgAD'
+    assert response.result.reply_markup is not None
+    assert response.result.reply_markup.inline_keyboard[0][1].url == 'https://example.com'
+    assert response.result.caption is None
+    assert response.parameters is None
+
+
+def test_lazy_model_is_model(group_message_payload: dict[str, typing.Any]) -> None:
+    lazy_message = construct_lazy_model(tg_types.Message, group_message_payload)
+    message = tg_types.Message.parse_obj(group_message_payload)
+
+    assert isinstance(lazy_message, tg_types.Message)
+    assert isinstance(lazy_message, LazyModel)
+    assert isinstance(lazy_message.chat, tg_types.Chat)
+    assert lazy_message.model_class is tg_types.Message
+    assert type(lazy_message.to_model()) is tg_types.Message
+
+    assert lazy_message == message
+    assert lazy_message.dict() == message.dict()
+    assert lazy_message.json() == message.json()
+    assert repr(lazy_message) == repr(message)
+    assert pickle.loads(pickle.dumps(lazy_message)) == message
+
+    with pytest.raises(AttributeError):
+        lazy_message.unknown_new_field  # type: ignore[attr-defined]
+
+
+@pytest.mark.anyio
+async def test_client_with_lazy_responses(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    group_message_payload: dict[str, typing.Any],
+) -> None:
+    httpx_mock.add_response(
+        url='https://api.telegram.org/bottoken/sendMessage',
+        content=json.dumps({'ok': True, 'result': group_message_payload}).encode(),
+    )
+
+    async with tg_methods.AsyncTgClient.setup('token', lazy_responses=True):
+        response = await tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').asend()
+
+    assert isinstance(response, tg_methods.SendMessageResponse)
+    assert isinstance(response, LazyModel)
+    assert response.result.message_id == 3033
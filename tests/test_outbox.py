@@ -0,0 +1,186 @@
+import io
+import json
+import typing
+from pathlib import Path
+
+import anyio
+import httpx
+import pytest
+import pytest_httpx
+
+from tg_api import AsyncTgClient, RetryPolicy, SqliteOutbox, TgHttpStatusError, TgRuntimeError, tg_methods, tg_types
+
+SEND_MESSAGE_URL = 'https://api.telegram.org/bottoken/sendMessage'
+
+
+@pytest.mark.anyio
+async def test_outbox_survives_restart(
+    tmp_path: Path,
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+    get_photo_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Не терять сообщения при падении воркера: !func
+        Отправить запросы из очереди на диске после перезапуска: !story
+            сделано: yes
+            старт: Запросы положены в очередь, процесс перезапущен
+            успех: После перезапуска все запросы отправлены и удалены из очереди
+    """  # noqa D205 D400
+    httpx_mock.add_response(url=SEND_MESSAGE_URL, json=get_message_response)
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendPhoto', json=get_photo_response)
+    outbox_path = tmp_path / 'outbox.sqlite3'
+
+    outbox = SqliteOutbox(outbox_path)
+    outbox.put_many(
+        tg_methods.SendMessageRequest(chat_id=chat_id, text='Hello World!', parse_mode=tg_types.ParseMode.HTML)
+        for chat_id in range(1, 51)
+    )
+    outbox.put(tg_methods.SendBytesPhotoRequest(chat_id=1, photo=b'\x89PNG\x00\xff', filename='photo.png'))
+    outbox.close()
+
+    outbox = SqliteOutbox(outbox_path, batch_size=20)
+    assert outbox.count_pending() == 51
+
+    async with AsyncTgClient.setup('token'):
+        await outbox.adrain(concurrency=5)
+
+    assert outbox.count_pending() == 0
+    *message_requests, photo_request = httpx_mock.get_requests()
+    assert sorted(json.loads(request.content)['chat_id'] for request in message_requests) == list(range(1, 51))
+    assert json.loads(message_requests[0].content)['parse_mode'] == 'HTML'
+    assert b'\x89PNG\x00\xff' in await photo_request.aread()
+    outbox.close()
+
+
+@pytest.mark.anyio
+async def test_outbox_failures(tmp_path: Path, httpx_mock: pytest_httpx.HTTPXMock) -> None:
+    def add_response(chat_id: int, status_code: int, **parameters: typing.Any) -> None:
+        httpx_mock.add_response(
+            url=SEND_MESSAGE_URL,
+            match_json={'chat_id': chat_id, 'text': 'Hello World!'},
+            status_code=status_code,
+            json={'ok': False, 'error_code': status_code, 'description': 'Error', 'parameters': parameters},
+        )
+
+    add_response(1, 403)
+    add_response(2, 400)
+    add_response(3, 429, retry_after=3600)
+    add_response(4, 502)
+    httpx_mock.add_exception(
+        httpx.ConnectError('Connection refused'),
+        url=SEND_MESSAGE_URL,
+        match_json={'chat_id': 5, 'text': 'Hello World!'},
+    )
+    outbox = SqliteOutbox(tmp_path / 'outbox.sqlite3', retry_policy=RetryPolicy(backoff_base=60))
+    outbox.put_many(tg_methods.SendMessageRequest(chat_id=chat_id, text='Hello World!') for chat_id in range(1, 6))
+
+    async with AsyncTgClient.setup('token'):
+        await outbox.adrain()
+        # Postponed requests are not due yet, so they are not resent
+        await outbox.adrain()
+
+    # Rejected requests are kept as failed, requests failed temporarily stay pending
+    assert outbox.count_pending() == 3
+    assert outbox.get_pending() == []
+    assert len(httpx_mock.get_requests()) == 5
+    outbox.retry_failed()
+    assert [item.request.dict()['chat_id'] for item in outbox.get_pending()] == [1, 2]
+    outbox.close()
+
+
+def test_outbox_retry_delays(tmp_path: Path) -> None:
+    outbox = SqliteOutbox(tmp_path / 'outbox.sqlite3', retry_policy=RetryPolicy(backoff_base=1, backoff_max=8))
+    request = httpx.Request('POST', SEND_MESSAGE_URL)
+
+    def make_error(status_code: int, **parameters: typing.Any) -> TgHttpStatusError:
+        response = httpx.Response(
+            status_code,
+            json={'ok': False, 'error_code': status_code, 'parameters': parameters},
+            request=request,
+        )
+        return TgHttpStatusError(request=request, response=response)
+
+    assert outbox.get_retry_delay(make_error(429, retry_after=30), attempt=1) == 30
+    server_error_delay = outbox.get_retry_delay(make_error(500), attempt=10)
+    assert server_error_delay is not None and 0 <= server_error_delay <= 8
+    network_error_delay = outbox.get_retry_delay(httpx.ReadTimeout('Timeout'), attempt=2)
+    assert network_error_delay is not None and 0 <= network_error_delay <= 2
+    assert outbox.get_retry_delay(make_error(403), attempt=1) is None
+    assert outbox.get_retry_delay(make_error(400), attempt=1) is None
+    outbox.close()
+
+
+@pytest.mark.anyio
+async def test_outbox_polling(
+    tmp_path: Path,
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    httpx_mock.add_response(url=SEND_MESSAGE_URL, json=get_message_response)
+    outbox = SqliteOutbox(tmp_path / 'outbox.sqlite3')
+
+    async with AsyncTgClient.setup('token'):
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(lambda: outbox.adrain(poll_interval=0.01))
+            outbox.put(tg_methods.SendMessageRequest(chat_id=1, text='Hello World!'))
+            await anyio.sleep(0.05)
+            task_group.cancel_scope.cancel()
+
+    assert outbox.count_pending() == 0
+    assert len(httpx_mock.get_requests()) == 1
+    outbox.close()
+
+
+@pytest.mark.anyio
+async def test_outbox_sends_once_while_polling(
+    tmp_path: Path,
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    async def respond(request: httpx.Request) -> httpx.Response:
+        await anyio.sleep(0.005)
+        return httpx.Response(200, json=get_message_response)
+
+    httpx_mock.add_callback(respond, url=SEND_MESSAGE_URL)
+    outbox = SqliteOutbox(tmp_path / 'outbox.sqlite3', batch_size=50, commit_interval=0.05)
+    outbox.put_many(tg_methods.SendMessageRequest(chat_id=chat_id, text='Hello World!') for chat_id in range(200))
+
+    async with AsyncTgClient.setup('token'):
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(lambda: outbox.adrain(concurrency=20, poll_interval=0.001))
+            with anyio.fail_after(10):
+                while outbox.count_pending():
+                    await anyio.sleep(0.01)
+            task_group.cancel_scope.cancel()
+
+    # Requests sent, but not committed yet, are not fetched again when polling starts over
+    sent_chat_ids = sorted(json.loads(request.content)['chat_id'] for request in httpx_mock.get_requests())
+    assert sent_chat_ids == list(range(200))
+    outbox.close()
+
+
+@pytest.mark.anyio
+async def test_outbox_file_requests(
+    tmp_path: Path,
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_document_response: dict[str, typing.Any],
+) -> None:
+    document_path = tmp_path / 'report.pdf'
+    document_path.write_bytes(b'%PDF report')
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendDocument', json=get_document_response)
+    outbox = SqliteOutbox(tmp_path / 'outbox.sqlite3')
+
+    outbox.put(tg_methods.SendFileDocumentRequest(chat_id=1, document=document_path, thumbnail=b'JPEG'))
+    # File object can not be read again after restart, so the request is not stored
+    with pytest.raises(TgRuntimeError, match='can not be stored in the outbox'):
+        outbox.put(tg_methods.SendFileDocumentRequest(chat_id=1, document=io.BytesIO(b'%PDF report')))
+
+    async with AsyncTgClient.setup('token'):
+        await outbox.adrain()
+
+    assert outbox.count_pending() == 0
+    http_request = httpx_mock.get_request()
+    assert http_request
+    body = await http_request.aread()
+    assert b'filename="report.pdf"' in body and b'%PDF report' in body and b'JPEG' in body
+    outbox.close()
@@ -0,0 +1,75 @@
+import time
+import typing
+
+import anyio
+import pytest
+import pytest_httpx
+
+from tg_api import RateLimiter, tg_methods
+
+
+def test_private_chat_throttling() -> None:
+    """Программист - Не получать HTTP 429 при частой отправке сообщений в один личный чат: !func
+        Проверить что сообщения в один чат ставятся в очередь: !story
+            сделано: yes
+            старт: Три сообщения в один личный чат подряд
+            успех: Между сообщениями выдержан интервал лимита чата
+    """  # noqa D205 D400
+    rate_limiter = RateLimiter(private_chat_rate=1, private_chat_period=0.1)
+
+    started_at = time.monotonic()
+    for _ in range(3):
+        rate_limiter.throttle(1234567890)
+    assert time.monotonic() - started_at >= 0.2
+
+
+def test_global_throttling() -> None:
+    """Программист - Не получать HTTP 429 при рассылке по разным чатам: !func
+        Проверить общий лимит на все чаты: !story
+            сделано: yes
+            старт: Четыре сообщения в разные чаты при лимите 2 сообщения в 0.1 сек
+            успех: Первые два сообщения уходят сразу, остальные ждут освобождения лимита
+    """  # noqa D205 D400
+    rate_limiter = RateLimiter(global_rate=2, global_period=0.1)
+
+    started_at = time.monotonic()
+    rate_limiter.throttle(1)
+    rate_limiter.throttle(-2)
+    assert time.monotonic() - started_at < 0.05
+
+    rate_limiter.throttle(3)
+    rate_limiter.throttle(None)
+    assert time.monotonic() - started_at >= 0.1
+
+
+def test_group_chat_burst() -> None:
+    rate_limiter = RateLimiter(group_chat_rate=3, group_chat_period=0.3)
+
+    started_at = time.monotonic()
+    for _ in range(3):
+        rate_limiter.throttle(-100123)
+    assert time.monotonic() - started_at < 0.05
+
+    rate_limiter.throttle(-100123)
+    assert time.monotonic() - started_at >= 0.1
+
+
+@pytest.mark.anyio
+async def test_concurrent_sending_with_rate_limiter(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    httpx_mock.add_response(
+        url='https://api.telegram.org/bottoken/sendMessage',
+        method='POST',
+        json=get_message_response,
+    )
+    rate_limiter = RateLimiter(private_chat_rate=1, private_chat_period=0.1)
+
+    async with tg_methods.AsyncTgClient.setup('token', rate_limiter=rate_limiter):
+        started_at = time.monotonic()
+        async with anyio.create_task_group() as tg:
+            for _ in range(3):
+                tg.start_soon(tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').asend)
+        assert time.monotonic() - started_at >= 0.2
+        assert len(httpx_mock.get_requests()) == 3
@@ -0,0 +1,95 @@
+import json
+import typing
+
+from pydantic import ValidationError
+import pytest
+import pytest_httpx
+
+from tg_api import tg_methods, tg_types
+from tg_api.json_codecs import STDLIB_JSON_CODEC, JsonCodec
+
+
+@pytest.fixture
+def message_request(keyboard: tg_types.InlineKeyboardMarkup) -> tg_methods.SendMessageRequest:
+    return tg_methods.SendMessageRequest(
+        chat_id=1,
+        text='Hello World!',
+        entities=[tg_types.MessageEntity(type='bold', offset=0, length=5)],
+        reply_markup=keyboard,
+    )
+
+
+def test_template_payload_equals_request_payload(message_request: tg_methods.SendMessageRequest) -> None:
+    """Программист - Не сериализовать одинаковый текст и клавиатуру для каждого получателя рассылки: !func
+        Проверить сборку запроса из шаблона: !story
+            сделано: yes
+            старт: Из шаблона собран запрос для другого получателя
+            успех: JSON запроса совпадает с JSON такого же запроса, собранного без шаблона
+    """  # noqa D205 D400
+    template = message_request.make_template()
+
+    for chat_id in (1234567890, -1001234567890):
+        request = template.make_request(chat_id=chat_id)
+        expected_request = message_request.copy(update={'chat_id': chat_id})
+        assert json.loads(request.encode_json_payload()) == json.loads(expected_request.json(exclude_none=True))
+
+
+def test_template_with_several_per_recipient_fields() -> None:
+    template = tg_methods.SendMessageRequest(chat_id=1, text='Hello World!').make_template(('chat_id', 'text'))
+    request = template.make_request(chat_id=2, text='  Hello User!  ')
+
+    assert json.loads(request.encode_json_payload()) == {'chat_id': 2, 'text': 'Hello User!'}
+
+
+def test_per_recipient_fields_encoded_like_request(keyboard: tg_types.InlineKeyboardMarkup) -> None:
+    template = tg_methods.SendMessageRequest(chat_id=1, text='Hello World!').make_template(('chat_id', 'reply_markup'))
+    request = template.make_request(chat_id=2, reply_markup=keyboard)
+    dumped_objects = []
+
+    def dumps(obj: typing.Any) -> bytes:
+        dumped_objects.append(obj)
+        return STDLIB_JSON_CODEC.dumps(obj)
+
+    json_codec = JsonCodec(name='recording', dumps=dumps, loads=json.loads)
+    payload = request.encode_json_payload(json_codec)
+
+    assert json.loads(payload) == json.loads(request.json(exclude_none=True))
+    assert 'null' not in payload.decode('utf-8')
+    assert dumped_objects == [{'chat_id': 2, 'reply_markup': keyboard.dict(exclude_none=True)}]
+
+
+def test_template_validation(message_request: tg_methods.SendMessageRequest) -> None:
+    template = message_request.make_template()
+
+    with pytest.raises(ValidationError, match='chat_id'):
+        template.make_request(chat_id='not a number')
+
+    with pytest.raises(ValueError, match='text'):
+        template.make_request(chat_id=2, text='Hello')
+
+    with pytest.raises(ValueError, match='unknown_field'):
+        message_request.make_template(('chat_id', 'unknown_field'))
+
+
+def test_changed_request_drops_template(message_request: tg_methods.SendMessageRequest) -> None:
+    request = message_request.make_template().make_request(chat_id=2)
+    request.text = 'Changed text'
+
+    assert json.loads(request.encode_json_payload())['text'] == 'Changed text'
+
+
+@pytest.mark.anyio
+async def test_send_request_made_from_template(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+    message_request: tg_methods.SendMessageRequest,
+) -> None:
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json=get_message_response)
+    template = message_request.make_template()
+
+    async with tg_methods.AsyncTgClient.setup('token'):
+        response = await template.make_request(chat_id=1234567890).asend()
+
+    assert response.result.message_id == 12345
+    [http_request] = httpx_mock.get_requests()
+    assert json.loads(http_request.content)['chat_id'] == 1234567890
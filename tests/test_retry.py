@@ -0,0 +1,128 @@
+import json
+from pathlib import Path
+import typing
+
+import httpx
+import pytest
+import pytest_httpx
+
+from tg_api import RetryPolicy, TgHttpStatusError, tg_methods
+
+
+@pytest.mark.anyio
+async def test_retry_after_flood_control(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Не писать свой цикл повторов при HTTP 429: !func
+        Проверить повтор запроса после retry_after: !story
+            сделано: yes
+            старт: Сервер Telegram отвечает HTTP 429 с retry_after
+            успех: Запрос повторён и вернул ответ сервера
+    """  # noqa D205 D400
+    url = 'https://api.telegram.org/bottoken/sendMessage'
+    httpx_mock.add_response(
+        url=url,
+        status_code=429,
+        json={
+            'ok': False,
+            'error_code': 429,
+            'description': 'Too Many Requests: retry after 0',
+            'parameters': {'retry_after': 0},
+        },
+    )
+    httpx_mock.add_response(url=url, json=get_message_response)
+
+    async with tg_methods.AsyncTgClient.setup('token', retry_policy=RetryPolicy()):
+        response = await tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').asend()
+
+    assert response.result.message_id == 12345
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.anyio
+async def test_resend_to_migrated_chat(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    url = 'https://api.telegram.org/bottoken/sendMessage'
+    httpx_mock.add_response(
+        url=url,
+        status_code=400,
+        json={
+            'ok': False,
+            'error_code': 400,
+            'description': 'Bad Request: group chat was upgraded to a supergroup chat',
+            'parameters': {'migrate_to_chat_id': -1001234567890},
+        },
+    )
+    httpx_mock.add_response(url=url, json=get_message_response)
+
+    async with tg_methods.AsyncTgClient.setup('token', retry_policy=RetryPolicy()):
+        tg_request = tg_methods.SendMessageRequest(chat_id=-1234567890, text='Hello World!')
+        await tg_request.asend()
+
+    first_request, second_request = httpx_mock.get_requests()
+    assert json.loads(first_request.content)['chat_id'] == -1234567890
+    assert json.loads(second_request.content)['chat_id'] == -1001234567890
+    assert tg_request.chat_id == -1234567890
+
+
+def test_resend_photo_to_migrated_chat(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_photo_response: dict[str, typing.Any],
+) -> None:
+    url = 'https://api.telegram.org/bottoken/sendPhoto'
+    httpx_mock.add_response(
+        url=url,
+        status_code=400,
+        json={'ok': False, 'error_code': 400, 'parameters': {'migrate_to_chat_id': -1001234567890}},
+    )
+    httpx_mock.add_response(url=url, json=get_photo_response)
+
+    with open(Path(__file__).parent / 'samples/sample_640×426.jpeg', 'rb') as file:
+        jpg_sample_bytes = file.read()
+
+    with tg_methods.SyncTgClient.setup('token', retry_policy=RetryPolicy()):
+        tg_methods.SendBytesPhotoRequest(chat_id=-1234567890, photo=jpg_sample_bytes).send()
+
+    _, second_request = httpx_mock.get_requests()
+    second_request_content = second_request.read()
+    assert b'-1001234567890' in second_request_content
+    assert jpg_sample_bytes in second_request_content
+
+
+def test_server_error_backoff(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    url = 'https://api.telegram.org/bottoken/sendMessage'
+    httpx_mock.add_exception(httpx.ConnectError('Connection refused'), url=url)
+    httpx_mock.add_response(url=url, status_code=502)
+    httpx_mock.add_response(url=url, json=get_message_response)
+
+    with tg_methods.SyncTgClient.setup('token', retry_policy=RetryPolicy(backoff_base=0.01)):
+        response = tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').send()
+
+    assert response.result.message_id == 12345
+    assert len(httpx_mock.get_requests()) == 3
+
+
+def test_give_up_after_max_attempts(httpx_mock: pytest_httpx.HTTPXMock) -> None:
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', status_code=500)
+
+    with tg_methods.SyncTgClient.setup('token', retry_policy=RetryPolicy(max_attempts=2, backoff_base=0.01)):
+        with pytest.raises(TgHttpStatusError):
+            tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').send()
+
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_no_retries_by_default(httpx_mock: pytest_httpx.HTTPXMock) -> None:
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', status_code=500)
+
+    with tg_methods.SyncTgClient.setup('token'):
+        with pytest.raises(TgHttpStatusError):
+            tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').send()
+
+    assert len(httpx_mock.get_requests()) == 1
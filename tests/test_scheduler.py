@@ -0,0 +1,102 @@
+import typing
+
+import anyio
+import pytest
+import pytest_httpx
+
+from tg_api import AsyncTgClient, Priority, PriorityScheduler, request_priority, tg_methods
+
+Turns = list[tuple[Priority, int]]
+
+
+async def take_turn(scheduler: PriorityScheduler, priority: Priority, chat_id: int, turns: Turns) -> None:
+    with request_priority(priority):
+        async with scheduler.turn(chat_id):
+            turns.append((priority, chat_id))
+
+
+async def take_turns(scheduler: PriorityScheduler, requests: list[tuple[Priority, int]]) -> Turns:
+    """Queue requests while the only slot is busy, then release it and return the order of turns."""
+    turns: Turns = []
+    slot_released = anyio.Event()
+
+    async def hold_slot() -> None:
+        async with scheduler.turn(0):
+            await slot_released.wait()
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(hold_slot)
+        await anyio.sleep(0.01)
+        for priority, chat_id in requests:
+            task_group.start_soon(take_turn, scheduler, priority, chat_id, turns)
+            await anyio.sleep(0)
+        await anyio.sleep(0.01)
+        slot_released.set()
+    return turns
+
+
+@pytest.mark.anyio
+async def test_interactive_requests_go_first() -> None:
+    """Программист - Отвечать пользователям без задержки во время массовой рассылки: !func
+        Пропустить интерактивные запросы вперёд рассылки: !story
+            сделано: yes
+            старт: В очереди планировщика сотня запросов рассылки, приходит ответ пользователю
+            успех: Ответ пользователю отправляется первым, рассылка не останавливается совсем
+    """  # noqa D205 D400
+    weights = {Priority.INTERACTIVE: 2, Priority.NORMAL: 1, Priority.BULK: 1}
+    scheduler = PriorityScheduler(max_in_flight=1, weights=weights)
+    requests = [(Priority.BULK, chat_id) for chat_id in range(1, 101)]
+    requests += [(Priority.INTERACTIVE, chat_id) for chat_id in range(1001, 1004)]
+
+    turns = await take_turns(scheduler, requests)
+
+    assert turns[:4] == [
+        (Priority.INTERACTIVE, 1001),
+        (Priority.BULK, 1),
+        (Priority.INTERACTIVE, 1002),
+        (Priority.INTERACTIVE, 1003),
+    ]
+    assert turns[4:] == [(Priority.BULK, chat_id) for chat_id in range(2, 101)]
+
+
+@pytest.mark.anyio
+async def test_chats_take_turns() -> None:
+    scheduler = PriorityScheduler(max_in_flight=1)
+    requests = [(Priority.BULK, 1), (Priority.BULK, 1), (Priority.BULK, 1), (Priority.BULK, 2)]
+
+    turns = await take_turns(scheduler, requests)
+
+    assert turns == [(Priority.BULK, 1), (Priority.BULK, 2), (Priority.BULK, 1), (Priority.BULK, 1)]
+
+
+@pytest.mark.anyio
+async def test_cancelled_request_leaves_queue() -> None:
+    scheduler = PriorityScheduler(max_in_flight=1)
+
+    async with scheduler.turn(1):
+        with anyio.move_on_after(0.01):
+            async with scheduler.turn(2):
+                pytest.fail('Slot is busy')
+
+    with anyio.fail_after(1):
+        async with scheduler.turn(2):
+            pass
+
+
+@pytest.mark.anyio
+async def test_client_with_scheduler(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json=get_message_response)
+
+    async with AsyncTgClient.setup('token', scheduler=PriorityScheduler(max_in_flight=2)) as client:
+        async with client.broadcast(range(5), lambda chat_id: tg_methods.SendMessageRequest(
+            chat_id=chat_id,
+            text='Hello World!',
+        )) as results:
+            assert len([result async for result in results if result.response]) == 5
+
+        with request_priority(Priority.INTERACTIVE):
+            response = await tg_methods.SendMessageRequest(chat_id=1, text='Hello World!').asend()
+        assert response.result.message_id == 12345
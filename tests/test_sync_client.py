@@ -0,0 +1,128 @@
+import threading
+import typing
+
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+import pytest_httpx
+
+from tg_api import SyncTgClient, TgRuntimeError, tg_methods
+from tg_api.fake_bot_api import FakeBotApi
+
+
+def send_message(chat_id: int) -> int:
+    return tg_methods.SendMessageRequest(chat_id=chat_id, text='Hello World!').send().result.message_id
+
+
+def test_session_closed_on_exit() -> None:
+    with SyncTgClient.setup('token') as client:
+        assert not client.session.is_closed
+
+    assert client.session.is_closed
+
+
+def test_passed_session_left_open() -> None:
+    with httpx.Client() as session:
+        with SyncTgClient.setup('token', session=session):
+            pass
+
+        assert not session.is_closed
+
+
+def test_client_shared_between_threads(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Отправлять сообщения из нескольких потоков синхронного воркера: !func
+        Разделить один клиент между потоками: !story
+            сделано: yes
+            старт: Четыре потока пула клиента отправляют сообщения через один клиент
+            успех: Потоки находят клиент по умолчанию, пул соединений рассчитан на четыре потока
+    """  # noqa D205 D400
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', json=get_message_response)
+
+    with SyncTgClient.setup('token', threads=4) as client:
+        assert client.executor
+        message_ids = list(client.executor.map(send_message, range(8)))
+
+    assert message_ids == [12345] * 8
+
+
+def test_connection_pool_sized_to_threads() -> None:
+    with FakeBotApi.start(latency=0.5) as fake_api:
+        # Request waiting for a free connection of the pool longer than 0.1 second fails
+        timeout = httpx.Timeout(5, pool=0.1)
+        with SyncTgClient.setup('token', tg_server_url=fake_api.url, threads=2, timeout=timeout) as client:
+            with client.make_executor(max_workers=3) as executor:
+                futures = [executor.submit(send_message, chat_id) for chat_id in range(3)]
+
+    errors = [future.exception() for future in futures]
+    assert sum(isinstance(error, httpx.PoolTimeout) for error in errors) == 1
+    assert errors.count(None) == 2
+
+
+def test_threads_conflicting_with_limits() -> None:
+    with pytest.raises(ValueError, match='2 connections for 4 threads'):
+        with SyncTgClient.setup('token', threads=4, limits=httpx.Limits(max_connections=2)):
+            pass
+
+    with SyncTgClient.setup('token', threads=4, limits=httpx.Limits(max_connections=None)):
+        pass
+
+
+def test_clients_set_up_in_different_threads() -> None:
+    both_set_up = threading.Barrier(2)
+
+    def get_worker_token(token: str) -> str:
+        with SyncTgClient.setup(token, threads=1) as client:
+            both_set_up.wait(timeout=5)
+            assert client.executor
+            return client.executor.submit(lambda: tg_methods.BaseTgRequest.get_sync_client().token).result()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        tokens = list(executor.map(get_worker_token, ['111:A', '222:B']))
+
+    # Workers of every client send requests with the token of their own client
+    assert tokens == ['111:A', '222:B']
+
+
+def test_client_not_shared_between_threads_by_default() -> None:
+    with SyncTgClient.setup('token'):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with pytest.raises(TgRuntimeError):
+                executor.submit(send_message, 1).result()
+
+
+def test_map_send(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Распараллелить отправку без перехода на asyncio: !func
+        Отправить пачку запросов из пула потоков: !story
+            сделано: yes
+            старт: Синхронный клиент отправляет десять сообщений в четыре потока
+            успех: Ответы вернулись в порядке запросов, запросы ушли в свои чаты
+    """  # noqa D205 D400
+    chat_ids = list(range(1, 11))
+    for chat_id in chat_ids:
+        response = get_message_response | {'result': get_message_response['result'] | {'message_id': chat_id}}
+        httpx_mock.add_response(
+            url='https://api.telegram.org/bottoken/sendMessage',
+            match_json={'chat_id': chat_id, 'text': 'Hello World!'},
+            json=response,
+        )
+
+    with SyncTgClient.setup('token') as client:
+        requests = [tg_methods.SendMessageRequest(chat_id=chat_id, text='Hello World!') for chat_id in chat_ids]
+        responses = client.map_send(requests, max_workers=4)
+
+    assert [response.result.message_id for response in responses] == chat_ids
+
+
+def test_map_send_error(httpx_mock: pytest_httpx.HTTPXMock) -> None:
+    httpx_mock.add_response(url='https://api.telegram.org/bottoken/sendMessage', status_code=400, json={'ok': False})
+
+    with SyncTgClient.setup('token') as client:
+        with pytest.raises(tg_methods.TgHttpStatusError):
+            client.map_send([tg_methods.SendMessageRequest(chat_id=1, text='Hello World!')])
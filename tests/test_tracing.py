@@ -0,0 +1,110 @@
+import hashlib
+import hmac
+import typing
+
+import pytest
+import pytest_httpx
+
+from tg_api import RetryPolicy, TgHttpStatusError, tg_methods
+
+pytest.importorskip('opentelemetry.sdk')
+
+from opentelemetry import trace  # noqa E402
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider  # noqa E402
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa E402
+
+SPAN_EXPORTER = InMemorySpanExporter()
+
+
+@pytest.fixture
+def finished_spans() -> typing.Generator[typing.Callable[[], tuple[ReadableSpan, ...]], None, None]:
+    # Global tracer provider can be installed only once per process
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        tracer_provider = TracerProvider()
+        tracer_provider.add_span_processor(SimpleSpanProcessor(SPAN_EXPORTER))
+        trace.set_tracer_provider(tracer_provider)
+
+    SPAN_EXPORTER.clear()
+    yield SPAN_EXPORTER.get_finished_spans
+    SPAN_EXPORTER.clear()
+
+
+@pytest.mark.anyio
+async def test_request_spans(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_message_response: dict[str, typing.Any],
+    finished_spans: typing.Callable[[], tuple[ReadableSpan, ...]],
+) -> None:
+    """Программист - Видеть запросы к Bot API в распределённых трейсах: !func
+        Найти в трейсе, на что ушло время отправки сообщения: !story
+            сделано: yes
+            старт: В приложении установлен OpenTelemetry, Telegram сначала отвечает HTTP 429
+            успех: Запрос виден как span с дочерними span кодирования, HTTP, декодирования и валидации
+    """  # noqa D205 D400
+    url = 'https://api.telegram.org/bottoken/sendMessage'
+    httpx_mock.add_response(
+        url=url,
+        status_code=429,
+        json={
+            'ok': False,
+            'error_code': 429,
+            'description': 'Too Many Requests: retry after 0',
+            'parameters': {'retry_after': 0},
+        },
+    )
+    httpx_mock.add_response(url=url, json=get_message_response)
+
+    tracer = trace.get_tracer('tests')
+    async with tg_methods.AsyncTgClient.setup('token', retry_policy=RetryPolicy(), chat_id_hash_key=b'secret'):
+        with tracer.start_as_current_span('handle_update') as parent_span:
+            await tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').asend()
+
+    spans = {span.name: span for span in finished_spans() if span.name != 'tg_api.http'}
+    http_spans = [span for span in finished_spans() if span.name == 'tg_api.http']
+    request_span = spans['tg_api.sendMessage']
+    assert request_span.parent and request_span.context
+    assert request_span.parent.span_id == parent_span.get_span_context().span_id
+    for child_span in (spans['tg_api.encode'], spans['tg_api.decode'], spans['tg_api.validate'], *http_spans):
+        assert child_span.parent
+        assert child_span.parent.span_id == request_span.context.span_id
+
+    assert [dict(span.attributes or {}).get('http.response.status_code') for span in http_spans] == [429, 200]
+    attributes = dict(request_span.attributes or {})
+    assert attributes['tg_api.method'] == 'sendMessage'
+    assert attributes['tg_api.chat_id_hash'] == hmac.new(b'secret', b'1234567890', hashlib.sha256).hexdigest()[:16]
+    request_bytes, response_bytes = attributes['tg_api.request.bytes'], attributes['tg_api.response.bytes']
+    assert isinstance(request_bytes, int) and request_bytes > 0
+    assert isinstance(response_bytes, int) and response_bytes > 0
+    assert attributes['tg_api.retry_count'] == 1
+    assert attributes['http.response.status_code'] == 200
+
+    attempt_failed_event, = request_span.events
+    assert attempt_failed_event.name == 'tg_api.attempt_failed'
+    assert attempt_failed_event.attributes
+    assert attempt_failed_event.attributes['tg_api.error_code'] == 429
+    assert attempt_failed_event.attributes['tg_api.retry_after'] == 0
+
+
+def test_failed_request_span(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    finished_spans: typing.Callable[[], tuple[ReadableSpan, ...]],
+) -> None:
+    httpx_mock.add_response(
+        url='https://api.telegram.org/bottoken/deleteMessage',
+        status_code=400,
+        json={'ok': False, 'error_code': 400, 'description': 'Bad Request: message to delete not found'},
+    )
+
+    with tg_methods.SyncTgClient.setup('token'):
+        with pytest.raises(TgHttpStatusError):
+            tg_methods.DeleteMessageRequest(chat_id=1234567890, message_id=1).send()
+
+    request_span, = [span for span in finished_spans() if span.name == 'tg_api.deleteMessage']
+    assert request_span.status.status_code == trace.StatusCode.ERROR
+    attributes = dict(request_span.attributes or {})
+    assert attributes['tg_api.error_code'] == 400
+    assert attributes['tg_api.retry_count'] == 0
+    # Plain hash of chat id could be brute forced, so it is not traced without the key
+    assert 'tg_api.chat_id_hash' not in attributes
+    assert {event.name for event in request_span.events} == {'tg_api.attempt_failed', 'exception'}
@@ -0,0 +1,75 @@
+import json
+import typing
+
+import pytest_httpx
+
+from tg_api import tg_methods, tg_types
+from tg_api.model_construction import construct_model
+
+
+def test_construct_equals_validation(group_message_payload: dict[str, typing.Any]) -> None:
+    """Программист - Сэкономить CPU на разборе ответов настоящего сервера Telegram: !func
+        Проверить разбор ответа без валидации: !story
+            сделано: yes
+            старт: Ответ сервера с вложенными моделями разобран без валидации
+            успех: Результат совпадает с разбором с валидацией
+    """  # noqa D205 D400
+    payload = {'ok': True, 'result': group_message_payload}
+
+    constructed_response = construct_model(tg_methods.SendMessageResponse, payload)
+    validated_response = tg_methods.SendMessageResponse.parse_obj(payload)
+
+    assert constructed_response.dict() == validated_response.dict()
+    assert isinstance(constructed_response.result.reply_to_message, tg_types.Message)
+    assert isinstance(constructed_response.result.from_, tg_types.User)
+    assert constructed_response.result.entities is not None
+    assert isinstance(constructed_response.result.entities[0], tg_types.MessageEntity)
+    assert constructed_response.result.reply_markup is not None
+    assert isinstance(
+        constructed_response.result.reply_markup.inline_keyboard[0][1],
+        tg_types.InlineKeyboardButton,
+    )
+
+
+def test_construct_union_result(group_message_payload: dict[str, typing.Any]) -> None:
+    for result in (group_message_payload, True):
+        payload = {'ok': True, 'result': result}
+
+        constructed_response = construct_model(tg_methods.EditMessageTextResponse, payload)
+
+        assert constructed_response == tg_methods.EditMessageTextResponse.parse_obj(payload)
+
+
+def test_construct_overlapping_union_members() -> None:
+    user = {'id': 43434343, 'is_bot': False, 'first_name': 'Евгений'}
+    payload = {
+        'chat': {'id': -1001234567890, 'type': 'supergroup', 'title': 'Test group'},
+        'from': user,
+        'date': 1686840262,
+        # Required fields of ChatMemberMember and ChatMemberLeft are the same, so validation decides
+        'old_chat_member': {'status': 'member', 'user': user},
+        # ChatMemberMember fits too, but ChatMemberBanned knows more keys of the data
+        'new_chat_member': {'status': 'kicked', 'user': user, 'until_date': 0},
+    }
+
+    chat_member_updated = construct_model(tg_types.ChatMemberUpdated, payload)
+
+    assert type(chat_member_updated.old_chat_member) is tg_types.ChatMemberMember
+    assert type(chat_member_updated.new_chat_member) is tg_types.ChatMemberBanned
+    assert chat_member_updated.new_chat_member.until_date == 0
+
+
+def test_client_without_response_validation(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    group_message_payload: dict[str, typing.Any],
+) -> None:
+    httpx_mock.add_response(
+        url='https://api.telegram.org/bottoken/sendMessage',
+        content=json.dumps({'ok': True, 'result': {**group_message_payload, 'message_id': 'not validated'}}).encode(),
+    )
+
+    with tg_methods.SyncTgClient.setup('token', validate_responses=False):
+        response = tg_methods.SendMessageRequest(chat_id=1234567890, text='Hello World!').send()
+
+    assert response.result.message_id == 'not validated'
+    assert response.result.chat.id == -1001234567890
@@ -0,0 +1,121 @@
+import typing
+
+import anyio
+import httpx
+import pytest
+import pytest_httpx
+
+from tg_api import RateLimiter, UploadLimiter, tg_methods, tg_types
+
+SEND_DOCUMENT_URL = 'https://api.telegram.org/bottoken/sendDocument'
+
+
+@pytest.mark.anyio
+async def test_uploads_fit_budget(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_document_response: dict[str, typing.Any],
+    edit_message_media_document_response: dict[str, typing.Any],
+) -> None:
+    """Программист - Загружать много больших файлов, не раздувая память процесса: !func
+        Отправить пачку документов одновременно: !story
+            сделано: yes
+            старт: Документы и медиа разного размера отправляются через gather
+            успех: Одновременно загружается не больше файлов и байтов, чем разрешает лимит
+    """  # noqa D205 D400
+    upload_limiter = UploadLimiter(max_bytes=100, max_uploads=2)
+    observed_bytes_in_flight = []
+    observed_uploads_in_flight = []
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        observed_bytes_in_flight.append(upload_limiter.bytes_in_flight)
+        observed_uploads_in_flight.append(upload_limiter.uploads_in_flight)
+        await anyio.sleep(0.01)
+        if request.url.path.endswith('editmessagemedia'):
+            return httpx.Response(200, json=edit_message_media_document_response)
+        return httpx.Response(200, json=get_document_response)
+
+    httpx_mock.add_callback(respond)
+
+    async with tg_methods.AsyncTgClient.setup('token', upload_limiter=upload_limiter):
+        async with anyio.create_task_group() as task_group:
+            for size in (60, 30, 30, 150, 10, 10, 10):
+                tg_request = tg_methods.SendBytesDocumentRequest(chat_id=1234567890, document=b'x' * size)
+                task_group.start_soon(tg_request.asend)
+            edit_request = tg_methods.EditBytesMessageMediaRequest(
+                chat_id=1234567890,
+                message_id=1,
+                media=tg_types.InputMediaBytesDocument(
+                    media='document',
+                    media_content=bytearray(70),
+                    thumbnail='thumbnail',
+                    thumbnail_content=b'x' * 20,
+                ),
+            )
+            task_group.start_soon(edit_request.asend)
+
+    assert len(observed_bytes_in_flight) == 8
+    assert max(observed_uploads_in_flight) == 2
+    assert 150 in observed_bytes_in_flight
+    assert all(bytes_in_flight <= 100 or bytes_in_flight == 150 for bytes_in_flight in observed_bytes_in_flight)
+    assert upload_limiter.bytes_in_flight == upload_limiter.uploads_in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_upload_lets_next_ones_in() -> None:
+    upload_limiter = UploadLimiter(max_bytes=100, max_uploads=10)
+    admitted = []
+    large_upload_scope = anyio.CancelScope()
+
+    async def upload(name: str, size: int) -> None:
+        async with upload_limiter.upload(size):
+            admitted.append(name)
+            await anyio.sleep(0.05)
+
+    async def upload_large() -> None:
+        with large_upload_scope:
+            await upload('large', 90)
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(upload, 'first', 80)
+        await anyio.sleep(0.01)
+        task_group.start_soon(upload_large)
+        await anyio.sleep(0.01)
+        task_group.start_soon(upload, 'small', 20)
+        await anyio.sleep(0.01)
+        # Small upload fits, but waits in line behind the large one
+        assert admitted == ['first']
+
+        large_upload_scope.cancel()
+        await anyio.sleep(0.01)
+        assert admitted == ['first', 'small']
+
+    assert upload_limiter.bytes_in_flight == upload_limiter.uploads_in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_upload_admitted_before_rate_limiter(
+    httpx_mock: pytest_httpx.HTTPXMock,
+    get_document_response: dict[str, typing.Any],
+) -> None:
+    upload_limiter = UploadLimiter(max_bytes=100, max_uploads=1)
+    throttled_chat_ids = []
+
+    class RecordingRateLimiter(RateLimiter):
+        async def athrottle(self, chat_id: int | None = None) -> None:
+            throttled_chat_ids.append(chat_id)
+            await super().athrottle(chat_id)
+
+    httpx_mock.add_response(url=SEND_DOCUMENT_URL, json=get_document_response)
+
+    rate_limiter = RecordingRateLimiter()
+    async with tg_methods.AsyncTgClient.setup('token', upload_limiter=upload_limiter, rate_limiter=rate_limiter):
+        async with anyio.create_task_group() as task_group:
+            async with upload_limiter.upload(10):
+                tg_request = tg_methods.SendBytesDocumentRequest(chat_id=1234567890, document=b'document')
+                task_group.start_soon(tg_request.asend)
+                await anyio.sleep(0.01)
+                # Request waiting for the upload budget does not take the rate limit of the chat yet
+                assert throttled_chat_ids == []
+
+    assert throttled_chat_ids == [1234567890]
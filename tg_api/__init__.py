@@ -1,14 +1,34 @@
+from .broadcast import BroadcastResult  # noqa F401
+from .chat_migration import ChatMigrationCache, MemoryChatMigrationCache, SqliteChatMigrationCache  # noqa F401
 from .client import AsyncTgClient, SyncTgClient, raise_for_tg_response_status  # noqa F401
+from .client_pool import BotMetrics, TgClientPool  # noqa F401
+from .dispatcher import OrderedDispatcher, PendingResponse  # noqa F401
 from .exceptions import TgHttpStatusError, TgRuntimeError  # noqa F401
+from .file_id_cache import FileIdCache, MemoryFileIdCache, SqliteFileIdCache  # noqa F401
+from .input_files import InputFile  # noqa F401
+from .instrumentation import (  # noqa F401
+    HistogramObserver,
+    RequestObserver,
+    RequestStats,
+    format_prometheus_metrics,
+)
+from .json_codecs import JsonCodec, MessageAck, STDLIB_JSON_CODEC, ORJSON_CODEC, MSGSPEC_CODEC  # noqa F401
+from .lazy_models import LazyModel  # noqa F401
+from .outbox import SqliteOutbox  # noqa F401
+from .rate_limiter import RateLimiter  # noqa F401
+from .retry import RetryPolicy  # noqa F401
+from .scheduler import Priority, PriorityScheduler, request_priority  # noqa F401
 from .tg_methods import (  # noqa F401
     SendMessageResponse,
     SendMessageRequest,
     SendPhotoResponse,
     SendUrlPhotoRequest,
     SendBytesPhotoRequest,
+    SendFilePhotoRequest,
     SendDocumentResponse,
     SendUrlDocumentRequest,
     SendBytesDocumentRequest,
+    SendFileDocumentRequest,
     DeleteMessageResponse,
     DeleteMessageRequest,
     EditMessageTextResponse,
@@ -20,6 +40,7 @@ from .tg_methods import (  # noqa F401
     EditMessageMediaResponse,
     EditUrlMessageMediaRequest,
     EditBytesMessageMediaRequest,
+    EditFileMessageMediaRequest,
 )
 from .tg_types import (  # noqa F401
     ParseMode,
@@ -41,6 +62,9 @@ from .tg_types import (  # noqa F401
     Update,
     InputMediaBytesDocument,
     InputMediaBytesPhoto,
+    InputMediaFileDocument,
+    InputMediaFilePhoto,
     InputMediaUrlDocument,
     InputMediaUrlPhoto,
 )
+from .upload_limiter import UploadLimiter  # noqa F401
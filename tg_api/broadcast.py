@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterable, Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+import httpx
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from pydantic import ValidationError
+
+if TYPE_CHECKING:
+    from .tg_methods import BaseTgRequest, BaseTgResponse
+
+# Errors of a single recipient which should not stop the whole broadcast
+RECIPIENT_ERRORS = (httpx.HTTPError, ValidationError)
+
+ChatIds = Iterable[int] | AsyncIterable[int]
+RequestFactory = Callable[[int], 'BaseTgRequest']
+
+
+@dataclass(frozen=True)
+class BroadcastResult:
+    """Outcome of sending a broadcast request to a single recipient."""
+
+    chat_id: int
+    response: BaseTgResponse | None = None
+    error: Exception | None = None
+
+    @property
+    def message_id(self) -> int | None:
+        """Return id of the sent message, if any."""
+        return getattr(self.response and self.response.result, 'message_id', None)
+
+
+async def feed_chat_ids(chat_ids: ChatIds, chat_ids_sender: MemoryObjectSendStream[int]) -> None:
+    """Pass chat ids one by one to the broadcast workers, waiting for a free worker."""
+    async with chat_ids_sender:
+        if isinstance(chat_ids, AsyncIterable):
+            async for chat_id in chat_ids:
+                await chat_ids_sender.send(chat_id)
+        else:
+            for chat_id in chat_ids:
+                await chat_ids_sender.send(chat_id)
+
+
+async def send_to_recipients(
+    request_factory: RequestFactory,
+    chat_ids_receiver: MemoryObjectReceiveStream[int],
+    results_sender: MemoryObjectSendStream[BroadcastResult],
+) -> None:
+    """Send requests to chat ids received until the chat ids stream is exhausted."""
+    async with chat_ids_receiver, results_sender:
+        async for chat_id in chat_ids_receiver:
+            try:
+                response = await request_factory(chat_id).asend()
+            except RECIPIENT_ERRORS as error:
+                await results_sender.send(BroadcastResult(chat_id=chat_id, error=error))
+            else:
+                await results_sender.send(BroadcastResult(chat_id=chat_id, response=response))
@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+
+from collections import OrderedDict
+from os import PathLike
+
+from .exceptions import TgHttpStatusError
+
+
+class ChatMigrationCache:
+    """Base class for storages of group chat ids migrated to supergroups.
+
+    Client consults the cache before every request to a chat and fills it from the failed responses
+    containing `ResponseParameters.migrate_to_chat_id`. Subclasses implement `get` and `set` methods.
+    """
+
+    def get(self, chat_id: int) -> int | None:
+        """Return the new chat id if the chat was migrated, otherwise None."""
+        raise NotImplementedError
+
+    def set(self, chat_id: int, migrate_to_chat_id: int) -> None:  # noqa A003
+        """Remember that the chat was migrated to another one."""
+        raise NotImplementedError
+
+    def resolve(self, chat_id: int | None) -> int | None:
+        """Return the actual id of the chat."""
+        if chat_id is None:
+            return None
+        return self.get(chat_id) or chat_id
+
+    def remember_migration(self, error: TgHttpStatusError, *chat_ids: int | None) -> None:
+        """Fill the cache from the error response for all chat ids the request was addressed to."""
+        parameters = error.tg_response.parameters if error.tg_response else None
+        if not parameters or not parameters.migrate_to_chat_id:
+            return
+
+        for chat_id in set(chat_ids):
+            if chat_id is not None:
+                self.set(chat_id, parameters.migrate_to_chat_id)
+
+
+class MemoryChatMigrationCache(ChatMigrationCache):
+    """In-memory LRU cache of migrated chat ids. Lives until the process restarts."""
+
+    def __init__(self, maxsize: int = 10_000) -> None:
+        self.maxsize = maxsize
+        self._migrations: OrderedDict[int, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chat_id: int) -> int | None:
+        with self._lock:
+            migrate_to_chat_id = self._migrations.get(chat_id)
+            if migrate_to_chat_id is not None:
+                self._migrations.move_to_end(chat_id)
+            return migrate_to_chat_id
+
+    def set(self, chat_id: int, migrate_to_chat_id: int) -> None:  # noqa A003
+        with self._lock:
+            self._migrations[chat_id] = migrate_to_chat_id
+            self._migrations.move_to_end(chat_id)
+            while len(self._migrations) > self.maxsize:
+                self._migrations.popitem(last=False)
+
+
+class SqliteChatMigrationCache(ChatMigrationCache):
+    """Cache of migrated chat ids stored in SQLite file, so it survives the process restart."""
+
+    def __init__(self, path: str | PathLike[str]) -> None:
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS chat_migrations (chat_id INTEGER PRIMARY KEY, migrate_to_chat_id INTEGER)',
+        )
+        self._lock = threading.Lock()
+
+    def get(self, chat_id: int) -> int | None:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT migrate_to_chat_id FROM chat_migrations WHERE chat_id = ?',
+                (chat_id,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, chat_id: int, migrate_to_chat_id: int) -> None:  # noqa A003
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO chat_migrations (chat_id, migrate_to_chat_id) VALUES (?, ?)',
+                (chat_id, migrate_to_chat_id),
+            )
+
+    def close(self) -> None:
+        self._connection.close()
@@ -1,15 +1,46 @@
-from contextlib import asynccontextmanager, contextmanager, AsyncExitStack
-from contextvars import ContextVar, Token
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager, nullcontext, AsyncExitStack, ExitStack
+from contextvars import Context, ContextVar, Token, copy_context
 from dataclasses import dataclass, KW_ONLY, field
 from urllib.parse import urljoin
-from typing import AsyncGenerator, ClassVar, Generator, Type, TypeVar
+from typing import (
+    TYPE_CHECKING,
+    AsyncContextManager,
+    AsyncGenerator,
+    ClassVar,
+    ContextManager,
+    Generator,
+    Iterable,
+    Type,
+    TypeVar,
+)
 
+import anyio
 import httpx
+from anyio.streams.memory import MemoryObjectReceiveStream
 
+from .broadcast import BroadcastResult, ChatIds, RequestFactory, feed_chat_ids, send_to_recipients
+from .chat_migration import ChatMigrationCache
+from .connection_warmup import akeep_alive, awarm_up, keep_alive, warm_up
 from .exceptions import TgHttpStatusError, TgRuntimeError
+from .file_id_cache import FileIdCache
+from .instrumentation import RequestObserver, RequestStats, observe_request
+from .json_codecs import DEFAULT_JSON_CODEC, JsonCodec, ResponseType, parse_tg_response
+from .rate_limiter import RateLimiter
+from .retry import RetryPolicy
+from .scheduler import Priority, PriorityScheduler, request_priority
+from .upload_limiter import UploadLimiter
+
+if TYPE_CHECKING:
+    from .tg_methods import BaseTgRequest, BaseTgResponse
 
 DEFAULT_TG_SERVER_URL = 'https://api.telegram.org'
 
+# Keep all idle connections and keep them longer than httpx does by default to survive pauses between bursts
+DEFAULT_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=100, keepalive_expiry=60)
+# Uploads of large files and slow Telegram responses under load need more than 5 seconds default of httpx
+DEFAULT_HTTP_TIMEOUT = httpx.Timeout(30, connect=10)
+
 AsyncTgClientType = TypeVar('AsyncTgClientType', bound='AsyncTgClient')
 SyncTgClientType = TypeVar('SyncTgClientType', bound='SyncTgClient')
 
@@ -20,6 +51,17 @@ class AsyncTgClient:
     _: KW_ONLY
     session: httpx.AsyncClient
     tg_server_url: str = DEFAULT_TG_SERVER_URL
+    rate_limiter: RateLimiter | None = None
+    retry_policy: RetryPolicy | None = None
+    chat_migration_cache: ChatMigrationCache | None = None
+    file_id_cache: FileIdCache | None = None
+    json_codec: JsonCodec = DEFAULT_JSON_CODEC
+    validate_responses: bool = True
+    lazy_responses: bool = False
+    scheduler: PriorityScheduler | None = None
+    upload_limiter: UploadLimiter | None = None
+    observers: tuple[RequestObserver, ...] = ()
+    chat_id_hash_key: bytes | None = field(default=None, repr=False)
 
     api_root: str = field(init=False)
 
@@ -37,6 +79,22 @@ class AsyncTgClient:
         *,
         session: httpx.AsyncClient | None = None,
         tg_server_url: str = DEFAULT_TG_SERVER_URL,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        chat_migration_cache: ChatMigrationCache | None = None,
+        file_id_cache: FileIdCache | None = None,
+        json_codec: JsonCodec = DEFAULT_JSON_CODEC,
+        validate_responses: bool = True,
+        lazy_responses: bool = False,
+        http2: bool = False,
+        limits: httpx.Limits = DEFAULT_HTTP_LIMITS,
+        timeout: httpx.Timeout = DEFAULT_HTTP_TIMEOUT,
+        warm_up_connections: int = 0,
+        keepalive_interval: float | None = None,
+        scheduler: PriorityScheduler | None = None,
+        upload_limiter: UploadLimiter | None = None,
+        observers: Iterable[RequestObserver] = (),
+        chat_id_hash_key: bytes | None = None,
     ) -> AsyncGenerator[AsyncTgClientType, None]:
         if not token:
             # Safety check for empty string or None to avoid confusing HTTP 404 error
@@ -44,9 +102,36 @@ class AsyncTgClient:
 
         async with AsyncExitStack() as stack:
             if not session:
-                session = await stack.enter_async_context(httpx.AsyncClient())
+                session = httpx.AsyncClient(http2=http2, limits=limits, timeout=timeout)
+                await stack.enter_async_context(session)
+
+            client = cls(
+                token=token,
+                session=session,
+                tg_server_url=tg_server_url,
+                rate_limiter=rate_limiter,
+                retry_policy=retry_policy,
+                chat_migration_cache=chat_migration_cache,
+                file_id_cache=file_id_cache,
+                json_codec=json_codec,
+                validate_responses=validate_responses,
+                lazy_responses=lazy_responses,
+                scheduler=scheduler,
+                upload_limiter=upload_limiter,
+                observers=tuple(observers),
+                chat_id_hash_key=chat_id_hash_key,
+            )
+
+            if warm_up_connections:
+                await awarm_up(session, client.api_root, warm_up_connections)
+            if keepalive_interval:
+                await stack.enter_async_context(akeep_alive(
+                    session,
+                    client.api_root,
+                    interval=keepalive_interval,
+                    connections=max(warm_up_connections, 1),
+                ))
 
-            client = cls(token=token, session=session, tg_server_url=tg_server_url)
             with client.set_as_default():
                 yield client
 
@@ -58,6 +143,74 @@ class AsyncTgClient:
         finally:
             self.default_client.reset(default_client_token)
 
+    def wait_for_turn(self, chat_id: int | None) -> AsyncContextManager[None]:
+        """Return the context to send the request to the chat in, waiting for the turn if there is a scheduler."""
+        return self.scheduler.turn(chat_id) if self.scheduler else nullcontext()
+
+    def wait_for_upload(self, size: int) -> AsyncContextManager[None]:
+        """Return the context to upload files of the size passed in, waiting if there is an upload limiter."""
+        return self.upload_limiter.upload(size) if self.upload_limiter else nullcontext()
+
+    def observe_request(self, api_method: str = '') -> ContextManager[RequestStats]:
+        """Return the context collecting stats of the request sent inside for the client's observers."""
+        return observe_request(self.observers, api_method, self.chat_id_hash_key)
+
+    def parse_response(self, response_class: Type[ResponseType], json_payload: bytes) -> ResponseType:
+        """Parse response of Telegram Bot API with the client's JSON codec.
+
+        Response is validated unless the client was set up with `validate_responses=False`.
+        If the client was set up with `lazy_responses=True`, fields are parsed on first access, see `LazyModel`.
+        """
+        return parse_tg_response(
+            response_class,
+            json_payload,
+            self.json_codec,
+            validate=self.validate_responses,
+            lazy=self.lazy_responses,
+        )
+
+    @asynccontextmanager
+    async def broadcast(
+        self,
+        chat_ids: ChatIds,
+        request_factory: RequestFactory,
+        *,
+        concurrency: int = 30,
+        priority: Priority = Priority.BULK,
+    ) -> AsyncGenerator[MemoryObjectReceiveStream[BroadcastResult], None]:
+        """Send a request to every chat concurrently and stream the results back in order of completion.
+
+        No more than `concurrency` requests and results are kept in memory at once, so chat ids may be
+        a lazy iterable or async iterable of any size. Errors of a single recipient are returned as results,
+        the broadcast is stopped if the caller leaves the context before all results are received.
+
+        :param chat_ids: Iterable or async iterable of recipient chat ids.
+        :param request_factory: Function returning a request object for the chat id passed.
+        :param concurrency: The maximum number of requests sent at once.
+        :param priority: Priority of broadcast requests, matters if the client has a scheduler.
+        :return: Async iterable of `BroadcastResult`, one for every chat id.
+        """
+        chat_ids_sender, chat_ids_receiver = anyio.create_memory_object_stream[int](0)
+        results_sender, results_receiver = anyio.create_memory_object_stream[BroadcastResult](concurrency)
+
+        async with anyio.create_task_group() as task_group:
+            with self.set_as_default(), request_priority(priority):
+                task_group.start_soon(feed_chat_ids, chat_ids, chat_ids_sender)
+                async with chat_ids_receiver, results_sender:
+                    for _ in range(concurrency):
+                        task_group.start_soon(
+                            send_to_recipients,
+                            request_factory,
+                            chat_ids_receiver.clone(),
+                            results_sender.clone(),
+                        )
+
+            try:
+                async with results_receiver:
+                    yield results_receiver
+            finally:
+                task_group.cancel_scope.cancel()
+
 
 @dataclass(frozen=True)
 class SyncTgClient:
@@ -65,8 +218,19 @@ class SyncTgClient:
     _: KW_ONLY
     session: httpx.Client
     tg_server_url: str = DEFAULT_TG_SERVER_URL
+    rate_limiter: RateLimiter | None = None
+    retry_policy: RetryPolicy | None = None
+    chat_migration_cache: ChatMigrationCache | None = None
+    file_id_cache: FileIdCache | None = None
+    json_codec: JsonCodec = DEFAULT_JSON_CODEC
+    validate_responses: bool = True
+    lazy_responses: bool = False
+    observers: tuple[RequestObserver, ...] = ()
+    chat_id_hash_key: bytes | None = field(default=None, repr=False)
 
     api_root: str = field(init=False)
+    # Pool of threads with the client set as default, created by `setup(threads=...)`
+    executor: ThreadPoolExecutor | None = field(init=False, default=None, repr=False, compare=False)
 
     default_client: ClassVar[ContextVar['SyncTgClient']] = ContextVar('default_client')
 
@@ -80,19 +244,74 @@ class SyncTgClient:
         cls: Type[SyncTgClientType],
         token: str,
         *,
-        session: httpx.Client = None,
+        session: httpx.Client | None = None,
         tg_server_url: str = DEFAULT_TG_SERVER_URL,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        chat_migration_cache: ChatMigrationCache | None = None,
+        file_id_cache: FileIdCache | None = None,
+        json_codec: JsonCodec = DEFAULT_JSON_CODEC,
+        validate_responses: bool = True,
+        lazy_responses: bool = False,
+        http2: bool = False,
+        limits: httpx.Limits = DEFAULT_HTTP_LIMITS,
+        timeout: httpx.Timeout = DEFAULT_HTTP_TIMEOUT,
+        warm_up_connections: int = 0,
+        keepalive_interval: float | None = None,
+        threads: int | None = None,
+        observers: Iterable[RequestObserver] = (),
+        chat_id_hash_key: bytes | None = None,
     ) -> Generator[SyncTgClientType, None, None]:
+        """Create the client and set it as default, the session is closed on exit if created here.
+
+        Pass `threads` to send requests concurrently from that many threads: `client.executor` is the pool
+        of threads with the client set as default, it is shut down on exit. Other threads do not see the client,
+        so clients set up at once in different threads never mix. If `limits` are not passed, the connection pool
+        of the session created is sized to the number of threads. Limits passed are used as is, but they must
+        allow a connection for every thread.
+        """
         if not token:
             # Safety check for empty string or None to avoid confusing HTTP 404 error
             raise ValueError(f'Telegram token is empty: {token!r}')
 
-        if not session:
-            session = httpx.Client()
+        if threads:
+            limits = get_threads_limits(limits, threads)
+
+        with ExitStack() as stack:
+            if not session:
+                session = httpx.Client(http2=http2, limits=limits, timeout=timeout)
+                stack.enter_context(session)
+
+            client = cls(
+                token=token,
+                session=session,
+                tg_server_url=tg_server_url,
+                rate_limiter=rate_limiter,
+                retry_policy=retry_policy,
+                chat_migration_cache=chat_migration_cache,
+                file_id_cache=file_id_cache,
+                json_codec=json_codec,
+                validate_responses=validate_responses,
+                lazy_responses=lazy_responses,
+                observers=tuple(observers),
+                chat_id_hash_key=chat_id_hash_key,
+            )
+
+            if warm_up_connections:
+                warm_up(session, client.api_root, warm_up_connections)
+            if keepalive_interval:
+                stack.enter_context(keep_alive(
+                    session,
+                    client.api_root,
+                    interval=keepalive_interval,
+                    connections=max(warm_up_connections, 1),
+                ))
+            if threads:
+                # Executor is made for the client created above, so it is set after the creation
+                object.__setattr__(client, 'executor', stack.enter_context(client.make_executor(threads)))
 
-        client = cls(token=token, session=session, tg_server_url=tg_server_url)
-        with client.set_as_default():
-            yield client
+            with client.set_as_default():
+                yield client
 
     @contextmanager
     def set_as_default(self) -> Generator[None, None, None]:
@@ -102,6 +321,70 @@ class SyncTgClient:
         finally:
             self.default_client.reset(default_client_token)
 
+    def make_executor(self, max_workers: int) -> ThreadPoolExecutor:
+        """Create the pool of threads with the client set as default, so requests sent from them find it."""
+        return ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='tg_api',
+            initializer=self.default_client.set,
+            initargs=(self,),
+        )
+
+    def map_send(self, requests: Iterable['BaseTgRequest'], *, max_workers: int = 30) -> list['BaseTgResponse']:
+        """Send requests concurrently from a pool of threads and return responses in order of requests.
+
+        Threads share the session connection pool and get a copy of the caller context with the client set
+        as default, so context variables set by the caller are visible in `send` too. The first error is raised
+        in order of requests and requests not started yet are cancelled.
+
+        :param requests: Requests to send.
+        :param max_workers: The maximum number of requests sent at once.
+        :return: Responses, one for every request.
+        """
+        with self.set_as_default(), self.make_executor(max_workers) as executor:
+            # Every task needs its own context copy, because a single context can not be entered by many threads
+            futures = [executor.submit(send_in_context, copy_context(), request) for request in requests]
+            try:
+                return [future.result() for future in futures]
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def observe_request(self, api_method: str = '') -> ContextManager[RequestStats]:
+        """Return the context collecting stats of the request sent inside for the client's observers."""
+        return observe_request(self.observers, api_method, self.chat_id_hash_key)
+
+    def parse_response(self, response_class: Type[ResponseType], json_payload: bytes) -> ResponseType:
+        """Parse response of Telegram Bot API with the client's JSON codec.
+
+        Response is validated unless the client was set up with `validate_responses=False`.
+        If the client was set up with `lazy_responses=True`, fields are parsed on first access, see `LazyModel`.
+        """
+        return parse_tg_response(
+            response_class,
+            json_payload,
+            self.json_codec,
+            validate=self.validate_responses,
+            lazy=self.lazy_responses,
+        )
+
+
+def get_threads_limits(limits: httpx.Limits, threads: int) -> httpx.Limits:
+    """Size default limits of the connection pool to the number of threads, check that limits passed fit them."""
+    if limits is DEFAULT_HTTP_LIMITS:
+        return httpx.Limits(
+            max_connections=threads,
+            max_keepalive_connections=threads,
+            keepalive_expiry=limits.keepalive_expiry,
+        )
+    if limits.max_connections is not None and limits.max_connections < threads:
+        raise ValueError(f'Limits allow {limits.max_connections} connections for {threads} threads')
+    return limits
+
+
+def send_in_context(context: Context, request: 'BaseTgRequest') -> 'BaseTgResponse':
+    return context.run(request.send)
+
 
 def raise_for_tg_response_status(response: httpx.Response) -> None:
     """Raise the `TgHttpStatusError` if one occurred."""
@@ -0,0 +1,115 @@
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable, Generator, Mapping
+
+import httpx
+
+from .client import DEFAULT_HTTP_TIMEOUT, DEFAULT_TG_SERVER_URL, AsyncTgClient
+from .rate_limiter import RateLimiter
+
+# Many bots share the same host, so keep enough idle connections to api.telegram.org for all of them
+DEFAULT_POOL_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=60)
+
+
+@dataclass
+class BotMetrics:
+    """Counters of HTTP requests sent by a single bot of the pool."""
+
+    requests: int = 0
+    successful_responses: int = 0
+    failed_responses: int = 0
+    flood_wait_responses: int = 0
+
+
+class TgClientPool:
+    """Set of async clients for many bot tokens sharing a single HTTP connection pool.
+
+    Each bot gets its own `AsyncTgClient` with its own rate limiter, because Telegram limits are per bot,
+    but keepalive connections to the Telegram server are reused by all bots, saving TLS handshakes
+    and file descriptors. Requests are routed by the bot name.
+    """
+
+    def __init__(self, clients: Mapping[str, AsyncTgClient], session: httpx.AsyncClient) -> None:
+        self.clients = dict(clients)
+        self.session = session
+        self.metrics = {bot: BotMetrics() for bot in self.clients}
+        self._bots_by_api_path = {httpx.URL(client.api_root).path: bot for bot, client in self.clients.items()}
+
+    @classmethod
+    @asynccontextmanager
+    async def setup(
+        cls,
+        tokens: Mapping[str, str],
+        *,
+        session: httpx.AsyncClient | None = None,
+        tg_server_url: str = DEFAULT_TG_SERVER_URL,
+        http2: bool = False,
+        limits: httpx.Limits = DEFAULT_POOL_LIMITS,
+        timeout: httpx.Timeout = DEFAULT_HTTP_TIMEOUT,
+        rate_limiter_factory: Callable[[], RateLimiter] | None = RateLimiter,
+        **client_options: Any,
+    ) -> AsyncGenerator['TgClientPool', None]:
+        """Create clients for all tokens sharing one HTTP session.
+
+        :param tokens: Mapping of bot names used for routing to bot tokens.
+        :param session: HTTP session shared by all bots, created with the settings below if not specified.
+        :param tg_server_url: URL of the Telegram Bot API server.
+        :param http2: Multiplex requests over HTTP/2 connections, requires `httpx[http2]` installed.
+        :param limits: Connection pool limits of the session created.
+        :param timeout: Timeouts of the session created.
+        :param rate_limiter_factory: Function creating a separate rate limiter for every bot, None to disable.
+        :param client_options: Other options passed to every `AsyncTgClient`, e.g. `retry_policy`.
+        """
+        empty_token_bots = [bot for bot, token in tokens.items() if not token]
+        if empty_token_bots:
+            # Safety check for empty string or None to avoid confusing HTTP 404 error
+            raise ValueError(f'Telegram tokens are empty for bots: {", ".join(empty_token_bots)}')
+
+        async with AsyncExitStack() as stack:
+            if not session:
+                session = httpx.AsyncClient(http2=http2, limits=limits, timeout=timeout)
+                await stack.enter_async_context(session)
+
+            clients = {
+                bot: AsyncTgClient(
+                    token=token,
+                    session=session,
+                    tg_server_url=tg_server_url,
+                    rate_limiter=rate_limiter_factory() if rate_limiter_factory else None,
+                    **client_options,
+                )
+                for bot, token in tokens.items()
+            }
+            pool = cls(clients, session)
+
+            session.event_hooks['response'].append(pool.count_response)
+            try:
+                yield pool
+            finally:
+                session.event_hooks['response'].remove(pool.count_response)
+
+    def __getitem__(self, bot: str) -> AsyncTgClient:
+        return self.clients[bot]
+
+    @contextmanager
+    def use(self, bot: str) -> Generator[AsyncTgClient, None, None]:
+        """Set the client of the bot as default for requests sent inside the context."""
+        client = self.clients[bot]
+        with client.set_as_default():
+            yield client
+
+    async def count_response(self, response: httpx.Response) -> None:
+        """Update metrics of the bot the response belongs to, used as httpx event hook."""
+        api_path, _, _ = response.request.url.path.rpartition('/')
+        bot = self._bots_by_api_path.get(f'{api_path}/')
+        if bot is None:
+            return
+
+        metrics = self.metrics[bot]
+        metrics.requests += 1
+        if response.is_success:
+            metrics.successful_responses += 1
+        else:
+            metrics.failed_responses += 1
+        if response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+            metrics.flood_wait_responses += 1
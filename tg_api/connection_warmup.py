@@ -0,0 +1,93 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncGenerator, Generator
+
+import anyio
+import httpx
+
+# Cheap method available for any bot, the response does not matter, only the connection opened does
+WARM_UP_METHOD = 'getMe'
+
+
+async def awarm_up(session: httpx.AsyncClient, api_root: str, connections: int) -> None:
+    """Open connections of the session pool in advance by sending `getMe` requests concurrently.
+
+    First messages skip DNS resolving, TCP and TLS handshakes then. Warming up is best effort,
+    errors are ignored because real requests will reconnect anyway.
+    """
+    async with anyio.create_task_group() as task_group:
+        for _ in range(connections):
+            task_group.start_soon(aping, session, api_root)
+
+
+async def aping(session: httpx.AsyncClient, api_root: str) -> None:
+    try:
+        await session.post(f'{api_root}{WARM_UP_METHOD}')
+    except httpx.HTTPError:
+        pass
+
+
+@asynccontextmanager
+async def akeep_alive(
+    session: httpx.AsyncClient,
+    api_root: str,
+    *,
+    interval: float,
+    connections: int = 1,
+) -> AsyncGenerator[None, None]:
+    """Warm up connections every `interval` seconds in background while inside the context.
+
+    Use interval shorter than the pool keepalive expiry to keep idle connections open,
+    broken connections are replaced with new ones before real requests need them.
+    """
+    async def refresh_connections() -> None:
+        while True:
+            await anyio.sleep(interval)
+            await awarm_up(session, api_root, connections)
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(refresh_connections)
+        try:
+            yield
+        finally:
+            task_group.cancel_scope.cancel()
+
+
+def warm_up(session: httpx.Client, api_root: str, connections: int) -> None:
+    """Work like `awarm_up`, but send requests from a pool of threads."""
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        for _ in range(connections):
+            executor.submit(ping, session, api_root)
+
+
+def ping(session: httpx.Client, api_root: str) -> None:
+    try:
+        session.post(f'{api_root}{WARM_UP_METHOD}')
+    except httpx.HTTPError:
+        pass
+
+
+@contextmanager
+def keep_alive(
+    session: httpx.Client,
+    api_root: str,
+    *,
+    interval: float,
+    connections: int = 1,
+) -> Generator[None, None, None]:
+    """Work like `akeep_alive`, but refresh connections from a daemon thread."""
+    stopped = threading.Event()
+
+    def refresh_connections() -> None:
+        while not stopped.wait(interval):
+            warm_up(session, api_root, connections)
+
+    thread = threading.Thread(target=refresh_connections, name='tg-api-keepalive', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
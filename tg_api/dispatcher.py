@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import math
+
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncGenerator, cast
+
+import anyio
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+
+if TYPE_CHECKING:
+    from .tg_methods import BaseTgRequest, BaseTgResponse
+
+# Messages are ordered within a chat and a forum topic of the chat
+ChatKey = tuple[int | str | None, int | None]
+
+
+def get_chat_key(request: BaseTgRequest) -> ChatKey:
+    return getattr(request, 'chat_id', None), getattr(request, 'message_thread_id', None)
+
+
+@dataclass
+class PendingResponse:
+    """Response of the request submitted to the dispatcher, available after the request is sent."""
+
+    request: BaseTgRequest
+    response: BaseTgResponse | None = None
+    error: Exception | None = None
+
+    _done: anyio.Event = field(default_factory=anyio.Event, init=False, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    async def wait(self) -> BaseTgResponse:
+        """Wait until the request is sent and return the response or raise the error."""
+        await self._done.wait()
+        if self.error:
+            raise self.error
+        return cast('BaseTgResponse', self.response)
+
+    async def send(self) -> None:
+        try:
+            self.response = await self.request.asend()
+        except Exception as error:
+            self.error = error
+        finally:
+            self._done.set()
+
+
+class OrderedDispatcher:
+    """Send requests to the same chat strictly one after another in order of submitting, and chats in parallel.
+
+    Requests are ordered by `chat_id` and `message_thread_id`, so messages to different topics of a forum
+    are sent in parallel too. No more than `max_active_chats` chats are sent to at once, chats with queued
+    requests take turns sending one request each, so a long queue of one chat does not delay the others.
+    """
+
+    def __init__(self, ready_chats_sender: MemoryObjectSendStream[ChatKey]) -> None:
+        self._ready_chats_sender = ready_chats_sender
+        self._chat_queues: dict[ChatKey, deque[PendingResponse]] = {}
+        self._pending_count = 0
+        self._all_sent = anyio.Event()
+
+    @classmethod
+    @asynccontextmanager
+    async def start(cls, *, max_active_chats: int = 30) -> AsyncGenerator[OrderedDispatcher, None]:
+        """Start sending requests submitted with the default async client.
+
+        On exit the dispatcher waits for all submitted requests to be sent, unless an error occurred.
+
+        :param max_active_chats: The maximum number of chats requests are sent to at once.
+        """
+        ready_chats_sender, ready_chats_receiver = anyio.create_memory_object_stream[ChatKey](math.inf)
+        dispatcher = cls(ready_chats_sender)
+
+        async with anyio.create_task_group() as task_group:
+            async with ready_chats_receiver:
+                for _ in range(max_active_chats):
+                    task_group.start_soon(dispatcher.send_to_ready_chats, ready_chats_receiver.clone())
+
+            try:
+                yield dispatcher
+                await dispatcher.join()
+            finally:
+                task_group.cancel_scope.cancel()
+
+    def submit(self, request: BaseTgRequest) -> PendingResponse:
+        """Put the request to the queue of its chat without waiting, the order of calls is the order of sending."""
+        pending_response = PendingResponse(request)
+        self._pending_count += 1
+
+        chat_key = get_chat_key(request)
+        chat_queue = self._chat_queues.get(chat_key)
+        if chat_queue is not None:
+            chat_queue.append(pending_response)
+        else:
+            self._chat_queues[chat_key] = deque([pending_response])
+            self._ready_chats_sender.send_nowait(chat_key)
+        return pending_response
+
+    async def asend(self, request: BaseTgRequest) -> BaseTgResponse:
+        """Submit the request and wait for the response."""
+        return await self.submit(request).wait()
+
+    async def join(self) -> None:
+        """Wait until all requests submitted are sent."""
+        while self._pending_count:
+            await self._all_sent.wait()
+
+    async def send_to_ready_chats(self, ready_chats_receiver: MemoryObjectReceiveStream[ChatKey]) -> None:
+        async with ready_chats_receiver:
+            async for chat_key in ready_chats_receiver:
+                chat_queue = self._chat_queues[chat_key]
+                await chat_queue[0].send()
+                chat_queue.popleft()
+
+                if chat_queue:
+                    # Let other chats go first, the chat is never queued twice, so its requests stay in order
+                    self._ready_chats_sender.send_nowait(chat_key)
+                else:
+                    del self._chat_queues[chat_key]
+
+                self._pending_count -= 1
+                if not self._pending_count:
+                    self._all_sent.set()
+                    self._all_sent = anyio.Event()
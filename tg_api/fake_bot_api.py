@@ -0,0 +1,341 @@
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+
+from collections import Counter, deque
+from contextlib import contextmanager
+from email.message import EmailMessage, Message
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, BinaryIO, Callable, Generator, NamedTuple, cast
+from urllib.parse import parse_qsl, urlsplit
+
+Params = dict[str, Any]
+Reply = tuple[int, dict[str, Any]]
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Fake Bot', 'username': 'fake_bot'}
+
+
+class UploadedFile(NamedTuple):
+    filename: str | None
+    content: bytes
+
+
+class BadRequestError(Exception):
+    """Request parameters are invalid, the fake server replies with HTTP 400 and the message as description."""
+
+
+class FakeBotApi:
+    """Local stand-in of Telegram Bot API server for load tests and benchmarks without network.
+
+    The server runs in background threads of the current process and replies to `sendMessage`, `sendPhoto`,
+    `sendDocument`, `editMessageText`, `editMessageCaption`, `editMessageReplyMarkup`, `editMessageMedia`,
+    `deleteMessage`, `getUpdates` and `getMe` of any bot token with plausible results, so clients are tested
+    through the real transport stack. Every reply is delayed by `latency` plus random `latency_jitter` seconds,
+    a share `flood_rate` of requests is rejected with HTTP 429 and `retry_after`, a share `error_rate` fails
+    with HTTP 500. Messages are not stored, so any message may be edited or deleted.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0,
+        latency_jitter: float = 0,
+        error_rate: float = 0,
+        flood_rate: float = 0,
+        retry_after: int = 1,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.url = ''
+
+        # Numbers of requests received by API method name, including rejected ones
+        self.request_counts: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._updates: deque[Params] = deque()
+        self._updates_added = threading.Condition()
+
+    @classmethod
+    @contextmanager
+    def start(cls, host: str = '127.0.0.1', port: int = 0, **options: Any) -> Generator['FakeBotApi', None, None]:
+        """Start the server in background threads and stop it on exit.
+
+        Pass `url` of the fake API to `setup(tg_server_url=...)` of the client. Free port is picked if 0.
+        """
+        fake_api = cls(**options)
+        server = FakeBotApiServer((host, port), fake_api)
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        fake_api.url = f'http://{host}:{server.server_port}'
+        try:
+            yield fake_api
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def put_update(self, **update: Any) -> int:
+        """Add the incoming update, e.g. `message={...}`, to be returned by `getUpdates`, return its id."""
+        with self._updates_added:
+            update_id = next(self._update_ids)
+            self._updates.append({'update_id': update_id, **update})
+            self._updates_added.notify_all()
+        return update_id
+
+    def reply(self, method_name: str, params: Params) -> Reply:
+        """Make HTTP status and JSON body of the reply to the API method call."""
+        with self._lock:
+            self.request_counts[method_name] += 1
+            roll = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+        if delay:
+            time.sleep(delay)
+
+        if roll < self.flood_rate:
+            return 429, {
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.retry_after}',
+                'parameters': {'retry_after': self.retry_after},
+            }
+        if roll < self.flood_rate + self.error_rate:
+            return 500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'}
+
+        method = METHODS.get(method_name.lower())
+        if not method:
+            return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found'}
+        try:
+            return 200, {'ok': True, 'result': method(self, params)}
+        except BadRequestError as error:
+            return 400, {'ok': False, 'error_code': 400, 'description': f'Bad Request: {error}'}
+
+    def make_message(self, params: Params, **content: Any) -> Params:
+        chat_id = int(get_param(params, 'chat_id'))
+        message = {
+            'message_id': int(params.get('message_id') or next(self._message_ids)),
+            'from': BOT_USER,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'supergroup'},
+            **content,
+        }
+        if params.get('message_thread_id'):
+            message['message_thread_id'] = int(params['message_thread_id'])
+        return message
+
+    def send_message(self, params: Params) -> Params:
+        return self.make_message(params, text=get_param(params, 'text'))
+
+    def send_photo(self, params: Params) -> Params:
+        return self.make_message(params, photo=make_photo_sizes(get_param(params, 'photo')), **get_caption(params))
+
+    def send_document(self, params: Params) -> Params:
+        document = make_document(get_param(params, 'document'))
+        return self.make_message(params, document=document, **get_caption(params))
+
+    def edit_message_text(self, params: Params) -> Params | bool:
+        if params.get('inline_message_id'):
+            return True
+        return self.make_message(params, text=get_param(params, 'text'), edit_date=int(time.time()))
+
+    def edit_message_caption(self, params: Params) -> Params | bool:
+        if params.get('inline_message_id'):
+            return True
+        return self.make_message(params, edit_date=int(time.time()), **get_caption(params))
+
+    def edit_message_reply_markup(self, params: Params) -> Params | bool:
+        if params.get('inline_message_id'):
+            return True
+        return self.make_message(params, edit_date=int(time.time()))
+
+    def edit_message_media(self, params: Params) -> Params | bool:
+        media = get_param(params, 'media')
+        if isinstance(media, str):
+            media = json.loads(media)
+
+        source = media.get('media', '')
+        if source.startswith('attach://'):
+            source = get_param(params, source.removeprefix('attach://'))
+        content: Params = {'photo': make_photo_sizes(source)}
+        if media.get('type') != 'photo':
+            content = {'document': make_document(source)}
+
+        if params.get('inline_message_id'):
+            return True
+        return self.make_message(params, edit_date=int(time.time()), **content, **get_caption(media))
+
+    def delete_message(self, params: Params) -> bool:
+        get_param(params, 'message_id')
+        return True
+
+    def get_me(self, params: Params) -> Params:
+        return BOT_USER
+
+    def get_updates(self, params: Params) -> list[Params]:
+        """Return updates starting from `offset`, waiting up to `timeout` seconds for them as long polling does."""
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        with self._updates_added:
+            # Updates before the offset are confirmed by the bot, so they are forgotten
+            while self._updates and self._updates[0]['update_id'] < offset:
+                self._updates.popleft()
+            self._updates_added.wait_for(lambda: self._updates, timeout)
+            return list(itertools.islice(self._updates, limit))
+
+
+METHODS: dict[str, Callable[[FakeBotApi, Params], Any]] = {
+    'sendmessage': FakeBotApi.send_message,
+    'sendphoto': FakeBotApi.send_photo,
+    'senddocument': FakeBotApi.send_document,
+    'editmessagetext': FakeBotApi.edit_message_text,
+    'editmessagecaption': FakeBotApi.edit_message_caption,
+    'editmessagereplymarkup': FakeBotApi.edit_message_reply_markup,
+    'editmessagemedia': FakeBotApi.edit_message_media,
+    'deletemessage': FakeBotApi.delete_message,
+    'getme': FakeBotApi.get_me,
+    'getupdates': FakeBotApi.get_updates,
+}
+
+
+def get_param(params: Params, name: str) -> Any:
+    value = params.get(name)
+    if value is None or value == '':
+        raise BadRequestError(f'parameter "{name}" is required')
+    return value
+
+
+def get_caption(params: Params) -> Params:
+    return {'caption': params['caption']} if params.get('caption') else {}
+
+
+def make_file_ids(source: UploadedFile | str) -> Params:
+    # The same content gets the same file id, as it does in Telegram, and file ids sent are returned as is
+    if isinstance(source, str):
+        return {'file_id': source, 'file_unique_id': hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]}
+    content_hash = hashlib.sha256(source.content).hexdigest()
+    return {'file_id': f'fake-{content_hash}', 'file_unique_id': content_hash[:16], 'file_size': len(source.content)}
+
+
+def make_photo_sizes(source: UploadedFile | str) -> list[Params]:
+    file_ids = make_file_ids(source)
+    return [
+        {**file_ids, 'file_id': f"{file_ids['file_id']}-thumb", 'width': 90, 'height': 90},
+        {**file_ids, 'width': 1280, 'height': 1280},
+    ]
+
+
+def make_document(source: UploadedFile | str) -> Params:
+    document = make_file_ids(source)
+    if isinstance(source, UploadedFile) and source.filename:
+        document['file_name'] = source.filename
+    return document
+
+
+class FakeBotApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address: tuple[str, int], fake_api: FakeBotApi) -> None:
+        super().__init__(server_address, FakeBotApiHandler)
+        self.fake_api = fake_api
+
+
+class FakeBotApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, so Nagle's algorithm would delay every reply by delayed ACK timeout
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:  # noqa N802
+        self.reply()
+
+    def do_POST(self) -> None:  # noqa N802
+        self.reply()
+
+    def reply(self) -> None:
+        url = urlsplit(self.path)
+        # Path is /bot<token>/<method>
+        method_name = url.path.rpartition('/')[2]
+        params: Params = dict(parse_qsl(url.query))
+        params.update(parse_body(self.headers.get('Content-Type', ''), self.read_body()))
+
+        status_code, payload = cast(FakeBotApiServer, self.server).fake_api.reply(method_name, params)
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            return read_chunked(self.rfile)
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa A002
+        pass
+
+
+def read_chunked(rfile: BinaryIO) -> bytes:
+    chunks = []
+    while chunk_size := int(rfile.readline().split(b';')[0], 16):
+        chunks.append(rfile.read(chunk_size))
+        rfile.readline()
+    # Skip trailers up to the empty line
+    while rfile.readline().strip():
+        pass
+    return b''.join(chunks)
+
+
+def parse_body(content_type: str, body: bytes) -> Params:
+    if not body:
+        return {}
+    if content_type.startswith('application/json'):
+        return json.loads(body)
+    if content_type.startswith('multipart/form-data'):
+        headers = f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8')
+        form = cast(EmailMessage, BytesParser(EmailMessage, policy=HTTP).parsebytes(headers + body))
+        return {get_form_part_name(part): get_form_part_value(part) for part in form.iter_parts()}
+    return dict(parse_qsl(body.decode('utf-8')))
+
+
+def get_form_part_name(part: Message) -> str:
+    return str(part.get_param('name', header='content-disposition'))
+
+
+def get_form_part_value(part: Message) -> str | UploadedFile:
+    content = cast(bytes, part.get_payload(decode=True))
+    filename = part.get_filename()
+    return UploadedFile(filename, content) if filename is not None else content.decode('utf-8')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run fake Telegram Bot API server for load tests.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0, help='Seconds to delay every reply.')
+    parser.add_argument('--latency-jitter', type=float, default=0, help='Max random seconds added to the latency.')
+    parser.add_argument('--error-rate', type=float, default=0, help='Share of requests failed with HTTP 500.')
+    parser.add_argument('--flood-rate', type=float, default=0, help='Share of requests rejected with HTTP 429.')
+    parser.add_argument('--retry-after', type=int, default=1, help='Seconds of retry_after of HTTP 429 replies.')
+    args = parser.parse_args()
+
+    options = vars(args)
+    with FakeBotApi.start(options.pop('host'), options.pop('port'), **options) as fake_api:
+        print(f'Fake Telegram Bot API is listening on {fake_api.url}, press Ctrl+C to stop')  # noqa T201
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import hashlib
+import sqlite3
+import threading
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from os import PathLike
+from typing import Any, Generator
+
+from .exceptions import TgHttpStatusError
+from .input_files import Buffer
+from .json_codecs import JsonCodec
+
+
+class FileIdCache:
+    """Base class for storages of `file_id` of uploaded files by hash of their contents.
+
+    Client consults the cache before uploading bytes of a photo or a document and, if the same content
+    was uploaded already, sends the `file_id` instead. File ids are valid for the bot which uploaded the file
+    only, so keys include the bot id. Subclasses implement `get`, `set` and `delete` methods.
+    """
+
+    def get(self, key: str) -> str | None:
+        """Return the file id of the content uploaded before, otherwise None."""
+        raise NotImplementedError
+
+    def set(self, key: str, file_id: str) -> None:  # noqa A003
+        """Remember the file id of the uploaded content."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Forget the file id, e.g. if Telegram does not accept it anymore."""
+        raise NotImplementedError
+
+
+class MemoryFileIdCache(FileIdCache):
+    """In-memory LRU cache of file ids. Lives until the process restarts."""
+
+    def __init__(self, maxsize: int = 10_000) -> None:
+        self.maxsize = maxsize
+        self._file_ids: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            file_id = self._file_ids.get(key)
+            if file_id is not None:
+                self._file_ids.move_to_end(key)
+            return file_id
+
+    def set(self, key: str, file_id: str) -> None:  # noqa A003
+        with self._lock:
+            self._file_ids[key] = file_id
+            self._file_ids.move_to_end(key)
+            while len(self._file_ids) > self.maxsize:
+                self._file_ids.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._file_ids.pop(key, None)
+
+
+class SqliteFileIdCache(FileIdCache):
+    """Cache of file ids stored in SQLite file, so it survives the process restart."""
+
+    def __init__(self, path: str | PathLike[str]) -> None:
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS file_ids (key TEXT PRIMARY KEY, file_id TEXT NOT NULL)')
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute('SELECT file_id FROM file_ids WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, file_id: str) -> None:  # noqa A003
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO file_ids (key, file_id) VALUES (?, ?)', (key, file_id))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._connection.execute('DELETE FROM file_ids WHERE key = ?', (key,))
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def make_file_key(token: str, media_type: str, content: Buffer) -> str:
+    """Make the cache key of the content uploaded by the bot as a photo or a document."""
+    # Bot id is the part of the token before the colon, the secret part is not stored
+    bot_id = token.partition(':')[0]
+    # hashlib reads any buffer in place, so mmap and memoryview are not copied
+    content_hash = hashlib.sha256(content).hexdigest()
+    return f'{bot_id}:{media_type}:{content_hash}'
+
+
+def parse_uploaded_file_id(json_payload: bytes, json_codec: JsonCodec, media_type: str) -> str | None:
+    """Extract the file id of the uploaded photo or document from the successful response, if there is one."""
+    obj = json_codec.loads(json_payload)
+    result = obj.get('result') if isinstance(obj, dict) else None
+    media: Any = result.get(media_type) if isinstance(result, dict) else None
+
+    if isinstance(media, list) and media:
+        # Photo is returned in several sizes, the largest one is the last
+        media = media[-1]
+    return media.get('file_id') if isinstance(media, dict) else None
+
+
+@contextmanager
+def suppress_rejected_file_id(file_id_cache: FileIdCache, key: str) -> Generator[None, None, None]:
+    """Forget the cached file id and suppress the error if Telegram rejects it, so the content is uploaded again."""
+    try:
+        yield
+    except TgHttpStatusError as error:
+        description = (error.tg_response.description if error.tg_response else None) or ''
+        if error.response.status_code != 400 or 'file identifier' not in description:
+            raise
+        file_id_cache.delete(key)
@@ -0,0 +1,322 @@
+import mimetypes
+import mmap
+import os
+
+from collections.abc import AsyncIterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, BinaryIO, Callable, Iterator, Mapping
+
+import anyio
+from pydantic.validators import bytes_validator
+
+from .exceptions import TgRuntimeError
+
+CHUNK_SIZE = 64 * 1024
+
+Buffer = bytes | bytearray | memoryview | mmap.mmap
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+FileSource = str | os.PathLike[str] | BinaryIO | AsyncIterable[bytes] | Buffer
+
+
+if TYPE_CHECKING:
+    BinaryContent = Buffer
+else:
+    class BinaryContent:
+        """Pydantic type of binary fields keeping the bytes-like object passed as is.
+
+        Unlike `bytes` fields, bytearray, memoryview and mmap are neither copied on validation to bytes
+        nor stripped of whitespace bytes.
+        """
+
+        @classmethod
+        def __get_validators__(cls) -> Iterator[Callable[[Any], Buffer]]:
+            yield cls.validate
+
+        @classmethod
+        def __modify_schema__(cls, field_schema: dict[str, Any]) -> None:
+            field_schema.update(type='string', format='binary')
+
+        @classmethod
+        def validate(cls, value: Any) -> Buffer:
+            if isinstance(value, BUFFER_TYPES):
+                return value
+            # Strings and numbers are encoded the same way as for `bytes` fields
+            return bytes_validator(value)
+
+
+class InputFile:
+    """File uploaded in chunks, so it is never loaded to memory as a whole, whatever its size is.
+
+    Source may be a path, a file object opened in binary mode, an async iterable of bytes chunks or a bytes-like
+    object already in memory, which is sent by memoryview slices without copying.
+    Files from paths, buffers and seekable file objects are read again from the start on retries, while async
+    iterables and non-seekable file objects are consumed once, so requests with them are not retried.
+    Async iterables can be uploaded with `AsyncTgClient` only.
+    """
+
+    def __init__(self, source: FileSource, *, filename: str | None = None, size: int | None = None) -> None:
+        self.source = source
+        self.filename = filename or get_default_filename(source)
+
+        self._start_position: int | None = None
+        if not isinstance(source, (str, os.PathLike, AsyncIterable, *BUFFER_TYPES)) and source.seekable():
+            self._start_position = source.tell()
+        self.size = size if size is not None else self.get_size()
+        self._consumed = False
+
+    def __repr__(self) -> str:
+        source = self.source
+        # Do not dump the whole content of the buffer to logs and tracebacks
+        source_repr = f'<{type(source).__name__} of {self.size} bytes>' if self.is_buffer else repr(source)
+        return f'{type(self).__name__}({source_repr}, filename={self.filename!r})'
+
+    @classmethod
+    def __get_validators__(cls) -> Iterator[Callable[[Any], 'InputFile']]:
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema: dict[str, Any]) -> None:
+        field_schema.update(type='string', format='binary')
+
+    @classmethod
+    def validate(cls, value: Any) -> 'InputFile':
+        """Wrap path, file object, async iterable or buffer passed to a request field into `InputFile`."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, (str, os.PathLike, AsyncIterable, *BUFFER_TYPES)) or is_file_object(value):
+            return cls(value)
+        raise TypeError('path, binary file object, async iterable of bytes or bytes-like object expected')
+
+    @property
+    def is_path(self) -> bool:
+        return isinstance(self.source, (str, os.PathLike))
+
+    @property
+    def is_buffer(self) -> bool:
+        return isinstance(self.source, BUFFER_TYPES)
+
+    @property
+    def is_replayable(self) -> bool:
+        """Check if the file may be read again from the start, e.g. to retry the request."""
+        return self.is_path or self.is_buffer or self._start_position is not None
+
+    def get_size(self) -> int | None:
+        source = self.source
+        if isinstance(source, (str, os.PathLike)):
+            return os.stat(source).st_size
+        if isinstance(source, BUFFER_TYPES):
+            return memoryview(source).nbytes
+        if self._start_position is not None and not isinstance(source, AsyncIterable):
+            end_position = source.seek(0, os.SEEK_END)
+            source.seek(self._start_position)
+            return end_position - self._start_position
+        return None
+
+    def iter_chunks(self) -> Iterator[bytes | memoryview]:
+        """Read the file chunk by chunk from the start."""
+        source = self.source
+        if isinstance(source, AsyncIterable):
+            raise TgRuntimeError('Async iterable can be uploaded with AsyncTgClient only.')
+
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as file:
+                while chunk := file.read(CHUNK_SIZE):
+                    yield chunk
+            return
+
+        if isinstance(source, BUFFER_TYPES):
+            yield from iter_buffer_chunks(source)
+            return
+
+        self._rewind()
+        while chunk := source.read(CHUNK_SIZE):
+            yield chunk
+
+    async def aiter_chunks(self) -> AsyncIterator[bytes | memoryview]:
+        """Read the file chunk by chunk from the start without blocking the event loop."""
+        async for chunk in self._get_async_chunks():
+            yield chunk
+
+    def _get_async_chunks(self) -> AsyncIterable[bytes | memoryview]:
+        source = self.source
+        if isinstance(source, (str, os.PathLike)):
+            return aiter_path_chunks(source)
+        if isinstance(source, BUFFER_TYPES):
+            return aiter_buffer_chunks(source)
+
+        self._rewind()
+        if isinstance(source, AsyncIterable):
+            return source
+        return aiter_file_object_chunks(source)
+
+    def check_readable(self) -> None:
+        """Raise `TgRuntimeError` if the file was consumed already and can not be read again."""
+        if self._consumed and not self.is_replayable:
+            raise TgRuntimeError(f'{self!r} can be read only once, so the request can not be sent again.')
+
+    def _rewind(self) -> None:
+        if self._start_position is not None:
+            self.source.seek(self._start_position)  # type: ignore[union-attr]
+            return
+
+        self.check_readable()
+        self._consumed = True
+
+
+async def aiter_path_chunks(path: str | os.PathLike[str]) -> AsyncIterator[bytes]:
+    async with await anyio.open_file(path, 'rb') as async_file:
+        while chunk := await async_file.read(CHUNK_SIZE):
+            yield chunk
+
+
+async def aiter_file_object_chunks(file: BinaryIO) -> AsyncIterator[bytes]:
+    while chunk := await anyio.to_thread.run_sync(file.read, CHUNK_SIZE):
+        yield chunk
+
+
+def iter_buffer_chunks(buffer: Buffer) -> Iterator[memoryview]:
+    # Slices of memoryview share memory with the buffer, so the content is copied only chunk by chunk to the socket
+    view = memoryview(buffer).cast('B')
+    for offset in range(0, len(view), CHUNK_SIZE):
+        yield view[offset:offset + CHUNK_SIZE]
+
+
+async def aiter_buffer_chunks(buffer: Buffer) -> AsyncIterator[memoryview]:
+    for chunk in iter_buffer_chunks(buffer):
+        yield chunk
+
+
+def get_buffer(value: Any) -> Buffer | None:
+    """Return the bytes-like content of the field value, or None if the content is not in memory."""
+    source = value.source if isinstance(value, InputFile) else value
+    return source if isinstance(source, BUFFER_TYPES) else None
+
+
+def is_file_object(value: Any) -> bool:
+    return callable(getattr(value, 'read', None))
+
+
+def get_default_filename(source: FileSource) -> str:
+    # Same name httpx uses for nameless files
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', None)
+    return Path(name).name if isinstance(name, (str, os.PathLike)) else 'upload'
+
+
+if TYPE_CHECKING:
+    # Fields accept any source, it is wrapped into `InputFile` on validation
+    FileContent = FileSource | InputFile
+else:
+    FileContent = InputFile
+
+
+# Form file is either the file or the pair of the file name overriding the default one and the file
+FormFile = InputFile | tuple[str | None, InputFile]
+
+
+def make_form_file(value: Any) -> FormFile:
+    """Wrap the file in the format of httpx `files` argument, e.g. `(filename, content)`, into the form file.
+
+    Content type given in the tuple is ignored, it is guessed by the file name as for other form files.
+    """
+    if isinstance(value, tuple):
+        filename, content, *_ = value
+        return filename, InputFile.validate(content)
+    return InputFile.validate(value)
+
+
+def are_files_replayable(files: Mapping[str, FormFile]) -> bool:
+    """Check if all files of the form may be read again from the start, so the request may be retried."""
+    return all(
+        (form_file[1] if isinstance(form_file, tuple) else form_file).is_replayable
+        for form_file in files.values()
+    )
+
+
+class StreamingMultipartForm:
+    """Body of multipart/form-data request streamed chunk by chunk instead of being built in memory.
+
+    Content-Length header is sent if sizes of all files are known, otherwise the body is sent chunked.
+    Form can not be created with files consumed already, so a request is not sent again with a truncated file.
+    """
+
+    def __init__(self, fields: Mapping[str, Any], files: Mapping[str, FormFile]) -> None:
+        self.fields = fields
+        self.files: dict[str, tuple[str, InputFile]] = {}
+        for name, form_file in files.items():
+            filename, file = form_file if isinstance(form_file, tuple) else (None, form_file)
+            file.check_readable()
+            self.files[name] = (filename or file.filename, file)
+        self.boundary = os.urandom(16).hex().encode('ascii')
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {'Content-Type': f'multipart/form-data; boundary={self.boundary.decode("ascii")}'}
+        content_length = self.get_content_length()
+        if content_length is not None:
+            headers['Content-Length'] = str(content_length)
+        return headers
+
+    def get_content_length(self) -> int | None:
+        content_length = len(self.render_fields()) + len(self.render_closing())
+        for name, (filename, file) in self.files.items():
+            if file.size is None:
+                return None
+            content_length += len(self.render_file_headers(name, filename)) + file.size + 2
+        return content_length
+
+    def get_files_size(self) -> int:
+        """Return the total size of files, a file of unknown size counts as one chunk kept in memory."""
+        return sum(CHUNK_SIZE if file.size is None else file.size for _, file in self.files.values())
+
+    def iter_chunks(self) -> Iterator[bytes | memoryview]:
+        yield self.render_fields()
+        for name, (filename, file) in self.files.items():
+            yield self.render_file_headers(name, filename)
+            yield from file.iter_chunks()
+            yield b'\r\n'
+        yield self.render_closing()
+
+    async def aiter_chunks(self) -> AsyncIterator[bytes | memoryview]:
+        yield self.render_fields()
+        for name, (filename, file) in self.files.items():
+            yield self.render_file_headers(name, filename)
+            async for chunk in file.aiter_chunks():
+                yield chunk
+            yield b'\r\n'
+        yield self.render_closing()
+
+    def render_fields(self) -> bytes:
+        chunks = []
+        for name, value in self.fields.items():
+            chunks.append(
+                b'--%s\r\nContent-Disposition: form-data; name="%s"\r\n\r\n%s\r\n'
+                % (self.boundary, quote_form_param(name), encode_form_value(value)),
+            )
+        return b''.join(chunks)
+
+    def render_file_headers(self, name: str, filename: str) -> bytes:
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        return (
+            b'--%s\r\nContent-Disposition: form-data; name="%s"; filename="%s"\r\nContent-Type: %s\r\n\r\n'
+            % (self.boundary, quote_form_param(name), quote_form_param(filename), content_type.encode('ascii'))
+        )
+
+    def render_closing(self) -> bytes:
+        return b'--%s--\r\n' % self.boundary
+
+
+def quote_form_param(value: str) -> bytes:
+    # Same escaping as httpx and browsers do, see https://html.spec.whatwg.org/#multipart-form-data
+    return value.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A').encode('utf-8')
+
+
+def encode_form_value(value: Any) -> bytes:
+    # Same conversion of primitive values as httpx does for form data
+    if value is True:
+        return b'true'
+    if value is False:
+        return b'false'
+    if value is None:
+        return b''
+    return str(value).encode('utf-8')
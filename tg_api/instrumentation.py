@@ -0,0 +1,280 @@
+import threading
+import time
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Generator, Iterable
+
+import httpx
+
+from .exceptions import TgHttpStatusError
+from .tracing import SpanAttributes, add_span_event, hash_chat_id, set_span_attributes, start_span
+
+# Upper bounds of histogram buckets in seconds, from JSON encoding of a short message to the upload of a large file
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+STAGES = ('serialization', 'network', 'parse', 'total')
+
+
+@dataclass
+class RequestStats:
+    """Where time of a single Bot API request went and how it ended.
+
+    Times are in seconds and sum up over all attempts of the request. Body of multipart form is encoded while
+    it is sent, so its encoding is a part of network time. Total time also includes waiting for the rate limiter
+    and the scheduler, and pauses between attempts. Parse time is zero if the response was not parsed,
+    e.g. the request was sent with `asend_raw`.
+    """
+
+    api_method: str = ''
+    chat_id: int | None = None
+    payload_size: int = 0
+    response_size: int = 0
+    serialization_time: float = 0
+    network_time: float = 0
+    parse_time: float = 0
+    total_time: float = 0
+    status_code: int | None = None
+    error_code: int | None = None
+    attempts: int = 0
+
+    @contextmanager
+    def measure_serialization(self) -> Generator[None, None, None]:
+        started_at = time.perf_counter()
+        try:
+            with start_span('tg_api.encode'):
+                yield
+        finally:
+            self.serialization_time += time.perf_counter() - started_at
+
+    @contextmanager
+    def measure_network(self) -> Generator[None, None, None]:
+        started_at = time.perf_counter()
+        try:
+            with start_span('tg_api.http', client_kind=True):
+                yield
+        finally:
+            self.network_time += time.perf_counter() - started_at
+
+    @contextmanager
+    def measure_parse(self) -> Generator[None, None, None]:
+        # Parsing code starts spans of decoding and validation itself
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.parse_time += time.perf_counter() - started_at
+
+    def add_http_response(self, response: httpx.Response) -> None:
+        """Account the attempt finished with the HTTP response, successful or not."""
+        # Streamed body of unknown size has no Content-Length
+        self.payload_size = int(response.request.headers.get('content-length', 0))
+        self.response_size = len(response.content)
+        self.status_code = response.status_code
+        self.error_code = None
+        # Status of every attempt goes to its HTTP span, the request span gets the status of the last one
+        set_span_attributes({'http.response.status_code': response.status_code})
+
+    def add_error(self, error: Exception) -> None:
+        """Account the attempt failed with Telegram error or without a response at all."""
+        retry_after = None
+        if isinstance(error, TgHttpStatusError):
+            tg_response = error.tg_response
+            self.error_code = tg_response.error_code if tg_response else None
+            retry_after = tg_response.parameters.retry_after if tg_response and tg_response.parameters else None
+        else:
+            self.status_code = None
+            self.error_code = None
+
+        # Pauses before the next attempts, e.g. flood waits, are seen in traces next to these events
+        add_span_event('tg_api.attempt_failed', {
+            'tg_api.attempt': self.attempts,
+            'tg_api.error': type(error).__name__,
+            'tg_api.error_code': self.error_code,
+            'tg_api.retry_after': retry_after,
+        })
+
+    def get_span_attributes(self, chat_id_hash_key: bytes | None = None) -> SpanAttributes:
+        return {
+            'tg_api.method': self.api_method,
+            'tg_api.chat_id_hash': hash_chat_id(self.chat_id, chat_id_hash_key),
+            'tg_api.request.bytes': self.payload_size,
+            'tg_api.response.bytes': self.response_size,
+            'tg_api.retry_count': max(self.attempts - 1, 0),
+            'http.response.status_code': self.status_code,
+            'tg_api.error_code': self.error_code,
+        }
+
+
+class RequestObserver(ABC):
+    """Base class of observers of requests sent by the client.
+
+    Observers passed to client setup are called once per request, when the request is finished or failed.
+    They are called in the task or thread which sent the request, so they should be fast and never raise.
+    """
+
+    @abstractmethod
+    def observe(self, stats: RequestStats) -> None:
+        ...
+
+
+# Stats of the request being sent, shared by the parsing code and the HTTP code of the same request
+current_request_stats: ContextVar[RequestStats | None] = ContextVar('current_request_stats', default=None)
+
+
+@contextmanager
+def observe_request(
+    observers: Iterable[RequestObserver],
+    api_method: str = '',
+    chat_id_hash_key: bytes | None = None,
+) -> Generator[RequestStats, None, None]:
+    """Collect stats of the request sent inside, trace it and pass the stats to observers on exit.
+
+    Nested contexts share stats and the span of the outermost one, so HTTP attempts and parsing of the response
+    are reported together. Chat id is traced as HMAC with `chat_id_hash_key`, it is not traced without the key.
+    """
+    outer_stats = current_request_stats.get()
+    if outer_stats is not None:
+        outer_stats.api_method = api_method or outer_stats.api_method
+        yield outer_stats
+        return
+
+    stats = RequestStats(api_method=api_method)
+    started_at = time.perf_counter()
+    stats_token = current_request_stats.set(stats)
+    try:
+        with start_span('tg_api.request') as span:
+            try:
+                yield stats
+            finally:
+                # Method is known only after the request is sent, so the span is named at the end
+                if span is not None:
+                    span.update_name(f'tg_api.{stats.api_method}')
+                    set_span_attributes(stats.get_span_attributes(chat_id_hash_key), span)
+    finally:
+        current_request_stats.reset(stats_token)
+        stats.total_time = time.perf_counter() - started_at
+        for observer in observers:
+            observer.observe(stats)
+
+
+class Histogram:
+    """Cumulative histogram in the form exported to Prometheus."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        # The last counter is for values above the largest bucket, i.e. `+Inf` bucket of Prometheus
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def iter_cumulative_counts(self) -> Generator[tuple[str, int], None, None]:
+        """Yield `le` label of every bucket with the number of values less or equal to it."""
+        cumulative_count = 0
+        for bucket, count in zip((*map(format_number, self.buckets), '+Inf'), self.counts):
+            cumulative_count += count
+            yield bucket, cumulative_count
+
+
+class HistogramObserver(RequestObserver):
+    """In-process aggregator of request stats: histograms of stage times and counters of outcomes per API method.
+
+    Totals live until the process restarts, pass the observer to `format_prometheus_metrics` to export them.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        # Keys are (api_method, stage)
+        self.stage_histograms: defaultdict[tuple[str, str], Histogram] = defaultdict(self.make_histogram)
+        # Keys are (api_method, status_code, error_code)
+        self.outcomes: defaultdict[tuple[str, int | None, int | None], int] = defaultdict(int)
+        self.payload_bytes: defaultdict[str, int] = defaultdict(int)
+        self.response_bytes: defaultdict[str, int] = defaultdict(int)
+        self.retries: defaultdict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def make_histogram(self) -> Histogram:
+        return Histogram(self.buckets)
+
+    def observe(self, stats: RequestStats) -> None:
+        stage_times = (stats.serialization_time, stats.network_time, stats.parse_time, stats.total_time)
+        with self._lock:
+            for stage, stage_time in zip(STAGES, stage_times):
+                self.stage_histograms[stats.api_method, stage].observe(stage_time)
+            self.outcomes[stats.api_method, stats.status_code, stats.error_code] += 1
+            self.payload_bytes[stats.api_method] += stats.payload_size
+            self.response_bytes[stats.api_method] += stats.response_size
+            self.retries[stats.api_method] += max(stats.attempts - 1, 0)
+
+
+def format_prometheus_metrics(observer: HistogramObserver, prefix: str = 'tg_api') -> str:
+    """Render totals of the observer in Prometheus text exposition format, e.g. for `/metrics` endpoint."""
+    with observer._lock:
+        lines = [
+            *format_stage_histograms(observer, prefix),
+            *format_outcomes(observer, prefix),
+            *format_counter(
+                f'{prefix}_request_payload_bytes_total',
+                'Bytes of request bodies sent.',
+                observer.payload_bytes,
+            ),
+            *format_counter(
+                f'{prefix}_response_bytes_total',
+                'Bytes of response bodies received.',
+                observer.response_bytes,
+            ),
+            *format_counter(
+                f'{prefix}_request_retries_total',
+                'Attempts repeated after errors.',
+                observer.retries,
+            ),
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def format_stage_histograms(observer: HistogramObserver, prefix: str) -> Generator[str, None, None]:
+    name = f'{prefix}_request_stage_seconds'
+    yield f'# HELP {name} Time spent in stages of Telegram Bot API requests.'
+    yield f'# TYPE {name} histogram'
+    for (api_method, stage), histogram in sorted(observer.stage_histograms.items()):
+        labels = f'method="{escape_label_value(api_method)}",stage="{stage}"'
+        for bucket, cumulative_count in histogram.iter_cumulative_counts():
+            yield f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative_count}'
+        yield f'{name}_sum{{{labels}}} {format_number(histogram.sum)}'
+        yield f'{name}_count{{{labels}}} {histogram.count}'
+
+
+def format_outcomes(observer: HistogramObserver, prefix: str) -> Generator[str, None, None]:
+    name = f'{prefix}_requests_total'
+    yield f'# HELP {name} Telegram Bot API requests by HTTP status and Telegram error code.'
+    yield f'# TYPE {name} counter'
+    # Status is None if no response was received, error code is None on success
+    for (api_method, status_code, error_code), count in sorted(observer.outcomes.items(), key=str):
+        status = '' if status_code is None else status_code
+        error = '' if error_code is None else error_code
+        yield f'{name}{{method="{escape_label_value(api_method)}",status="{status}",error_code="{error}"}} {count}'
+
+
+def format_counter(name: str, help_text: str, totals: dict[str, int]) -> Generator[str, None, None]:
+    yield f'# HELP {name} {help_text}'
+    yield f'# TYPE {name} counter'
+    for api_method, total in sorted(totals.items()):
+        yield f'{name}{{method="{escape_label_value(api_method)}"}} {total}'
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_number(value: float) -> str:
+    # repr is the shortest exact representation, Prometheus parses it back to the same float
+    return repr(float(value))
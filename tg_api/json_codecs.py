@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.json import pydantic_encoder
+from pydantic.utils import ROOT_KEY
+
+from .exceptions import TgRuntimeError
+from .lazy_models import construct_lazy_model
+from .model_construction import construct_model
+from .tracing import start_span
+
+if TYPE_CHECKING:
+    from .tg_methods import BaseTgResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None  # type: ignore[assignment]
+
+ResponseType = TypeVar('ResponseType', bound='BaseTgResponse')
+
+
+@dataclass(frozen=True)
+class JsonCodec:
+    """Pair of functions used by the client to encode requests to JSON and decode responses from JSON.
+
+    Stdlib json is used by default, it encodes values the same way as pydantic `.json()` does. Fast codecs
+    `ORJSON_CODEC` and `MSGSPEC_CODEC` are opt-in, they are available if extras `orjson` or `msgspec` are installed.
+    """
+
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes | str], Any]
+    decode_errors: tuple[type[Exception], ...] = (ValueError,)
+
+
+def dumps_with_stdlib(obj: Any) -> bytes:
+    return json.dumps(obj, default=pydantic_encoder).encode('utf-8')
+
+
+STDLIB_JSON_CODEC = JsonCodec(name='json', dumps=dumps_with_stdlib, loads=json.loads)
+
+ORJSON_CODEC = JsonCodec(
+    name='orjson',
+    dumps=lambda obj: orjson.dumps(obj, default=pydantic_encoder),
+    loads=orjson.loads,
+) if orjson else None
+
+MSGSPEC_CODEC = JsonCodec(
+    name='msgspec',
+    dumps=msgspec.json.Encoder(enc_hook=pydantic_encoder).encode,
+    loads=msgspec.json.Decoder().decode,
+    decode_errors=(ValueError, msgspec.DecodeError),
+) if msgspec else None
+
+# Fast codecs format floats and datetimes differently, so installing orjson or msgspec must not change the default
+DEFAULT_JSON_CODEC = STDLIB_JSON_CODEC
+
+
+def parse_tg_response(
+    response_class: type[ResponseType],
+    json_payload: bytes,
+    json_codec: JsonCodec,
+    *,
+    validate: bool = True,
+    lazy: bool = False,
+) -> ResponseType:
+    """Decode Telegram Bot API response with the codec and validate it, same as `parse_raw` does.
+
+    If `validate` is False, the response is trusted and models are built without validation.
+    If `lazy` is True, the response is trusted and its lazy subclass is returned, see `LazyModel`.
+    """
+    try:
+        with start_span('tg_api.decode'):
+            obj = json_codec.loads(json_payload)
+    except json_codec.decode_errors as error:
+        raise ValidationError([ErrorWrapper(error, loc=ROOT_KEY)], response_class)
+
+    if lazy and isinstance(obj, dict):
+        return construct_lazy_model(response_class, obj)
+
+    with start_span('tg_api.validate'):
+        if not validate and isinstance(obj, dict):
+            return construct_model(response_class, obj)
+        return response_class.parse_obj(obj)
+
+
+@dataclass(frozen=True, slots=True)
+class MessageAck:
+    """Acknowledgement of the sent message with its identifiers only.
+
+    Fields are None if the method returns True instead of the message, e.g. `deleteMessage`.
+    """
+
+    message_id: int | None
+    chat_id: int | None
+    date: int | None
+
+
+def parse_message_ack(json_payload: bytes, json_codec: JsonCodec) -> MessageAck:
+    """Extract identifiers of the sent message from Telegram Bot API response skipping models building."""
+    try:
+        with start_span('tg_api.decode'):
+            obj = json_codec.loads(json_payload)
+    except json_codec.decode_errors as error:
+        raise TgRuntimeError(f'Telegram Bot API response is not a valid JSON: {error}') from error
+
+    if not isinstance(obj, dict) or not obj.get('ok'):
+        raise TgRuntimeError(f'Telegram Bot API request failed: {json_payload!r}')
+
+    result = obj.get('result')
+    if not isinstance(result, dict):
+        return MessageAck(message_id=None, chat_id=None, date=None)
+
+    chat = result.get('chat')
+    return MessageAck(
+        message_id=result.get('message_id'),
+        chat_id=chat.get('id') if isinstance(chat, dict) else None,
+        date=result.get('date'),
+    )
@@ -0,0 +1,103 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Generator, Type
+
+from pydantic import BaseModel
+
+from .model_construction import ModelType, construct_field_value, construct_model, get_fields_by_key
+
+if TYPE_CHECKING:
+    LazyModelBase = BaseModel
+else:
+    # Lazy classes get pydantic machinery from the model class they are made of
+    LazyModelBase = object
+
+
+class LazyModel(LazyModelBase):
+    """Mixin of models keeping raw decoded JSON and parsing fields on first access only.
+
+    Lazy models are made with `construct_lazy_model` as subclasses of ordinary models, so they pass `isinstance`
+    checks and have all methods of pydantic models. Nested models are lazy too and parsed values are cached,
+    so `response.result.message_id` costs a single dict lookup, while the rest of `Message` tree is never built,
+    unless the model is serialized or compared. Data is trusted and not validated.
+    """
+
+    __slots__ = ()
+
+    _lazy_data: dict[str, Any]
+
+    def __getattr__(self, name: str) -> Any:
+        # Called only for attributes not parsed yet, parsed ones are cached in the instance __dict__
+        field = self.__fields__.get(name)
+        if not field:
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+
+        if field.alias in self._lazy_data:
+            value = construct_field_value(field, self._lazy_data[field.alias], construct_lazy_model)
+        else:
+            value = field.get_default()
+
+        object.__setattr__(self, name, value)
+        return value
+
+    @property
+    def model_class(self) -> Type[BaseModel]:
+        return type(self).__mro__[2]
+
+    def to_model(self) -> BaseModel:
+        """Build the whole ordinary pydantic model without validation."""
+        return construct_model(self.model_class, self._lazy_data)
+
+    def load_fields(self) -> None:
+        """Parse the rest of fields, methods of pydantic reading all fields at once call it first."""
+        if len(self.__dict__) == len(self.__fields__):
+            return
+        for name in self.__fields__:
+            getattr(self, name)
+        # Keep order of fields the same as in ordinary models, e.g. for JSON output
+        object.__setattr__(self, '__dict__', {name: self.__dict__[name] for name in self.__fields__})
+
+    def _iter(self, *args: Any, **kwargs: Any) -> Any:
+        self.load_fields()
+        return super()._iter(*args, **kwargs)
+
+    def __iter__(self) -> Generator[tuple[str, Any], None, None]:  # type: ignore[override]
+        self.load_fields()
+        yield from super().__iter__()
+
+    def __repr_args__(self) -> Any:
+        self.load_fields()
+        return super().__repr_args__()
+
+    def __reduce__(self) -> Any:
+        # Lazy classes can not be found by name, so the ordinary model with the same values is unpickled
+        self.load_fields()
+        return restore_model, (self.model_class, self.__fields_set__, self.__dict__)
+
+
+def restore_model(model_class: Type[ModelType], fields_set: set[str], values: dict[str, Any]) -> ModelType:
+    return model_class.construct(fields_set, **values)
+
+
+@lru_cache(maxsize=None)
+def get_lazy_model_class(model_class: Type[ModelType]) -> Type[ModelType]:
+    """Make the subclass of the model with lazy fields, it is named the same to look the same in reprs."""
+    return type(model_class.__name__, (LazyModel, model_class), {  # type: ignore[return-value]
+        '__module__': model_class.__module__,
+        '__qualname__': model_class.__qualname__,
+        '__slots__': ('_lazy_data',),
+    })
+
+
+def construct_lazy_model(model_class: Type[ModelType], data: dict[str, Any]) -> ModelType:
+    """Wrap trusted data into the lazy subclass of the model, fields are parsed on first access.
+
+    The result is an instance of `model_class` and of `LazyModel`, use `to_model` to get the ordinary model.
+    """
+    lazy_model_class = get_lazy_model_class(model_class)
+    model = lazy_model_class.__new__(lazy_model_class)
+    fields_by_key = get_fields_by_key(model_class)
+    object.__setattr__(model, '__dict__', {})
+    object.__setattr__(model, '__fields_set__', {fields_by_key[key].name for key in data if key in fields_by_key})
+    object.__setattr__(model, '_lazy_data', data)
+    model._init_private_attributes()
+    return model
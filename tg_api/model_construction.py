@@ -0,0 +1,139 @@
+from functools import lru_cache
+from typing import Any, Callable, Type, TypeVar
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SEQUENCE, SHAPE_SINGLETON, ModelField
+
+ModelType = TypeVar('ModelType', bound=BaseModel)
+
+LIST_SHAPES = {SHAPE_LIST, SHAPE_SEQUENCE}
+IMMUTABLE_TYPES = (type(None), bool, int, float, str, bytes)
+
+# Function building a nested model from its class and data
+ModelBuilder = Callable[[Type[BaseModel], dict[str, Any]], Any]
+
+
+def construct_model(model_class: Type[ModelType], data: dict[str, Any]) -> ModelType:
+    """Build the model and all nested models from trusted data without validation.
+
+    Works like recursive `BaseModel.construct`: field aliases are resolved and nested dicts are turned
+    into models according to field annotations, but values are neither checked nor converted.
+    Use it for responses of the real Telegram Bot API only.
+    """
+    fields_by_key = get_fields_by_key(model_class)
+    values = {}
+    for key, value in data.items():
+        field = fields_by_key.get(key)
+        if field:
+            values[field.name] = construct_field_value(field, value, construct_model)
+
+    # Same as `BaseModel.construct` does, but with defaults prepared once for the model class
+    model = model_class.__new__(model_class)
+    object.__setattr__(model, '__dict__', get_default_values(model_class) | values)
+    object.__setattr__(model, '__fields_set__', set(values))
+    model._init_private_attributes()
+    return model
+
+
+def construct_field_value(field: ModelField, value: Any, build_model: ModelBuilder) -> Any:
+    """Turn nested dicts of the field value into models with `build_model` according to field annotation."""
+    if value is None:
+        return None
+
+    if field.shape in LIST_SHAPES:
+        return construct_list_value(field, value, build_model)
+
+    if field.shape == SHAPE_SINGLETON and isinstance(value, dict):
+        return construct_dict_value(field, value, build_model)
+
+    return value
+
+
+def construct_list_value(field: ModelField, value: Any, build_model: ModelBuilder) -> Any:
+    if not isinstance(value, list) or not field.sub_fields:
+        return value
+
+    item_field = field.sub_fields[0]
+    return [construct_field_value(item_field, item, build_model) for item in value]
+
+
+def construct_dict_value(field: ModelField, value: dict[str, Any], build_model: ModelBuilder) -> Any:
+    if field.sub_fields:
+        return construct_union_value(field, value, build_model)
+
+    if is_model_class(field.type_):
+        return build_model(field.type_, value)
+
+    return value
+
+
+def construct_union_value(field: ModelField, value: dict[str, Any], build_model: ModelBuilder) -> Any:
+    """Build the model of union matching the data best, let pydantic decide if there is no single best one."""
+    model_class = pick_union_model(field, value)
+    if model_class:
+        return build_model(model_class, value)
+
+    # Unusual or ambiguous data, so validate it to get the same model as parsing with validation does
+    validated_value, errors = field.validate(value, {}, loc=field.name)
+    return value if errors else validated_value
+
+
+def pick_union_model(field: ModelField, value: dict[str, Any]) -> Type[BaseModel] | None:
+    """Pick the model of union having all required fields present in the data and the most keys of the data known.
+
+    None is returned if no model fits or several models fit equally well, e.g. when optional fields overlap.
+    """
+    matches = sorted(
+        (
+            (len(get_fields_by_key(sub_field.type_).keys() & value.keys()), sub_field.type_)
+            for sub_field in field.sub_fields or []
+            if is_model_class(sub_field.type_) and get_required_keys(sub_field.type_) <= value.keys()
+        ),
+        key=lambda match: match[0],
+        reverse=True,
+    )
+    if not matches or len(matches) > 1 and matches[0][0] == matches[1][0]:
+        return None
+    return matches[0][1]
+
+
+def is_model_class(type_: Any) -> bool:
+    return isinstance(type_, type) and issubclass(type_, BaseModel)
+
+
+@lru_cache(maxsize=None)
+def get_required_keys(model_class: Type[BaseModel]) -> frozenset[str]:
+    return frozenset(field.alias for field in model_class.__fields__.values() if field.required)
+
+
+def get_default_values(model_class: Type[BaseModel]) -> dict[str, Any]:
+    immutable_defaults, mutable_default_fields = get_default_values_plan(model_class)
+    default_values = dict(immutable_defaults)
+    for field in mutable_default_fields:
+        default_values[field.name] = field.get_default()
+    return default_values
+
+
+@lru_cache(maxsize=None)
+def get_default_values_plan(model_class: Type[BaseModel]) -> tuple[dict[str, Any], tuple[ModelField, ...]]:
+    """Split optional fields to ones with immutable default values and ones which defaults must be copied."""
+    immutable_defaults = {}
+    mutable_default_fields = []
+    for field in model_class.__fields__.values():
+        if field.required:
+            continue
+        if field.default_factory is None and isinstance(field.default, IMMUTABLE_TYPES):
+            immutable_defaults[field.name] = field.default
+        else:
+            mutable_default_fields.append(field)
+    return immutable_defaults, tuple(mutable_default_fields)
+
+
+@lru_cache(maxsize=None)
+def get_fields_by_key(model_class: Type[BaseModel]) -> dict[str, ModelField]:
+    fields_by_key = {}
+    for field in model_class.__fields__.values():
+        if model_class.__config__.allow_population_by_field_name:
+            fields_by_key[field.name] = field
+        fields_by_key[field.alias] = field
+    return fields_by_key
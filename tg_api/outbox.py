@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import base64
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from os import PathLike
+from typing import TYPE_CHECKING, Any, Iterable, NamedTuple
+
+import anyio
+import httpx
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from pydantic.json import pydantic_encoder
+
+from .broadcast import RECIPIENT_ERRORS
+from .exceptions import TgHttpStatusError, TgRuntimeError
+from .input_files import BUFFER_TYPES, InputFile
+from .retry import RetryPolicy
+
+if TYPE_CHECKING:
+    from .tg_methods import BaseTgRequest
+
+# JSON object key marking base64 encoded bytes of files and other binary fields
+BYTES_KEY = '$base64'
+# JSON object keys of files streamed from paths, the file is read when the request is sent
+PATH_KEY = '$path'
+FILENAME_KEY = '$filename'
+
+# Requests failed temporarily are resent with exponential backoff up to 5 minutes, but never given up
+DEFAULT_OUTBOX_RETRY_POLICY = RetryPolicy(backoff_base=1, backoff_max=300)
+
+
+class OutboxItem(NamedTuple):
+    """Pending request fetched from the database."""
+
+    id: int  # noqa A003
+    request: BaseTgRequest
+    # Number of attempts failed temporarily so far
+    attempts: int
+
+
+def encode_request(request: BaseTgRequest) -> tuple[str, bytes]:
+    """Serialize the request to the name of its class and JSON payload keeping binary fields."""
+    request_class = type(request)
+    payload = json.dumps(request.dict(exclude_none=True), default=encode_json_value).encode('utf-8')
+    return f'{request_class.__module__}:{request_class.__qualname__}', payload
+
+
+def decode_request(request_class_path: str, payload: bytes) -> BaseTgRequest:
+    module_name, _, class_name = request_class_path.partition(':')
+    request_class = getattr(importlib.import_module(module_name), class_name)
+    return request_class.parse_obj(json.loads(payload, object_hook=decode_json_object))
+
+
+def encode_json_value(value: Any) -> Any:
+    if isinstance(value, InputFile):
+        return encode_input_file(value)
+    if isinstance(value, BUFFER_TYPES):
+        return {BYTES_KEY: base64.b64encode(value).decode('ascii')}
+    return pydantic_encoder(value)
+
+
+def encode_input_file(file: InputFile) -> Any:
+    """Store the path of the file or its content in memory, other sources can not be read again after restart."""
+    source = file.source
+    if isinstance(source, (str, os.PathLike)):
+        return {PATH_KEY: os.fspath(source), FILENAME_KEY: file.filename}
+    if isinstance(source, BUFFER_TYPES):
+        return encode_json_value(source)
+    raise TgRuntimeError(f'{file!r} can not be stored in the outbox, pass a path or bytes instead.')
+
+
+def decode_json_object(obj: dict[str, Any]) -> Any:
+    if obj.keys() == {BYTES_KEY}:
+        return base64.b64decode(obj[BYTES_KEY])
+    if obj.keys() == {PATH_KEY, FILENAME_KEY}:
+        return InputFile(obj[PATH_KEY], filename=obj[FILENAME_KEY])
+    return obj
+
+
+def decode_items(rows: list[tuple[int, str, bytes, int]]) -> list[OutboxItem]:
+    return [
+        OutboxItem(outbox_id, decode_request(request_class, payload), attempts)
+        for outbox_id, request_class, payload, attempts in rows
+    ]
+
+
+class SqliteOutbox:
+    """Durable queue of requests stored in SQLite file for at-least-once delivery.
+
+    Requests put to the outbox survive the process crash and are sent by `adrain`. Sent requests are removed
+    and rejected ones are kept with the error, but both are committed in batches, so a request may be sent
+    twice if the process dies right after sending it. Requests failed temporarily, i.e. due to network errors,
+    flood control or server errors, stay pending and are postponed with backoff delays of `retry_policy`.
+    Flood control postpones the request by `retry_after` seconds. Only other HTTP errors, e.g. 400 or 403,
+    mark the request as failed.
+    """
+
+    def __init__(
+        self,
+        path: str | PathLike[str],
+        *,
+        batch_size: int = 500,
+        commit_interval: float = 0.1,
+        retry_policy: RetryPolicy = DEFAULT_OUTBOX_RETRY_POLICY,
+    ) -> None:
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.retry_policy = retry_policy
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets the drainer read while requests are put, and with synchronous=NORMAL commits do not wait
+        # for fsync, the database stays consistent, only the last commits may be lost on power failure
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, request_class TEXT NOT NULL, payload BLOB NOT NULL, error TEXT,'
+            # Unix time, so postponed requests keep waiting after restart
+            'attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL DEFAULT 0'
+            ')',
+        )
+        self._lock = threading.Lock()
+        # Async code saves results in worker threads, one batch at a time
+        self._commit_lock = anyio.Lock()
+        self._sent_ids: list[int] = []
+        self._failures: list[tuple[str, int]] = []
+        self._postponements: list[tuple[int, float, int]] = []
+        self._committed_at = time.monotonic()
+        # Ids of requests taken to be sent, until their results are committed
+        self._in_flight_ids: set[int] = set()
+
+    def put(self, request: BaseTgRequest) -> None:
+        """Store the request to be sent, it is committed to the disk before return."""
+        self.put_many([request])
+
+    def put_many(self, requests: Iterable[BaseTgRequest]) -> None:
+        """Store requests in a single transaction, which is much faster than putting them one by one."""
+        rows = [encode_request(request) for request in requests]
+        with self._lock, self._connection:
+            self._connection.executemany('INSERT INTO outbox (request_class, payload) VALUES (?, ?)', rows)
+
+    def get_pending(self, after_id: int = 0) -> list[OutboxItem]:
+        """Return the batch of pending requests due to be sent with ids greater than the one passed, ordered by id."""
+        with self._lock:
+            rows = self._select_pending(after_id)
+        return decode_items(rows)
+
+    def take_pending(self, after_id: int = 0) -> list[OutboxItem]:
+        """Work like `get_pending`, but skip requests being sent and mark the ones returned as being sent.
+
+        Requests stay marked until their results are committed, so a request sent or postponed already
+        is not fetched and sent again before its result is saved.
+        """
+        with self._lock:
+            rows = self._select_pending(after_id)
+            while rows and all(row[0] in self._in_flight_ids for row in rows):
+                rows = self._select_pending(rows[-1][0])
+            rows = [row for row in rows if row[0] not in self._in_flight_ids]
+            self._in_flight_ids.update(row[0] for row in rows)
+        return decode_items(rows)
+
+    def _select_pending(self, after_id: int) -> list[tuple[int, str, bytes, int]]:
+        return self._connection.execute(
+            'SELECT id, request_class, payload, attempts FROM outbox '
+            'WHERE error IS NULL AND next_attempt_at <= ? AND id > ? ORDER BY id LIMIT ?',
+            (time.time(), after_id, self.batch_size),
+        ).fetchall()
+
+    def count_pending(self) -> int:
+        with self._lock:
+            [count] = self._connection.execute('SELECT COUNT(*) FROM outbox WHERE error IS NULL').fetchone()
+        return count
+
+    def retry_failed(self) -> None:
+        """Make requests rejected by Telegram pending again, e.g. after the bot was unblocked."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE outbox SET error = NULL, attempts = 0, next_attempt_at = 0 WHERE error IS NOT NULL',
+            )
+
+    def mark_sent(self, outbox_id: int) -> None:
+        """Remember the request as sent, it is removed from the database with the next batch."""
+        self._sent_ids.append(outbox_id)
+
+    def mark_failed(self, outbox_id: int, error: Exception) -> None:
+        """Remember the error of the request, it is saved to the database with the next batch."""
+        self._failures.append((repr(error), outbox_id))
+
+    def postpone(self, item: OutboxItem, delay: float) -> None:
+        """Remember to resend the request failed temporarily in `delay` seconds, it is saved with the next batch."""
+        self._postponements.append((item.attempts + 1, time.time() + delay, item.id))
+
+    def get_retry_delay(self, error: Exception, attempt: int) -> float | None:
+        """Return delay before the next attempt of the request failed temporarily, None if it was rejected."""
+        if isinstance(error, httpx.TransportError):
+            return self.retry_policy.get_backoff_delay(attempt)
+        if not isinstance(error, TgHttpStatusError):
+            return None
+
+        status_code = error.response.status_code
+        if status_code == httpx.codes.TOO_MANY_REQUESTS:
+            parameters = error.tg_response.parameters if error.tg_response else None
+            return self.retry_policy.get_flood_retry(parameters, attempt).delay
+        if status_code >= 500:
+            return self.retry_policy.get_backoff_delay(attempt)
+        return None
+
+    def is_commit_due(self) -> bool:
+        results_count = len(self._sent_ids) + len(self._failures) + len(self._postponements)
+        return results_count >= self.batch_size or time.monotonic() - self._committed_at >= self.commit_interval
+
+    def commit(self) -> None:
+        """Save all results of sending to the database in a single transaction."""
+        self.save_results(*self.take_results())
+
+    async def acommit(self) -> None:
+        """Work like `commit`, but write to the database from a worker thread not blocking the event loop."""
+        async with self._commit_lock:
+            await anyio.to_thread.run_sync(self.save_results, *self.take_results())
+
+    def take_results(self) -> tuple[list[int], list[tuple[str, int]], list[tuple[int, float, int]]]:
+        sent_ids, self._sent_ids = self._sent_ids, []
+        failures, self._failures = self._failures, []
+        postponements, self._postponements = self._postponements, []
+        self._committed_at = time.monotonic()
+        return sent_ids, failures, postponements
+
+    def save_results(
+        self,
+        sent_ids: list[int],
+        failures: list[tuple[str, int]],
+        postponements: list[tuple[int, float, int]],
+    ) -> None:
+        if not sent_ids and not failures and not postponements:
+            return
+
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(
+                    'DELETE FROM outbox WHERE id = ?',
+                    [(outbox_id,) for outbox_id in sent_ids],
+                )
+                self._connection.executemany('UPDATE outbox SET error = ? WHERE id = ?', failures)
+                self._connection.executemany(
+                    'UPDATE outbox SET attempts = ?, next_attempt_at = ? WHERE id = ?',
+                    postponements,
+                )
+            # Requests may be fetched again only when their results are in the database
+            self._in_flight_ids.difference_update(sent_ids)
+            self._in_flight_ids.difference_update(outbox_id for _, outbox_id in failures)
+            self._in_flight_ids.difference_update(outbox_id for _, _, outbox_id in postponements)
+
+    async def adrain(self, *, concurrency: int = 30, poll_interval: float | None = None) -> None:
+        """Send pending requests concurrently with the default async client.
+
+        :param concurrency: The maximum number of requests sent at once.
+        :param poll_interval: Seconds to wait for new requests and postponed ones when no requests are due.
+            If None, return as soon as all requests due are sent, postponed ones are left for the next call.
+        """
+        items_sender, items_receiver = anyio.create_memory_object_stream[OutboxItem](concurrency)
+
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(self.feed_pending, items_sender, poll_interval)
+                async with items_receiver:
+                    for _ in range(concurrency):
+                        task_group.start_soon(self.send_pending, items_receiver.clone())
+        finally:
+            # Results must be saved even if draining was cancelled
+            with anyio.CancelScope(shield=True):
+                await self.acommit()
+            # Requests taken, but not sent because of cancellation, are pending for the next call
+            with self._lock:
+                self._in_flight_ids.clear()
+
+    async def feed_pending(
+        self,
+        items_sender: MemoryObjectSendStream[OutboxItem],
+        poll_interval: float | None,
+    ) -> None:
+        async with items_sender:
+            after_id = 0
+            while True:
+                items = await anyio.to_thread.run_sync(self.take_pending, after_id)
+                if items:
+                    after_id = items[-1].id
+                    for item in items:
+                        await items_sender.send(item)
+                elif poll_interval is None:
+                    return
+                else:
+                    await anyio.sleep(poll_interval)
+                    # Start over to resend postponed requests when they are due. Results are committed first,
+                    # so requests sent already are deleted and postponed ones wait for their next attempt
+                    await self.acommit()
+                    after_id = 0
+
+    async def send_pending(self, items_receiver: MemoryObjectReceiveStream[OutboxItem]) -> None:
+        async with items_receiver:
+            async for item in items_receiver:
+                try:
+                    await item.request.asend_raw()
+                except RECIPIENT_ERRORS as error:
+                    self.mark_unsent(item, error)
+                else:
+                    self.mark_sent(item.id)
+
+                if self.is_commit_due():
+                    await self.acommit()
+
+    def mark_unsent(self, item: OutboxItem, error: Exception) -> None:
+        retry_delay = self.get_retry_delay(error, item.attempts + 1)
+        if retry_delay is None:
+            self.mark_failed(item.id, error)
+        else:
+            self.postpone(item, retry_delay)
+
+    def close(self) -> None:
+        self.commit()
+        self._connection.close()
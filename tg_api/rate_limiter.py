@@ -0,0 +1,160 @@
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Generator
+
+import anyio
+
+
+@dataclass
+class TokenBucket:
+    """Token bucket implemented as GCRA (generic cell rate algorithm).
+
+    Bucket allows `capacity` requests in a burst and then one request every `period / capacity` seconds.
+    Instead of tokens counter it stores the theoretical arrival time of the next request.
+    """
+
+    capacity: int
+    period: float
+
+    theoretical_arrival_time: float = field(default=0.0, init=False)
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.capacity
+
+    def get_earliest_time(self, now: float) -> float:
+        """Return the moment the bucket will have a free token, not consuming it."""
+        burst_tolerance = self.interval * (self.capacity - 1)
+        return max(now, self.theoretical_arrival_time - burst_tolerance)
+
+    def consume(self, moment: float) -> None:
+        """Take a token at the moment returned by `get_earliest_time`."""
+        self.theoretical_arrival_time = max(self.theoretical_arrival_time, moment) + self.interval
+
+    def is_idle(self, now: float) -> bool:
+        """Check if the bucket is full, so it is indistinguishable from a brand new one."""
+        return self.theoretical_arrival_time <= now
+
+
+@dataclass
+class RateLimiter:
+    """Queue requests to stay within the Telegram flood limits instead of getting HTTP 429.
+
+    Telegram allows about 30 messages per second for a bot in total, 1 message per second for a private chat
+    and 20 messages per minute for a group chat. See here https://core.telegram.org/bots/faq
+
+    One limiter may be shared between coroutines of any async framework supported by AnyIO and between threads.
+    Requests to the same chat are throttled in FIFO order, the global limit is shared by all chats.
+    """
+
+    global_rate: int = 30
+    global_period: float = 1
+    private_chat_rate: int = 1
+    private_chat_period: float = 1
+    group_chat_rate: int = 20
+    group_chat_period: float = 60
+    max_idle_chat_buckets: int = 10_000
+
+    _global_bucket: TokenBucket = field(init=False, repr=False)
+    _chat_buckets: OrderedDict[int, TokenBucket] = field(default_factory=OrderedDict, init=False, repr=False)
+    _async_chat_locks: dict[int, tuple[anyio.Lock, int]] = field(default_factory=dict, init=False, repr=False)
+    _sync_chat_locks: dict[int, tuple[threading.Lock, int]] = field(default_factory=dict, init=False, repr=False)
+    _state_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._global_bucket = TokenBucket(capacity=self.global_rate, period=self.global_period)
+
+    async def athrottle(self, chat_id: int | None = None) -> None:
+        """Wait asynchronously until a request to the chat may be sent and take the tokens."""
+        if chat_id is None:
+            await anyio.sleep(self._reserve_global_token())
+            return
+
+        async with self._lock_chat_async(chat_id):
+            await anyio.sleep(self._get_chat_delay(chat_id))
+            delay = self._reserve_global_token()
+            await anyio.sleep(delay)
+            self._consume_chat_token(chat_id)
+
+    def throttle(self, chat_id: int | None = None) -> None:
+        """Block the thread until a request to the chat may be sent and take the tokens."""
+        if chat_id is None:
+            time.sleep(self._reserve_global_token())
+            return
+
+        with self._lock_chat_sync(chat_id):
+            time.sleep(self._get_chat_delay(chat_id))
+            delay = self._reserve_global_token()
+            time.sleep(delay)
+            self._consume_chat_token(chat_id)
+
+    def _reserve_global_token(self) -> float:
+        with self._state_lock:
+            now = time.monotonic()
+            moment = self._global_bucket.get_earliest_time(now)
+            self._global_bucket.consume(moment)
+        return moment - now
+
+    def _get_chat_delay(self, chat_id: int) -> float:
+        with self._state_lock:
+            now = time.monotonic()
+            bucket = self._chat_buckets.get(chat_id)
+            return bucket.get_earliest_time(now) - now if bucket else 0
+
+    def _consume_chat_token(self, chat_id: int) -> None:
+        with self._state_lock:
+            now = time.monotonic()
+            bucket = self._chat_buckets.pop(chat_id, None) or self._make_chat_bucket(chat_id)
+            bucket.consume(now)
+            self._chat_buckets[chat_id] = bucket
+            self._forget_idle_chat_buckets(now)
+
+    def _make_chat_bucket(self, chat_id: int) -> TokenBucket:
+        # Telegram uses negative identifiers for groups, supergroups and channels
+        if chat_id < 0:
+            return TokenBucket(capacity=self.group_chat_rate, period=self.group_chat_period)
+        return TokenBucket(capacity=self.private_chat_rate, period=self.private_chat_period)
+
+    def _forget_idle_chat_buckets(self, now: float) -> None:
+        # Buckets are ordered from the least recently used, so idle ones are at the beginning
+        while len(self._chat_buckets) > self.max_idle_chat_buckets:
+            chat_id, bucket = next(iter(self._chat_buckets.items()))
+            if not bucket.is_idle(now):
+                break
+            del self._chat_buckets[chat_id]
+
+    @asynccontextmanager
+    async def _lock_chat_async(self, chat_id: int) -> AsyncGenerator[None, None]:
+        with self._state_lock:
+            lock, waiters = self._async_chat_locks.get(chat_id) or (anyio.Lock(), 0)
+            self._async_chat_locks[chat_id] = (lock, waiters + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            with self._state_lock:
+                lock, waiters = self._async_chat_locks[chat_id]
+                if waiters > 1:
+                    self._async_chat_locks[chat_id] = (lock, waiters - 1)
+                else:
+                    del self._async_chat_locks[chat_id]
+
+    @contextmanager
+    def _lock_chat_sync(self, chat_id: int) -> Generator[None, None, None]:
+        with self._state_lock:
+            lock, waiters = self._sync_chat_locks.get(chat_id) or (threading.Lock(), 0)
+            self._sync_chat_locks[chat_id] = (lock, waiters + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._state_lock:
+                lock, waiters = self._sync_chat_locks[chat_id]
+                if waiters > 1:
+                    self._sync_chat_locks[chat_id] = (lock, waiters - 1)
+                else:
+                    del self._sync_chat_locks[chat_id]
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Generic, Iterable, TypeVar
+
+from pydantic import ValidationError
+
+if TYPE_CHECKING:
+    from .json_codecs import JsonCodec
+    from .tg_methods import BaseTgRequest
+
+RequestType = TypeVar('RequestType', bound='BaseTgRequest')
+
+
+class RequestTemplate(Generic[RequestType]):
+    """Request with the invariant part of JSON payload serialized once and reused for many recipients.
+
+    Only per-recipient fields, `chat_id` by default, are validated and encoded for every new request,
+    while text, entities, reply markup and other fields are spliced into the payload as ready bytes.
+    Templates are useful for broadcasts, multipart requests are sent as usual.
+    """
+
+    def __init__(self, request: RequestType, per_recipient_fields: Iterable[str] = ('chat_id',)) -> None:
+        self.request = request
+        self.per_recipient_fields = tuple(per_recipient_fields)
+
+        unknown_fields = set(self.per_recipient_fields) - set(request.__fields__)
+        if unknown_fields:
+            raise ValueError(f'Unknown per-recipient fields: {", ".join(sorted(unknown_fields))}')
+
+        invariant_payload = request.json(exclude_none=True, exclude=set(self.per_recipient_fields))
+        # Keep the payload without leading curly bracket to splice per-recipient fields in front of it
+        self.invariant_payload_tail = invariant_payload.encode('utf-8')[1:]
+
+    def make_request(self, **per_recipient_values: Any) -> RequestType:
+        """Return a copy of the template request with per-recipient fields replaced.
+
+        Only the values passed are validated, the rest of the request is reused as is.
+        """
+        unexpected_fields = set(per_recipient_values) - set(self.per_recipient_fields)
+        if unexpected_fields:
+            raise ValueError(f'Fields are not per-recipient: {", ".join(sorted(unexpected_fields))}')
+
+        validated_values = {}
+        request_class = type(self.request)
+        for field_name, value in per_recipient_values.items():
+            model_field = request_class.__fields__[field_name]
+            validated_value, errors = model_field.validate(value, {}, loc=field_name, cls=request_class)
+            if errors:
+                raise ValidationError([errors], request_class)
+            validated_values[field_name] = validated_value
+
+        request = self.request.copy(update=validated_values)
+        request.attach_template(self)
+        return request
+
+    def render(self, request: BaseTgRequest, json_codec: JsonCodec) -> bytes:
+        """Build JSON payload of the request made from this template.
+
+        Per-recipient fields are encoded the same way as the whole request is, with the codec and without None values.
+        """
+        per_recipient_payload = json_codec.dumps(
+            request.dict(include=set(self.per_recipient_fields), exclude_none=True),
+        )
+        # Drop closing curly bracket to splice the invariant fields after per-recipient ones
+        per_recipient_head = per_recipient_payload.rstrip()[:-1].rstrip()
+
+        if per_recipient_head == b'{':
+            return per_recipient_head + self.invariant_payload_tail
+        if self.invariant_payload_tail == b'}':
+            return per_recipient_head + b'}'
+        return per_recipient_head + b',' + self.invariant_payload_tail
@@ -0,0 +1,86 @@
+import random
+
+from dataclasses import dataclass
+
+import httpx
+
+from .exceptions import TgHttpStatusError
+from .tg_types import ResponseParameters
+
+# Errors raised before the request reaches Telegram, so it is safe to repeat it
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+@dataclass(frozen=True)
+class Retry:
+    """Decision of `RetryPolicy` to repeat a failed request."""
+
+    delay: float
+    chat_id: int | None = None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Describe how to repeat requests failed because of flood control, chat migration or network problems.
+
+    On HTTP 429 the request is repeated exactly after `ResponseParameters.retry_after` seconds.
+    If the group was migrated to a supergroup the request is resent at once to `migrate_to_chat_id`.
+    Server errors 5xx and connection errors are repeated with exponential backoff and full jitter.
+    """
+
+    max_attempts: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 30
+    retry_flood: bool = True
+    follow_migration: bool = True
+    retry_server_errors: bool = True
+
+    def get_retry(self, error: Exception, attempt: int) -> Retry | None:
+        """Decide whether to repeat the request failed on the given attempt, starting from 1.
+
+        :return: `Retry` with the delay and optionally a new chat_id, or None if the error should be raised.
+        """
+        if attempt >= self.max_attempts:
+            return None
+
+        if isinstance(error, CONNECT_ERRORS):
+            return Retry(delay=self.get_backoff_delay(attempt)) if self.retry_server_errors else None
+
+        if not isinstance(error, TgHttpStatusError):
+            return None
+
+        return self.get_tg_error_retry(error, attempt)
+
+    def get_retry_or_raise(self, error: Exception, attempt: int) -> Retry:
+        """Work like `get_retry`, but raise the error if the request should not be repeated."""
+        retry = self.get_retry(error, attempt)
+        if not retry:
+            raise error
+        return retry
+
+    def get_tg_error_retry(self, error: TgHttpStatusError, attempt: int) -> Retry | None:
+        parameters = error.tg_response.parameters if error.tg_response else None
+        status_code = error.response.status_code
+
+        if self.follow_migration and parameters and parameters.migrate_to_chat_id:
+            return Retry(delay=0, chat_id=parameters.migrate_to_chat_id)
+
+        if self.retry_flood and status_code == httpx.codes.TOO_MANY_REQUESTS:
+            return self.get_flood_retry(parameters, attempt)
+
+        if self.retry_server_errors and status_code >= 500:
+            return Retry(delay=self.get_backoff_delay(attempt))
+
+        return None
+
+    def get_flood_retry(self, parameters: ResponseParameters | None, attempt: int) -> Retry:
+        if parameters and parameters.retry_after is not None:
+            return Retry(delay=parameters.retry_after)
+        return Retry(delay=self.get_backoff_delay(attempt))
+
+    def get_backoff_delay(self, attempt: int) -> float:
+        max_delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, max_delay)
+
+
+NO_RETRIES = RetryPolicy(max_attempts=1)
@@ -0,0 +1,131 @@
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import AsyncGenerator, Generator, Hashable, Mapping
+
+import anyio
+
+
+class Priority(str, Enum):
+    """Priority class of outgoing requests."""
+
+    INTERACTIVE = 'interactive'
+    NORMAL = 'normal'
+    BULK = 'bulk'
+
+
+DEFAULT_PRIORITY_WEIGHTS = {
+    Priority.INTERACTIVE: 16,
+    Priority.NORMAL: 4,
+    Priority.BULK: 1,
+}
+
+current_priority: ContextVar[Priority] = ContextVar('current_priority', default=Priority.NORMAL)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Generator[None, None, None]:
+    """Send requests inside the context with the priority passed, requests are `NORMAL` by default."""
+    priority_token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(priority_token)
+
+
+class PriorityScheduler:
+    """Admit outgoing requests of async client one by one in order of their priority and fair between chats.
+
+    No more than `max_in_flight` requests are throttled by the rate limiter and sent at once, the rest wait
+    in queues of their priority class. A free slot is given to the priority class picked by weighted fair
+    queuing, so bulk mailings get `1/21` of slots while interactive and normal requests are waiting,
+    but are never starved. Inside a class chats take turns, and only one request to a chat is sent at once,
+    so a chat with a long backlog neither delays other chats nor occupies many slots waiting for its rate limit.
+    """
+
+    def __init__(self, max_in_flight: int = 10, weights: Mapping[Priority, float] = DEFAULT_PRIORITY_WEIGHTS) -> None:
+        self.max_in_flight = max_in_flight
+        self.weights = dict(weights)
+
+        self._free_slots = max_in_flight
+        self._busy_chats: set[Hashable] = set()
+        self._queues: dict[Priority, OrderedDict[Hashable, deque[anyio.Event]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        # Virtual time of stride scheduling: the class with the least pass gets the next slot
+        self._passes = {priority: 0.0 for priority in Priority}
+        self._virtual_time = 0.0
+
+    @asynccontextmanager
+    async def turn(self, chat_id: int | None = None) -> AsyncGenerator[None, None]:
+        """Wait for the turn of the request to the chat with the current priority and hold the slot inside."""
+        # Requests without chat are independent, so give each one its own key
+        chat_key: Hashable = chat_id if chat_id is not None else object()
+        await self._acquire(current_priority.get(), chat_key)
+        try:
+            yield
+        finally:
+            self._release(chat_key)
+
+    async def _acquire(self, priority: Priority, chat_key: Hashable) -> None:
+        queue = self._queues[priority]
+        if not queue:
+            # Class was idle, so it must not use up the turns it missed
+            self._passes[priority] = max(self._passes[priority], self._virtual_time)
+
+        waiter = anyio.Event()
+        queue.setdefault(chat_key, deque()).append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter.wait()
+        except BaseException:
+            if waiter.is_set():
+                self._release(chat_key)
+            else:
+                self._forget_waiter(priority, chat_key, waiter)
+            raise
+
+    def _release(self, chat_key: Hashable) -> None:
+        self._busy_chats.discard(chat_key)
+        self._free_slots += 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._free_slots:
+            next_turn = self._pick_next_turn()
+            if not next_turn:
+                return
+
+            priority, chat_key = next_turn
+            self._virtual_time = self._passes[priority]
+            self._passes[priority] += 1 / self.weights[priority]
+
+            queue = self._queues[priority]
+            waiters = queue.pop(chat_key)
+            waiter = waiters.popleft()
+            if waiters:
+                # Put the chat to the end of the line to let other chats go first
+                queue[chat_key] = waiters
+
+            self._free_slots -= 1
+            self._busy_chats.add(chat_key)
+            waiter.set()
+
+    def _pick_next_turn(self) -> tuple[Priority, Hashable] | None:
+        next_turn = None
+        for priority, queue in self._queues.items():
+            if next_turn and self._passes[next_turn[0]] <= self._passes[priority]:
+                continue
+            chat_key = next((chat_key for chat_key in queue if chat_key not in self._busy_chats), None)
+            if chat_key is not None:
+                next_turn = (priority, chat_key)
+        return next_turn
+
+    def _forget_waiter(self, priority: Priority, chat_key: Hashable, waiter: anyio.Event) -> None:
+        queue = self._queues[priority]
+        waiters = queue[chat_key]
+        waiters.remove(waiter)
+        if not waiters:
+            del queue[chat_key]
@@ -1,12 +1,31 @@
-import io
-import json
+import time
+import warnings
 
 from textwrap import dedent
-from typing import Any, Union
+from typing import Any, Awaitable, Callable, ClassVar, Iterable, Type, Union
 
-from pydantic import BaseModel, Field
+import anyio
+import httpx
+from pydantic import BaseModel, Field, PrivateAttr
 
 from .client import AsyncTgClient, SyncTgClient, TgRuntimeError, raise_for_tg_response_status
+from .exceptions import TgHttpStatusError
+from .file_id_cache import make_file_key, parse_uploaded_file_id, suppress_rejected_file_id
+from .input_files import (
+    BinaryContent,
+    Buffer,
+    FileContent,
+    FormFile,
+    InputFile,
+    StreamingMultipartForm,
+    are_files_replayable,
+    get_buffer,
+    make_form_file,
+)
+from .instrumentation import RequestStats
+from .json_codecs import STDLIB_JSON_CODEC, JsonCodec, MessageAck, ResponseType, parse_message_ack
+from .request_templates import RequestTemplate, RequestType
+from .retry import CONNECT_ERRORS, NO_RETRIES, Retry
 from . import tg_types
 
 
@@ -24,26 +43,123 @@ class BaseTgRequest(BaseModel, tg_types.ValidableMixin):
         validate_assignment = True
         anystr_strip_whitespace = True
 
-    async def apost_as_json(self, api_method: str) -> bytes:
-        """Send a request to the Telegram Bot API asynchronously using a JSON payload.
+    _template: RequestTemplate | None = PrivateAttr(default=None)
 
-        :param api_method: The Telegram Bot API method to call.
-        :return: The response from the Telegram Bot API as a byte string.
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in self.__fields__:
+            # Template payload becomes outdated when any field is changed
+            self._template = None
+        super().__setattr__(name, value)
+
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to Telegram Bot API endpoint asynchronously and return bytes."""
+        raise NotImplementedError
+
+    async def asend(self) -> 'BaseTgResponse':
+        """Send HTTP request to Telegram Bot API endpoint asynchronously and parse response."""
+        raise NotImplementedError
+
+    async def asend_ack(self) -> MessageAck:
+        """Send HTTP request to Telegram Bot API endpoint asynchronously and extract only ids of the message.
+
+        Full response model is never built, so it is the cheapest way to send a message if nothing but
+        `message_id` is required.
+        """
+        client = self.get_async_client()
+        with client.observe_request() as stats:
+            json_payload = await self.asend_raw()
+            with stats.measure_parse():
+                message_ack = parse_message_ack(json_payload, client.json_codec)
+        return message_ack
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to Telegram Bot API endpoint synchronously and return bytes."""
+        raise NotImplementedError
+
+    def send(self) -> 'BaseTgResponse':
+        """Send HTTP request to Telegram Bot API endpoint synchronously and parse response."""
+        raise NotImplementedError
+
+    def send_ack(self) -> MessageAck:
+        """Send HTTP request to Telegram Bot API endpoint synchronously and extract only ids of the message.
+
+        Full response model is never built, so it is the cheapest way to send a message if nothing but
+        `message_id` is required.
         """
+        client = self.get_sync_client()
+        with client.observe_request() as stats:
+            json_payload = self.send_raw()
+            with stats.measure_parse():
+                message_ack = parse_message_ack(json_payload, client.json_codec)
+        return message_ack
+
+    async def asend_and_parse(self, response_class: Type[ResponseType]) -> ResponseType:
+        """Send the request asynchronously and parse the response, stats of both are reported to observers together."""
+        client = self.get_async_client()
+        with client.observe_request() as stats:
+            json_payload = await self.asend_raw()
+            with stats.measure_parse():
+                response = client.parse_response(response_class, json_payload)
+        return response
+
+    def send_and_parse(self, response_class: Type[ResponseType]) -> ResponseType:
+        """Send the request synchronously and parse the response, stats of both are reported to observers together."""
+        client = self.get_sync_client()
+        with client.observe_request() as stats:
+            json_payload = self.send_raw()
+            with stats.measure_parse():
+                response = client.parse_response(response_class, json_payload)
+        return response
+
+    @staticmethod
+    def get_async_client() -> AsyncTgClient:
+        """Return the default async client or raise the error if it is not specified."""
         client = AsyncTgClient.default_client.get(None)
 
         if not client:
             raise TgRuntimeError('Requires AsyncTgClient to be specified before call.')
 
-        http_response = await client.session.post(
-            f'{client.api_root}{api_method}',
-            headers={
-                'content-type': 'application/json',
-                'accept': 'application/json',
-            },
-            content=self.json(exclude_none=True).encode('utf-8'),
-        )
-        raise_for_tg_response_status(http_response)
+        return client
+
+    @staticmethod
+    def get_sync_client() -> SyncTgClient:
+        """Return the default sync client or raise the error if it is not specified."""
+        client = SyncTgClient.default_client.get(None)
+
+        if not client:
+            raise TgRuntimeError('Requires SyncTgClient to be specified before call.')
+
+        return client
+
+    async def apost_as_json(self, api_method: str) -> bytes:
+        """Send a request to the Telegram Bot API asynchronously using a JSON payload.
+
+        :param api_method: The Telegram Bot API method to call.
+        :return: The response from the Telegram Bot API as a byte string.
+        """
+        client = self.get_async_client()
+
+        async def post(chat_id: int | None, stats: RequestStats) -> httpx.Response:
+            async with client.wait_for_turn(chat_id):
+                if client.rate_limiter:
+                    await client.rate_limiter.athrottle(chat_id)
+
+                with stats.measure_serialization():
+                    json_payload = self.replace_chat_id(chat_id).encode_json_payload(client.json_codec)
+
+                with stats.measure_network():
+                    http_response = await client.session.post(
+                        f'{client.api_root}{api_method}',
+                        headers={
+                            'content-type': 'application/json',
+                            'accept': 'application/json',
+                        },
+                        content=json_payload,
+                    )
+                    stats.add_http_response(http_response)
+                return http_response
+
+        http_response = await self.apost_with_retries(client, api_method, post)
         return http_response.content
 
     def post_as_json(self, api_method: str) -> bytes:
@@ -52,88 +168,276 @@ class BaseTgRequest(BaseModel, tg_types.ValidableMixin):
         :param api_method: The Telegram Bot API method to call.
         :return: The response from the Telegram Bot API as a byte string.
         """
-        client = SyncTgClient.default_client.get(None)
-
-        if not client:
-            raise TgRuntimeError('Requires SyncTgClient to be specified before call.')
-
-        http_response = client.session.post(
-            f'{client.api_root}{api_method}',
-            headers={
-                'content-type': 'application/json',
-                'accept': 'application/json',
-            },
-            content=self.json(exclude_none=True).encode('utf-8'),
-        )
-        raise_for_tg_response_status(http_response)
+        client = self.get_sync_client()
+
+        def post(chat_id: int | None, stats: RequestStats) -> httpx.Response:
+            if client.rate_limiter:
+                client.rate_limiter.throttle(chat_id)
+
+            with stats.measure_serialization():
+                json_payload = self.replace_chat_id(chat_id).encode_json_payload(client.json_codec)
+
+            with stats.measure_network():
+                http_response = client.session.post(
+                    f'{client.api_root}{api_method}',
+                    headers={
+                        'content-type': 'application/json',
+                        'accept': 'application/json',
+                    },
+                    content=json_payload,
+                )
+                stats.add_http_response(http_response)
+            return http_response
+
+        http_response = self.post_with_retries(client, api_method, post)
         return http_response.content
 
     async def apost_multipart_form_data(self, api_method: str, content: dict, files: dict) -> bytes:
         """Send a request to the Telegram Bot API asynchronously using the "multipart/form-data" format.
 
+        Deprecated, use `apost_streaming_multipart`, this method calls it with files wrapped into `InputFile`.
+
         :param api_method: The Telegram Bot API method to call.
         :param content: A dictionary containing the content to be sent.
-        :param files: A dictionary containing files to be sent.
+        :param files: A dictionary containing files to be sent in the format of httpx `files` argument.
         :return: The response from the Telegram Bot API as a byte string.
         """
-        client = AsyncTgClient.default_client.get(None)
-
-        if not client:
-            raise TgRuntimeError('Requires AsyncTgClient to be specified before call.')
-
-        if content.get('caption_entities'):
-            content['caption_entities'] = json.dumps(content['caption_entities'])
-
-        if content.get('entities'):
-            content['entities'] = json.dumps(content['entities'])
-
-        if content.get('reply_markup'):
-            content['reply_markup'] = json.dumps(content['reply_markup'])
-
-        if content.get('media'):
-            content['media'] = json.dumps(content['media'])
-
-        http_response = await client.session.post(
-            f'{client.api_root}{api_method}',
-            files=files,
-            data=content,
+        warnings.warn(
+            'apost_multipart_form_data is deprecated, use apost_streaming_multipart instead',
+            DeprecationWarning,
+            stacklevel=2,
         )
-        raise_for_tg_response_status(http_response)
-        return http_response.content
+        form_files = {name: make_form_file(file) for name, file in files.items()}
+        return await self.apost_streaming_multipart(api_method, content, form_files)
 
     def post_multipart_form_data(self, api_method: str, content: dict, files: dict) -> bytes:
         """Send a request to the Telegram Bot API synchronously using the "multipart/form-data" format.
 
+        Deprecated, use `post_streaming_multipart`, this method calls it with files wrapped into `InputFile`.
+
         :param api_method: The Telegram Bot API method name.
         :param content: A dictionary containing the content to be sent.
-        :param files: A dictionary containing files to be sent.
+        :param files: A dictionary containing files to be sent in the format of httpx `files` argument.
         :return: The response from the Telegram Bot API as a byte string.
         """
-        client = SyncTgClient.default_client.get(None)
+        warnings.warn(
+            'post_multipart_form_data is deprecated, use post_streaming_multipart instead',
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        form_files = {name: make_form_file(file) for name, file in files.items()}
+        return self.post_streaming_multipart(api_method, content, form_files)
 
-        if not client:
-            raise TgRuntimeError('Requires SyncTgClient to be specified before call.')
+    async def apost_streaming_multipart(self, api_method: str, content: dict, files: dict[str, FormFile]) -> bytes:
+        """Send a request to the Telegram Bot API asynchronously streaming the "multipart/form-data" body.
 
-        if content.get('caption_entities'):
-            content['caption_entities'] = json.dumps(content['caption_entities'])
+        Files are read chunk by chunk while the request is being sent, so they are never loaded to memory as a whole.
 
-        if content.get('entities'):
-            content['entities'] = json.dumps(content['entities'])
+        :param api_method: The Telegram Bot API method to call.
+        :param content: A dictionary containing the content to be sent.
+        :param files: A dictionary containing files to be sent.
+        :return: The response from the Telegram Bot API as a byte string.
+        """
+        client = self.get_async_client()
+
+        self.encode_multipart_content(content, client.json_codec)
+
+        async def post(chat_id: int | None, stats: RequestStats) -> httpx.Response:
+            form = StreamingMultipartForm(content, files)
+            # Upload is admitted first, so the scheduler turn and the rate limiter slot are not taken
+            # by a request waiting for the upload budget, while requests to other chats could use them
+            async with client.wait_for_upload(form.get_files_size()), client.wait_for_turn(chat_id):
+                if client.rate_limiter:
+                    await client.rate_limiter.athrottle(chat_id)
+
+                self.prepare_multipart_attempt(content, chat_id)
+                with stats.measure_network():
+                    http_response = await client.session.post(
+                        f'{client.api_root}{api_method}',
+                        headers=form.headers,
+                        content=form.aiter_chunks(),
+                    )
+                    stats.add_http_response(http_response)
+                return http_response
+
+        http_response = await self.apost_with_retries(client, api_method, post, are_files_replayable(files))
+        return http_response.content
 
-        if content.get('reply_markup'):
-            content['reply_markup'] = json.dumps(content['reply_markup'])
+    def post_streaming_multipart(self, api_method: str, content: dict, files: dict[str, FormFile]) -> bytes:
+        """Send a request to the Telegram Bot API synchronously streaming the "multipart/form-data" body.
 
-        if content.get('media'):
-            content['media'] = json.dumps(content['media'])
+        Files are read chunk by chunk while the request is being sent, so they are never loaded to memory as a whole.
 
-        http_response = client.session.post(
-            f'{client.api_root}{api_method}',
-            files=files,
-            data=content,
-        )
-        raise_for_tg_response_status(http_response)
+        :param api_method: The Telegram Bot API method name.
+        :param content: A dictionary containing the content to be sent.
+        :param files: A dictionary containing files to be sent.
+        :return: The response from the Telegram Bot API as a byte string.
+        """
+        client = self.get_sync_client()
+
+        self.encode_multipart_content(content, client.json_codec)
+
+        def post(chat_id: int | None, stats: RequestStats) -> httpx.Response:
+            form = StreamingMultipartForm(content, files)
+            if client.rate_limiter:
+                client.rate_limiter.throttle(chat_id)
+
+            self.prepare_multipart_attempt(content, chat_id)
+            with stats.measure_network():
+                http_response = client.session.post(
+                    f'{client.api_root}{api_method}',
+                    headers=form.headers,
+                    content=form.iter_chunks(),
+                )
+                stats.add_http_response(http_response)
+            return http_response
+
+        http_response = self.post_with_retries(client, api_method, post, are_files_replayable(files))
         return http_response.content
 
+    async def apost_with_retries(
+        self,
+        client: AsyncTgClient,
+        api_method: str,
+        post: Callable[[int | None, RequestStats], Awaitable[httpx.Response]],
+        replayable: bool = True,
+    ) -> httpx.Response:
+        """Call `post` until it succeeds or the client's retry policy gives up.
+
+        :param client: The client whose retry policy and observers are used.
+        :param api_method: The Telegram Bot API method called, reported to observers.
+        :param post: Coroutine function sending the request to the chat_id passed and accounting it in stats.
+        :param replayable: Whether the request may be sent again, False if its body can be read only once.
+        :return: The successful HTTP response.
+        """
+        chat_id = self.get_actual_chat_id(client)
+        attempt = 1
+        with client.observe_request(api_method) as stats:
+            while True:
+                stats.attempts += 1
+                stats.chat_id = chat_id
+                try:
+                    http_response = await post(chat_id, stats)
+                    raise_for_tg_response_status(http_response)
+                    return http_response
+                except (TgHttpStatusError, *CONNECT_ERRORS) as error:
+                    stats.add_error(error)
+                    retry = self.get_retry_or_raise(client, error, attempt, chat_id, replayable)
+
+                chat_id = retry.chat_id or chat_id
+                attempt += 1
+                await anyio.sleep(retry.delay)
+
+    def post_with_retries(
+        self,
+        client: SyncTgClient,
+        api_method: str,
+        post: Callable[[int | None, RequestStats], httpx.Response],
+        replayable: bool = True,
+    ) -> httpx.Response:
+        """Call `post` until it succeeds or the client's retry policy gives up.
+
+        :param client: The client whose retry policy and observers are used.
+        :param api_method: The Telegram Bot API method called, reported to observers.
+        :param post: Function sending the request to the chat_id passed and accounting it in stats.
+        :param replayable: Whether the request may be sent again, False if its body can be read only once.
+        :return: The successful HTTP response.
+        """
+        chat_id = self.get_actual_chat_id(client)
+        attempt = 1
+        with client.observe_request(api_method) as stats:
+            while True:
+                stats.attempts += 1
+                stats.chat_id = chat_id
+                try:
+                    http_response = post(chat_id, stats)
+                    raise_for_tg_response_status(http_response)
+                    return http_response
+                except (TgHttpStatusError, *CONNECT_ERRORS) as error:
+                    stats.add_error(error)
+                    retry = self.get_retry_or_raise(client, error, attempt, chat_id, replayable)
+
+                chat_id = retry.chat_id or chat_id
+                attempt += 1
+                time.sleep(retry.delay)
+
+    def get_actual_chat_id(self, client: AsyncTgClient | SyncTgClient) -> int | None:
+        """Return the chat_id of the request, replaced if the client knows the chat was migrated."""
+        chat_id = getattr(self, 'chat_id', None)
+        if not client.chat_migration_cache:
+            return chat_id
+        return client.chat_migration_cache.resolve(chat_id)
+
+    def get_retry_or_raise(
+        self,
+        client: AsyncTgClient | SyncTgClient,
+        error: Exception,
+        attempt: int,
+        chat_id: int | None,
+        replayable: bool = True,
+    ) -> Retry:
+        """Remember the chat migration if any and decide whether to repeat the failed attempt.
+
+        :param client: The client whose retry policy and chat migration cache are used.
+        :param error: The error of the failed attempt.
+        :param attempt: The number of the failed attempt, starting from 1.
+        :param chat_id: The chat_id the failed attempt was addressed to.
+        :param replayable: Whether the request may be sent again, the error is raised as is otherwise.
+        :return: The retry decision, the error is raised if the request should not be repeated.
+        """
+        if client.chat_migration_cache and isinstance(error, TgHttpStatusError):
+            client.chat_migration_cache.remember_migration(error, getattr(self, 'chat_id', None), chat_id)
+
+        if not replayable:
+            raise error
+
+        retry_policy = client.retry_policy or NO_RETRIES
+        return retry_policy.get_retry_or_raise(error, attempt)
+
+    @staticmethod
+    def encode_multipart_content(content: dict, json_codec: JsonCodec) -> None:
+        """Encode nested objects of the multipart form content to JSON strings in place."""
+        for field_name in ('caption_entities', 'entities', 'reply_markup', 'media'):
+            if content.get(field_name):
+                content[field_name] = json_codec.dumps(content[field_name]).decode('utf-8')
+
+    @staticmethod
+    def prepare_multipart_attempt(content: dict, chat_id: int | None) -> None:
+        """Prepare the multipart form to be sent again, probably to another chat."""
+        if 'chat_id' in content:
+            content['chat_id'] = chat_id
+
+    def replace_chat_id(self, chat_id: int | None) -> 'BaseTgRequest':
+        """Return a copy of the request addressed to another chat, e.g. after the group migration."""
+        if chat_id == getattr(self, 'chat_id', None):
+            return self
+
+        request = self.copy(update={'chat_id': chat_id})
+        if self._template and 'chat_id' not in self._template.per_recipient_fields:
+            request.attach_template(None)
+        return request
+
+    def encode_json_payload(self, json_codec: JsonCodec = STDLIB_JSON_CODEC) -> bytes:
+        """Serialize the request to JSON, reusing the invariant part of the template payload if any."""
+        if self._template:
+            return self._template.render(self, json_codec)
+        return json_codec.dumps(self.dict(exclude_none=True))
+
+    def make_template(
+        self: RequestType,
+        per_recipient_fields: Iterable[str] = ('chat_id',),
+    ) -> RequestTemplate[RequestType]:
+        """Serialize the invariant part of the request once to send it to many recipients.
+
+        :param per_recipient_fields: Names of fields differing from recipient to recipient.
+        :return: The template making requests with only per-recipient fields replaced.
+        """
+        return RequestTemplate(self, per_recipient_fields)
+
+    def attach_template(self, template: RequestTemplate | None) -> None:
+        """Use the template payload to serialize the request made from it."""
+        self._template = template
+
 
 class BaseTgResponse(BaseModel):
     """Represents the base structure of a response from the Telegram Bot API.
@@ -223,7 +527,7 @@ class SendMessageRequest(BaseTgRequest):
         default=None,
         description="Protects the contents of the sent message from forwarding and saving.",
     )
-    message_thread_id: bool | None = Field(
+    message_thread_id: int | None = Field(
         default=None,
         description=dedent("""\
             Unique identifier for the target message thread (topic) of the forum; for forum supergroups only.
@@ -249,17 +553,83 @@ class SendMessageRequest(BaseTgRequest):
     class Config:
         anystr_strip_whitespace = True
 
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `sendMessage` Telegram Bot API endpoint asynchronously and return bytes."""
+        return await self.apost_as_json('sendMessage')
+
     async def asend(self) -> SendMessageResponse:
         """Send HTTP request to `sendMessage` Telegram Bot API endpoint asynchronously and parse response."""
-        json_payload = await self.apost_as_json('sendMessage')
-        response = SendMessageResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(SendMessageResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `sendMessage` Telegram Bot API endpoint synchronously and return bytes."""
+        return self.post_as_json('sendMessage')
 
     def send(self) -> SendMessageResponse:
         """Send HTTP request to `sendMessage` Telegram Bot API endpoint synchronously and parse response."""
-        json_payload = self.post_as_json('sendMessage')
-        response = SendMessageResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(SendMessageResponse)
+
+
+class CachedUploadRequest(BaseTgRequest):
+    """Base class of requests uploading bytes, which send `file_id` instead if the same content was uploaded before.
+
+    Works if the client was set up with `file_id_cache`. The file id is taken from the response to the upload
+    and the next request with the same content is sent as the URL variant with the file id, e.g.
+    `SendUrlPhotoRequest`. If Telegram rejects the cached file id, it is forgotten and the content is uploaded again.
+    """
+
+    media_type: ClassVar[str]
+
+    def get_upload_content(self) -> Buffer | None:
+        """Return the content to upload if it is in memory and may be hashed."""
+        raise NotImplementedError
+
+    def replace_with_file_id(self, file_id: str) -> BaseTgRequest:
+        """Return the request sending the file uploaded before by its file id."""
+        raise NotImplementedError
+
+    def get_file_key(self, client: AsyncTgClient | SyncTgClient) -> str | None:
+        content = self.get_upload_content()
+        if not client.file_id_cache or content is None:
+            return None
+        return make_file_key(client.token, self.media_type, content)
+
+    async def asend_cached_upload(self, upload: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Send the cached file id or call `upload` and remember the file id from its response."""
+        client = self.get_async_client()
+        file_key = self.get_file_key(client)
+        if not client.file_id_cache or not file_key:
+            return await upload()
+
+        file_id = client.file_id_cache.get(file_key)
+        if file_id:
+            with suppress_rejected_file_id(client.file_id_cache, file_key):
+                return await self.replace_with_file_id(file_id).asend_raw()
+
+        json_payload = await upload()
+        self.remember_file_id(client, file_key, json_payload)
+        return json_payload
+
+    def send_cached_upload(self, upload: Callable[[], bytes]) -> bytes:
+        """Send the cached file id or call `upload` and remember the file id from its response."""
+        client = self.get_sync_client()
+        file_key = self.get_file_key(client)
+        if not client.file_id_cache or not file_key:
+            return upload()
+
+        file_id = client.file_id_cache.get(file_key)
+        if file_id:
+            with suppress_rejected_file_id(client.file_id_cache, file_key):
+                return self.replace_with_file_id(file_id).send_raw()
+
+        json_payload = upload()
+        self.remember_file_id(client, file_key, json_payload)
+        return json_payload
+
+    def remember_file_id(self, client: AsyncTgClient | SyncTgClient, file_key: str, json_payload: bytes) -> None:
+        file_id = parse_uploaded_file_id(json_payload, client.json_codec, self.media_type)
+        if client.file_id_cache and file_id:
+            client.file_id_cache.set(file_key, file_id)
 
 
 class SendPhotoResponse(BaseTgResponse):
@@ -270,18 +640,20 @@ class SendPhotoResponse(BaseTgResponse):
     )
 
 
-class SendBytesPhotoRequest(BaseTgRequest):
+class SendBytesPhotoRequest(CachedUploadRequest):
     """Object encapsulates data for calling Telegram Bot API endpoint `sendPhoto`.
 
     See here https://core.telegram.org/bots/api#sendphoto
     """
 
+    media_type: ClassVar[str] = 'photo'
+
     chat_id: int = Field(
         description=dedent("""\
             Unique identifier for the target chat or username of the target channel (in the format @channelusername).
         """),
     )
-    photo: bytes = Field(
+    photo: BinaryContent = Field(
         description=dedent("""\
             Photo to send. Pass a file_id as String to send a photo that exists on the Telegram servers (recommended),
             pass an HTTP URL as a String for Telegram to get a photo from the Internet, or upload a new photo using
@@ -351,25 +723,49 @@ class SendBytesPhotoRequest(BaseTgRequest):
         """),
     )
 
+    def get_form(self) -> tuple[dict, dict[str, FormFile]]:
+        """Split the request to the multipart form content and files, the photo is neither copied nor encoded."""
+        content = self.dict(exclude_none=True, exclude={'photo', 'filename'})
+        files: dict[str, FormFile] = {'photo': (self.filename, InputFile.validate(self.photo))}
+        return content, files
+
+    def get_upload_content(self) -> Buffer | None:
+        return get_buffer(self.photo)
+
+    def replace_with_file_id(self, file_id: str) -> 'SendUrlPhotoRequest':
+        return SendUrlPhotoRequest(photo=file_id, **self.dict(exclude_none=True, exclude={'photo'}))
+
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `sendPhoto` Telegram Bot API endpoint asynchronously and return bytes."""
+        content, files = self.get_form()
+        return await self.asend_cached_upload(lambda: self.apost_streaming_multipart('sendPhoto', content, files))
+
     async def asend(self) -> SendPhotoResponse:
         """Send HTTP request to `sendPhoto` Telegram Bot API endpoint asynchronously and parse response."""
-        content = self.dict(exclude_none=True, exclude={'photo'})
-        photo_bytes_io = io.BytesIO(self.photo)
-        photo_bytes_io.name = self.filename
-        files = {'photo': photo_bytes_io}
-        json_payload = await self.apost_multipart_form_data('sendPhoto', content, files)
-        response = SendPhotoResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(SendPhotoResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `sendPhoto` Telegram Bot API endpoint synchronously and return bytes."""
+        content, files = self.get_form()
+        return self.send_cached_upload(lambda: self.post_streaming_multipart('sendPhoto', content, files))
 
     def send(self) -> SendPhotoResponse:
         """Send HTTP request to `sendPhoto` Telegram Bot API endpoint synchronously and parse response."""
-        content = self.dict(exclude_none=True, exclude={'photo'})
-        photo_bytes_io = io.BytesIO(self.photo)
-        photo_bytes_io.name = self.filename
-        files = {'photo': photo_bytes_io}
-        json_payload = self.post_multipart_form_data('sendPhoto', content, files)
-        response = SendPhotoResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(SendPhotoResponse)
+
+
+class SendFilePhotoRequest(SendBytesPhotoRequest):
+    """Object encapsulates data for calling Telegram Bot API endpoint `sendPhoto` with the photo streamed from a file.
+
+    See here https://core.telegram.org/bots/api#sendphoto
+    """
+
+    photo: FileContent = Field(  # type: ignore[assignment]
+        description=dedent("""\
+            Photo to upload: a path, a file object opened in binary mode or an async iterable of bytes.
+            The photo is streamed in chunks and is never loaded to memory as a whole.
+        """),
+    )
 
 
 class SendUrlPhotoRequest(BaseTgRequest):
@@ -453,17 +849,21 @@ class SendUrlPhotoRequest(BaseTgRequest):
         """),
     )
 
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `sendPhoto` Telegram Bot API endpoint asynchronously and return bytes."""
+        return await self.apost_as_json('sendPhoto')
+
     async def asend(self) -> SendPhotoResponse:
         """Send HTTP request to `sendPhoto` Telegram Bot API endpoint asynchronously and parse response."""
-        json_payload = await self.apost_as_json('sendPhoto')
-        response = SendPhotoResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(SendPhotoResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `sendPhoto` Telegram Bot API endpoint synchronously and return bytes."""
+        return self.post_as_json('sendPhoto')
 
     def send(self) -> SendPhotoResponse:
         """Send HTTP request to `sendPhoto` Telegram Bot API endpoint synchronously and parse response."""
-        json_payload = self.post_as_json('sendPhoto')
-        response = SendPhotoResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(SendPhotoResponse)
 
 
 class SendDocumentResponse(BaseTgResponse):
@@ -474,18 +874,20 @@ class SendDocumentResponse(BaseTgResponse):
     )
 
 
-class SendBytesDocumentRequest(BaseTgRequest):
+class SendBytesDocumentRequest(CachedUploadRequest):
     """Object encapsulates data for calling Telegram Bot API endpoint `sendDocument`.
 
     See here https://core.telegram.org/bots/api#senddocument
     """
 
+    media_type: ClassVar[str] = 'document'
+
     chat_id: int = Field(
         description=dedent("""\
             Unique identifier for the target chat or username of the target channel (in the format @channelusername).
         """),
     )
-    document: bytes = Field(
+    document: BinaryContent = Field(
         description=dedent("""\
             File to send. Pass a file_id as String to send a file that exists on the Telegram servers (recommended),
             pass an HTTP URL as a String for Telegram to get a file from the Internet,
@@ -502,7 +904,7 @@ class SendBytesDocumentRequest(BaseTgRequest):
             Unique identifier for the target message thread (topic) of the forum; for forum supergroups only.
         """),
     )
-    thumbnail: bytes | str | None = Field(
+    thumbnail: str | BinaryContent | None = Field(
         default=None,
         description=dedent("""\
             Thumbnail of the file sent; can be ignored if thumbnail generation for the file is supported server-side.
@@ -566,25 +968,63 @@ class SendBytesDocumentRequest(BaseTgRequest):
         """),
     )
 
+    def get_form(self) -> tuple[dict, dict[str, FormFile]]:
+        """Split the request to the multipart form content and files, file contents are neither copied nor encoded."""
+        content = self.dict(exclude_none=True, exclude={'document', 'filename', 'thumbnail'})
+        files: dict[str, FormFile] = {'document': (self.filename, InputFile.validate(self.document))}
+        if isinstance(self.thumbnail, str):
+            content['thumbnail'] = self.thumbnail
+        elif self.thumbnail is not None:
+            files['thumbnail'] = InputFile.validate(self.thumbnail)
+        return content, files
+
+    def get_upload_content(self) -> Buffer | None:
+        return get_buffer(self.document)
+
+    def replace_with_file_id(self, file_id: str) -> 'SendUrlDocumentRequest':
+        # Thumbnail is ignored by Telegram if the document is not uploaded
+        content = self.dict(exclude_none=True, exclude={'document', 'thumbnail'})
+        return SendUrlDocumentRequest(document=file_id, **content)
+
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `sendDocument` Telegram Bot API endpoint asynchronously and return bytes."""
+        content, files = self.get_form()
+        return await self.asend_cached_upload(lambda: self.apost_streaming_multipart('sendDocument', content, files))
+
     async def asend(self) -> SendDocumentResponse:
         """Send HTTP request to `sendDocument` Telegram Bot API endpoint asynchronously and parse response."""
-        content = self.dict(exclude_none=True, exclude={'document'})
-        document_bytes = io.BytesIO(self.document)
-        document_bytes.name = self.filename
-        files = {'document': document_bytes}
-        json_payload = await self.apost_multipart_form_data('sendDocument', content, files)
-        response = SendDocumentResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(SendDocumentResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `sendDocument` Telegram Bot API endpoint synchronously and return bytes."""
+        content, files = self.get_form()
+        return self.send_cached_upload(lambda: self.post_streaming_multipart('sendDocument', content, files))
 
     def send(self) -> SendDocumentResponse:
         """Send HTTP request to `sendDocument` Telegram Bot API endpoint synchronously and parse response."""
-        content = self.dict(exclude_none=True, exclude={'document'})
-        document_bytes = io.BytesIO(self.document)
-        document_bytes.name = self.filename
-        files = {'document': document_bytes}
-        json_payload = self.post_multipart_form_data('sendDocument', content, files)
-        response = SendDocumentResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(SendDocumentResponse)
+
+
+class SendFileDocumentRequest(SendBytesDocumentRequest):
+    """Object encapsulates data for calling Telegram Bot API endpoint `sendDocument` with the file streamed.
+
+    See here https://core.telegram.org/bots/api#senddocument
+    """
+
+    document: FileContent = Field(  # type: ignore[assignment]
+        description=dedent("""\
+            File to upload: a path, a file object opened in binary mode or an async iterable of bytes.
+            The file is streamed in chunks and is never loaded to memory as a whole.
+        """),
+    )
+    thumbnail: str | FileContent | None = Field(  # type: ignore[assignment]
+        default=None,
+        description=dedent("""\
+            Thumbnail of the file sent; can be ignored if thumbnail generation for the file is supported server-side.
+            The thumbnail should be in JPEG format and less than 200 kB in size. A thumbnail's width and height should
+            not exceed 320. Pass a path, a file object or an async iterable of bytes to upload the thumbnail.
+        """),
+    )
 
 
 class SendUrlDocumentRequest(BaseTgRequest):
@@ -679,17 +1119,21 @@ class SendUrlDocumentRequest(BaseTgRequest):
         """),
     )
 
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `sendDocument` Telegram Bot API endpoint asynchronously and return bytes."""
+        return await self.apost_as_json('sendDocument')
+
     async def asend(self) -> SendDocumentResponse:
         """Send HTTP request to `sendDocument` Telegram Bot API endpoint asynchronously and parse response."""
-        json_payload = await self.apost_as_json('sendDocument')
-        response = SendDocumentResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(SendDocumentResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `sendDocument` Telegram Bot API endpoint synchronously and return bytes."""
+        return self.post_as_json('sendDocument')
 
     def send(self) -> SendDocumentResponse:
         """Send HTTP request to `sendDocument` Telegram Bot API endpoint synchronously and parse response."""
-        json_payload = self.post_as_json('sendDocument')
-        response = SendDocumentResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(SendDocumentResponse)
 
 
 class DeleteMessageResponse(BaseTgResponse):
@@ -715,17 +1159,21 @@ class DeleteMessageRequest(BaseTgRequest):
         description="Identifier of the message to delete.",
     )
 
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `deleteMessage` Telegram Bot API endpoint asynchronously and return bytes."""
+        return await self.apost_as_json('deleteMessage')
+
     async def asend(self) -> DeleteMessageResponse:
         """Send HTTP request to `deleteMessage` Telegram Bot API endpoint asynchronously and parse response."""
-        json_payload = await self.apost_as_json('deleteMessage')
-        response = DeleteMessageResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(DeleteMessageResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `deleteMessage` Telegram Bot API endpoint synchronously and return bytes."""
+        return self.post_as_json('deleteMessage')
 
     def send(self) -> DeleteMessageResponse:
         """Send HTTP request to `deleteMessage` Telegram Bot API endpoint synchronously and parse response."""
-        json_payload = self.post_as_json('deleteMessage')
-        response = DeleteMessageResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(DeleteMessageResponse)
 
 
 class EditMessageTextResponse(BaseTgResponse):
@@ -782,17 +1230,21 @@ class EditMessageTextRequest(BaseTgRequest):
         description="A JSON-serialized object for an inline keyboard.",
     )
 
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `editmessagetext` Telegram Bot API endpoint asynchronously and return bytes."""
+        return await self.apost_as_json('editmessagetext')
+
     async def asend(self) -> EditMessageTextResponse:
         """Send HTTP request to `editmessagetext` Telegram Bot API endpoint asynchronously and parse response."""
-        json_payload = await self.apost_as_json('editmessagetext')
-        response = EditMessageTextResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(EditMessageTextResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `editmessagetext` Telegram Bot API endpoint synchronously and return bytes."""
+        return self.post_as_json('editmessagetext')
 
     def send(self) -> EditMessageTextResponse:
         """Send HTTP request to `editmessagetext` Telegram Bot API endpoint synchronously and parse response."""
-        json_payload = self.post_as_json('editmessagetext')
-        response = EditMessageTextResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(EditMessageTextResponse)
 
 
 class EditMessageReplyMarkupResponse(BaseTgResponse):
@@ -829,17 +1281,21 @@ class EditMessageReplyMarkupRequest(BaseTgRequest):
         description="A JSON-serialized object for an inline keyboard.",
     )
 
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `editmessagereplymarkup` Telegram Bot API endpoint asynchronously and return bytes."""
+        return await self.apost_as_json('editmessagereplymarkup')
+
     async def asend(self) -> EditMessageReplyMarkupResponse:
         """Send HTTP request to `editmessagereplymarkup` Telegram Bot API endpoint asynchronously and parse response."""
-        json_payload = await self.apost_as_json('editmessagereplymarkup')
-        response = EditMessageReplyMarkupResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(EditMessageReplyMarkupResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `editmessagereplymarkup` Telegram Bot API endpoint synchronously and return bytes."""
+        return self.post_as_json('editmessagereplymarkup')
 
     def send(self) -> EditMessageReplyMarkupResponse:
         """Send HTTP request to `editmessagereplymarkup` Telegram Bot API endpoint synchronously and parse response."""
-        json_payload = self.post_as_json('editmessagereplymarkup')
-        response = EditMessageReplyMarkupResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(EditMessageReplyMarkupResponse)
 
 
 class EditMessageCaptionResponse(BaseTgResponse):
@@ -892,17 +1348,21 @@ class EditMessageCaptionRequest(BaseTgRequest):
         description="A JSON-serialized object for an inline keyboard.",
     )
 
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `editmessagecaption` Telegram Bot API endpoint asynchronously and return bytes."""
+        return await self.apost_as_json('editmessagecaption')
+
     async def asend(self) -> EditMessageCaptionResponse:
         """Send HTTP request to `editmessagecaption` Telegram Bot API endpoint asynchronously and parse response."""
-        json_payload = await self.apost_as_json('editmessagecaption')
-        response = EditMessageCaptionResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(EditMessageCaptionResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `editmessagecaption` Telegram Bot API endpoint synchronously and return bytes."""
+        return self.post_as_json('editmessagecaption')
 
     def send(self) -> EditMessageCaptionResponse:
         """Send HTTP request to `editmessagecaption` Telegram Bot API endpoint synchronously and parse response."""
-        json_payload = self.post_as_json('editmessagecaption')
-        response = EditMessageCaptionResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(EditMessageCaptionResponse)
 
 
 class EditMessageMediaResponse(BaseTgResponse):
@@ -942,53 +1402,53 @@ class EditBytesMessageMediaRequest(BaseTgRequest):
         description="A JSON-serialized object for a new inline keyboard.",
     )
 
-    async def asend(self) -> EditMessageMediaResponse:
-        """Send HTTP request to `editmessagemedia` Telegram Bot API endpoint asynchronously and parse response."""
-        content = self.dict(exclude_none=True)
+    def get_form(self) -> tuple[dict, dict[str, FormFile]]:
+        """Split the request to the multipart form content and files attached by their names.
 
-        content['media'].pop('media_content')
-        media_bytes = io.BytesIO(self.media.media_content)
-        files = {self.media.media: media_bytes}
+        Media contents are excluded from `dict()`, so they are neither copied nor encoded.
+        """
+        content = self.dict(exclude_none=True, exclude={'media': {'media_content', 'thumbnail_content'}})
 
-        if not self.media.media.startswith('attach://'):
-            content['media']['media'] = f"attach://{content['media']['media']}"
+        attach_name = self.media.media.removeprefix('attach://')
+        files: dict[str, FormFile] = {attach_name: InputFile.validate(self.media.media_content)}
+        content['media']['media'] = f'attach://{attach_name}'
 
-        if content['media'].get('thumbnail') and content['media'].get('thumbnail_content'):
-            thumbnail = content['media']['thumbnail']
-            thumbnail_content = content['media'].pop('thumbnail_content')
-            thumbnail_bytes = io.BytesIO(thumbnail_content)
-            files[thumbnail] = thumbnail_bytes
+        thumbnail_content = getattr(self.media, 'thumbnail_content', None)
+        if thumbnail_content is not None and self.media.thumbnail:  # type: ignore[union-attr]
+            thumbnail_name = content['media']['thumbnail'].removeprefix('attach://')
+            files[thumbnail_name] = InputFile.validate(thumbnail_content)
+            content['media']['thumbnail'] = f'attach://{thumbnail_name}'
 
-            if not thumbnail.startswith('attach://'):
-                content['media']['thumbnail'] = f"attach://{thumbnail}"
+        return content, files
 
-        json_payload = await self.apost_multipart_form_data('editmessagemedia', content, files)
-        response = EditMessageMediaResponse.parse_raw(json_payload)
-        return response
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `editmessagemedia` Telegram Bot API endpoint asynchronously and return bytes."""
+        content, files = self.get_form()
+        return await self.apost_streaming_multipart('editmessagemedia', content, files)
+
+    async def asend(self) -> EditMessageMediaResponse:
+        """Send HTTP request to `editmessagemedia` Telegram Bot API endpoint asynchronously and parse response."""
+        return await self.asend_and_parse(EditMessageMediaResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `editmessagemedia` Telegram Bot API endpoint synchronously and return bytes."""
+        content, files = self.get_form()
+        return self.post_streaming_multipart('editmessagemedia', content, files)
 
     def send(self) -> EditMessageMediaResponse:
         """Send HTTP request to `editmessagemedia` Telegram Bot API endpoint synchronously and parse response."""
-        content = self.dict(exclude_none=True)
+        return self.send_and_parse(EditMessageMediaResponse)
 
-        content['media'].pop('media_content')
-        media_bytes = io.BytesIO(self.media.media_content)
-        files = {self.media.media: media_bytes}
 
-        if not self.media.media.startswith('attach://'):
-            content['media']['media'] = f"attach://{content['media']['media']}"
+class EditFileMessageMediaRequest(EditBytesMessageMediaRequest):
+    """Object encapsulates data for calling Telegram Bot API endpoint `editmessagemedia` with the media streamed.
 
-        if content['media'].get('thumbnail') and content['media'].get('thumbnail_content'):
-            thumbnail = content['media']['thumbnail']
-            thumbnail_content = content['media'].pop('thumbnail_content')
-            thumbnail_bytes = io.BytesIO(thumbnail_content)
-            files[thumbnail] = thumbnail_bytes
-
-            if not thumbnail.startswith('attach://'):
-                content['media']['thumbnail'] = f"attach://{thumbnail}"
+    See here https://core.telegram.org/bots/api#editmessagemedia
+    """
 
-        json_payload = self.post_multipart_form_data('editmessagemedia', content, files)
-        response = EditMessageMediaResponse.parse_raw(json_payload)
-        return response
+    media: Union[tg_types.InputMediaFileDocument, tg_types.InputMediaFilePhoto] = Field(  # type: ignore[assignment]
+        description="A JSON-serialized object for a new media content of the message.",
+    )
 
 
 class EditUrlMessageMediaRequest(BaseTgRequest):
@@ -1020,14 +1480,18 @@ class EditUrlMessageMediaRequest(BaseTgRequest):
         description="A JSON-serialized object for a new inline keyboard.",
     )
 
+    async def asend_raw(self) -> bytes:
+        """Send HTTP request to `editmessagemedia` Telegram Bot API endpoint asynchronously and return bytes."""
+        return await self.apost_as_json('editmessagemedia')
+
     async def asend(self) -> EditMessageMediaResponse:
         """Send HTTP request to `editmessagemedia` Telegram Bot API endpoint asynchronously and parse response."""
-        json_payload = await self.apost_as_json('editmessagemedia')
-        response = EditMessageMediaResponse.parse_raw(json_payload)
-        return response
+        return await self.asend_and_parse(EditMessageMediaResponse)
+
+    def send_raw(self) -> bytes:
+        """Send HTTP request to `editmessagemedia` Telegram Bot API endpoint synchronously and return bytes."""
+        return self.post_as_json('editmessagemedia')
 
     def send(self) -> EditMessageMediaResponse:
         """Send HTTP request to `editmessagemedia` Telegram Bot API endpoint synchronously and parse response."""
-        json_payload = self.post_as_json('editmessagemedia')
-        response = EditMessageMediaResponse.parse_raw(json_payload)
-        return response
+        return self.send_and_parse(EditMessageMediaResponse)
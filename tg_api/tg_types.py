@@ -6,6 +6,8 @@ from typing import Any, Union, Optional
 
 from pydantic import BaseModel, AnyHttpUrl, Field, root_validator
 
+from .input_files import BinaryContent, FileContent
+
 
 class ParseMode(str, Enum):
     MarkdownV2 = 'MarkdownV2'  # https://core.telegram.org/bots/api#markdownv2-style
@@ -1096,7 +1098,7 @@ class InputMediaBytesPhoto(BaseModel, ValidableMixin):
             to upload a new one using multipart/form-data under <file_attach_name> name.
         """),
     )
-    media_content: bytes = Field(
+    media_content: BinaryContent = Field(
         description="File to send in bytes.",
     )
     caption: str = Field(
@@ -1123,6 +1125,17 @@ class InputMediaBytesPhoto(BaseModel, ValidableMixin):
     )
 
 
+class InputMediaFilePhoto(InputMediaBytesPhoto):
+    """This model represents a photo uploaded from a path, a file object or an async iterable of bytes.
+
+    See here: https://core.telegram.org/bots/api#inputmediaphoto
+    """
+
+    media_content: FileContent = Field(  # type: ignore[assignment]
+        description="File to send, streamed in chunks.",
+    )
+
+
 class InputMediaUrlDocument(BaseModel, ValidableMixin):
     """This model represents a document with url or file id.
 
@@ -1151,7 +1164,7 @@ class InputMediaUrlDocument(BaseModel, ValidableMixin):
             if the thumbnail was uploaded using multipart/form-data under <file_attach_name>.
         """),
     )
-    thumbnail_content: bytes | None = Field(
+    thumbnail_content: BinaryContent | None = Field(
         default=None,
         description="Thumbnail of the sent file in bytes.",
     )
@@ -1199,7 +1212,7 @@ class InputMediaBytesDocument(BaseModel, ValidableMixin):
             to upload a new one using multipart/form-data under <file_attach_name> name.
         """),
     )
-    media_content: bytes = Field(
+    media_content: BinaryContent = Field(
         description="File to send in bytes.",
     )
     thumbnail: str | None = Field(
@@ -1213,7 +1226,7 @@ class InputMediaBytesDocument(BaseModel, ValidableMixin):
             using multipart/form-data under <file_attach_name>.
         """),
     )
-    thumbnail_content: bytes | None = Field(
+    thumbnail_content: BinaryContent | None = Field(
         default=None,
         description="Thumbnail of the sent file in bytes.",
     )
@@ -1244,6 +1257,21 @@ class InputMediaBytesDocument(BaseModel, ValidableMixin):
     )
 
 
+class InputMediaFileDocument(InputMediaBytesDocument):
+    """This model represents a document uploaded from a path, a file object or an async iterable of bytes.
+
+    See here: https://core.telegram.org/bots/api#inputmediadocument
+    """
+
+    media_content: FileContent = Field(  # type: ignore[assignment]
+        description="File to send, streamed in chunks.",
+    )
+    thumbnail_content: FileContent | None = Field(  # type: ignore[assignment]
+        default=None,
+        description="Thumbnail of the sent file, streamed in chunks.",
+    )
+
+
 class CallbackQuery(BaseModel, ValidableMixin):
     """This object represents an incoming callback query from a callback button in an inline keyboard.
 
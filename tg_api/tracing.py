@@ -0,0 +1,57 @@
+import hashlib
+import hmac
+
+from contextlib import nullcontext
+from typing import Any, ContextManager, Mapping
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover
+    trace = None  # type: ignore[assignment]
+
+# Spans go to the global tracer provider, they are not recorded until the application installs one
+TRACER = trace.get_tracer('tg_api') if trace else None
+
+SpanAttributes = Mapping[str, str | int | float | bool | None]
+
+
+def is_tracing_enabled() -> bool:
+    """Check that the application installed a tracer provider, otherwise spans would not be recorded anyway."""
+    return bool(trace) and not isinstance(
+        trace.get_tracer_provider(),
+        (trace.ProxyTracerProvider, trace.NoOpTracerProvider),
+    )
+
+
+def start_span(name: str, *, client_kind: bool = False) -> ContextManager[Any]:
+    """Start the span as a child of the current one, nothing is done if no tracer provider is installed."""
+    if not TRACER or not is_tracing_enabled():
+        return nullcontext()
+    kind = trace.SpanKind.CLIENT if client_kind else trace.SpanKind.INTERNAL
+    return TRACER.start_as_current_span(name, kind=kind)
+
+
+def set_span_attributes(attributes: SpanAttributes, span: Any = None) -> None:
+    """Set attributes of the span, the current one by default, skipping None values OpenTelemetry does not accept."""
+    if span is None and is_tracing_enabled():
+        span = trace.get_current_span()
+    if span is not None and span.is_recording():
+        span.set_attributes({key: value for key, value in attributes.items() if value is not None})
+
+
+def add_span_event(name: str, attributes: SpanAttributes) -> None:
+    """Add the event to the current span, if there is one being recorded."""
+    span = trace.get_current_span() if is_tracing_enabled() else None
+    if span is not None and span.is_recording():
+        span.add_event(name, {key: value for key, value in attributes.items() if value is not None})
+
+
+def hash_chat_id(chat_id: int | None, key: bytes | None) -> str | None:
+    """Hash chat id to tell chats apart in traces without exposing them to the tracing backend.
+
+    Chat ids are few enough to be found by brute force from a plain hash, so HMAC with the secret key of
+    the deployment is used. Without the key no hash is made.
+    """
+    if chat_id is None or not key:
+        return None
+    return hmac.new(key, str(chat_id).encode('ascii'), hashlib.sha256).hexdigest()[:16]
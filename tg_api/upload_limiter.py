@@ -0,0 +1,73 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
+import anyio
+
+DEFAULT_MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+
+
+class UploadLimiter:
+    """Admit multipart uploads of async client only while they fit the byte budget and the limit of parallel uploads.
+
+    Upload size is the total size of its files, files of unknown size count as one chunk. Uploads are admitted
+    in order of arrival, so a large file is not starved by small ones, and the file larger than the whole budget
+    is uploaded alone. Requests wait for admission first, before the scheduler turn and the rate limiter,
+    and hold it until the response is received. So a request waiting for the budget holds neither the turn
+    of its chat nor a rate limit token, which other requests could use meanwhile.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_UPLOAD_BYTES, max_uploads: int = 4) -> None:
+        self.max_bytes = max_bytes
+        self.max_uploads = max_uploads
+
+        self.bytes_in_flight = 0
+        self.uploads_in_flight = 0
+        self._waiters: deque[tuple[int, anyio.Event]] = deque()
+
+    @asynccontextmanager
+    async def upload(self, size: int) -> AsyncGenerator[None, None]:
+        """Wait until the upload of the size passed fits the limits and hold its share of the budget inside."""
+        await self._acquire(size)
+        try:
+            yield
+        finally:
+            self._release(size)
+
+    def fits(self, size: int) -> bool:
+        if not self.uploads_in_flight:
+            return True
+        return self.uploads_in_flight < self.max_uploads and self.bytes_in_flight + size <= self.max_bytes
+
+    async def _acquire(self, size: int) -> None:
+        if not self._waiters and self.fits(size):
+            self._admit(size)
+            return
+
+        waiter = (size, anyio.Event())
+        self._waiters.append(waiter)
+        try:
+            await waiter[1].wait()
+        except BaseException:
+            if waiter[1].is_set():
+                self._release(size)
+            else:
+                # Uploads behind may fit now when the first one in line is gone
+                self._waiters.remove(waiter)
+                self._admit_waiters()
+            raise
+
+    def _admit(self, size: int) -> None:
+        self.bytes_in_flight += size
+        self.uploads_in_flight += 1
+
+    def _release(self, size: int) -> None:
+        self.bytes_in_flight -= size
+        self.uploads_in_flight -= 1
+        self._admit_waiters()
+
+    def _admit_waiters(self) -> None:
+        while self._waiters and self.fits(self._waiters[0][0]):
+            size, admitted = self._waiters.popleft()
+            self._admit(size)
+            admitted.set()